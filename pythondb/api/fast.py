@@ -0,0 +1,127 @@
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework import serializers
+from rest_framework.renderers import JSONRenderer
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+DEFAULT_API_FAST_READ = {
+    "ENABLED": False,
+}
+
+# Поля, которые выводят значение из базы без изменений: строку, число
+# или логическое значение (`None` сериализатор пропускает сам).
+PLAIN_FIELDS = (
+    serializers.CharField,
+    serializers.IntegerField,
+    serializers.BooleanField,
+)
+
+
+def api_fast_read_options():
+    return {
+        **DEFAULT_API_FAST_READ,
+        **getattr(settings, "KNOWLEDGE_BASE_API_FAST_READ", {}),
+    }
+
+
+def _is_plain(field) -> bool:
+    if isinstance(field, serializers.PrimaryKeyRelatedField):
+        return field.pk_field is None
+    return isinstance(field, PLAIN_FIELDS)
+
+
+class CompiledFields:
+    """
+    Заранее разобранный сериализатор для быстрого чтения списков.
+
+    Каждому выводимому полю сопоставлена колонка модели, поэтому строки
+    читаются `values_list()` без создания экземпляров модели, а словарь
+    ответа собирается `zip` имён полей и кортежа строки — с тем же
+    порядком ключей и теми же значениями, что у `ModelSerializer`.
+    """
+
+    def __init__(self, names, columns):
+        self.names = names
+        self.columns = columns
+
+    @classmethod
+    def from_serializer(cls, serializer):
+        """
+        Поля `serializer` (уже с учётом `?fields=`/`?omit=`) или `None`,
+        если сериализатор нельзя заменить чтением колонок: у него свой
+        `to_representation`, поле не из колонки модели или поле
+        преобразует значение (даты, числа с плавающей точкой).
+        """
+        if (
+            type(serializer).to_representation
+            is not serializers.ModelSerializer.to_representation
+        ):
+            return None
+        opts = serializer.Meta.model._meta
+        names, columns = [], []
+        for name, field in serializer.fields.items():
+            if field.write_only:
+                continue
+            try:
+                model_field = opts.get_field(field.source)
+            except FieldDoesNotExist:
+                return None
+            if (
+                not model_field.concrete
+                or model_field.many_to_many
+                or not _is_plain(field)
+                or model_field.attname in columns
+            ):
+                return None
+            names.append(name)
+            columns.append(model_field.attname)
+        return cls(names, columns)
+
+    def values_list(self, queryset, ordering=()):
+        """
+        Строки `queryset` именованными кортежами: сначала колонки полей,
+        затем недостающие поля сортировки (по ним строится курсор
+        страницы).
+        """
+        columns = list(self.columns)
+        for field in ordering:
+            name = field.lstrip("-")
+            if name not in columns:
+                columns.append(name)
+        return queryset.values_list(*columns, named=True)
+
+    def to_dicts(self, rows):
+        names = self.names
+        return [dict(zip(names, row)) for row in rows]
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    `JSONRenderer` на `orjson`. Байты ответа те же, что у компактного
+    `JSONRenderer` (`ensure_ascii=False`), для строк, целых чисел,
+    логических значений и `null` — из них и состоят ответы
+    `CompiledFields`. Без `orjson`, с отступами или для данных, которые
+    `orjson` не кодирует, работает обычный `JSONRenderer`.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if (
+            orjson is None
+            or data is None
+            or not self.compact
+            or self.ensure_ascii
+            or self.get_indent(accepted_media_type, renderer_context or {})
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            ret = orjson.dumps(data)
+        except TypeError:
+            return super().render(data, accepted_media_type, renderer_context)
+        # Как в `JSONRenderer`: U+2028 и U+2029 экранируются для JavaScript.
+        return ret.replace(b"\xe2\x80\xa8", b"\\u2028").replace(
+            b"\xe2\x80\xa9", b"\\u2029"
+        )
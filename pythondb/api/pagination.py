@@ -0,0 +1,112 @@
+from django.conf import settings
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+from knowledge_base.pagination import cursor_values, keyset_page
+
+DEFAULT_API_PAGINATION = {
+    "PAGE_SIZE": 20,
+    "MAX_PAGE_SIZE": 100,
+}
+
+
+def api_pagination_options():
+    return {
+        **DEFAULT_API_PAGINATION,
+        **getattr(settings, "KNOWLEDGE_BASE_API_PAGINATION", {}),
+    }
+
+
+class KeysetPagination(BasePagination):
+    """
+    Постраничный вывод списков API по непрозрачному курсору.
+
+    Порядок строк задаёт атрибут `ordering` вьюхи (последнее поле
+    уникально, обычно `id`), следующая страница выбирается условием
+    на ключ последней строки (`keyset_page`), поэтому стоимость
+    запроса не зависит от глубины страницы. Размер страницы клиент
+    задаёт параметром `page_size`, но не больше `MAX_PAGE_SIZE`: ответ
+    и память на его сериализацию ограничены одной страницей, как бы
+    велик ни был список.
+    """
+
+    cursor_query_param = "cursor"
+    page_size_query_param = "page_size"
+    default_ordering = ("id",)
+    invalid_cursor_message = "Invalid cursor"
+
+    def __init__(self):
+        options = api_pagination_options()
+        self.page_size = options["PAGE_SIZE"]
+        self.max_page_size = options["MAX_PAGE_SIZE"]
+
+    def get_ordering(self, view):
+        return tuple(getattr(view, "ordering", None) or self.default_ordering)
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if page_size < 1:
+            return self.page_size
+        return min(page_size, self.max_page_size)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        ordering = self.get_ordering(view)
+        cursor = request.query_params.get(self.cursor_query_param)
+        if cursor and cursor_values(queryset.model, ordering, cursor) is None:
+            raise NotFound(self.invalid_cursor_message)
+        self.request = request
+        rows, self.next_cursor = keyset_page(
+            queryset, ordering, cursor, self.get_page_size(request)
+        )
+        return rows
+
+    def get_next_link(self):
+        if self.next_cursor is None:
+            return None
+        return replace_query_param(
+            self.request.build_absolute_uri(),
+            self.cursor_query_param,
+            self.next_cursor,
+        )
+
+    def get_paginated_response(self, data):
+        return Response({"next": self.get_next_link(), "results": data})
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "next": {
+                    "type": "string",
+                    "nullable": True,
+                    "format": "uri",
+                    "example": "http://api.example.org/accounts/"
+                    f"?{self.cursor_query_param}=cD00ODY%3D",
+                },
+                "results": schema,
+            },
+        }
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {
+                "name": self.cursor_query_param,
+                "required": False,
+                "in": "query",
+                "description": "The pagination cursor value.",
+                "schema": {"type": "string"},
+            },
+            {
+                "name": self.page_size_query_param,
+                "required": False,
+                "in": "query",
+                "description": "Number of results to return per page.",
+                "schema": {"type": "integer"},
+            },
+        ]
@@ -1,24 +1,80 @@
 from rest_framework import serializers
+from rest_framework.permissions import SAFE_METHODS
 
 from knowledge_base.models import Category, Post, SubCategory
 
 
-class CategorySerializer(serializers.ModelSerializer):
+def _names(value):
+    return {name.strip() for name in value.split(",") if name.strip()}
+
+
+class SparseFieldsetMixin:
+    """
+    Выбор полей ответа параметрами запроса на чтение.
+
+    `?fields=id,title` оставляет только перечисленные поля, `?omit=`
+    убирает поля, `?view=summary` заменяет набор полей по умолчанию
+    на компактный `summary_fields`. Поля из `extra_fields` выводятся
+    только по запросу (`fields` или `summary_fields`). Неизвестные имена
+    пропускаются. Поля только для записи не трогаются.
+    """
+
+    summary_fields = None
+    extra_fields = ()
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        request = self.context.get("request")
+        if request is None or request.method not in SAFE_METHODS:
+            keep = set(self.fields) - set(self.extra_fields)
+        else:
+            keep = self.selected_fields(request.query_params)
+        for name in list(self.fields):
+            if name not in keep and not self.fields[name].write_only:
+                self.fields.pop(name)
+
+    def selected_fields(self, params) -> set:
+        if "fields" in params:
+            keep = _names(params["fields"])
+        elif params.get("view") == "summary" and self.summary_fields:
+            keep = set(self.summary_fields)
+        else:
+            keep = set(self.fields) - set(self.extra_fields)
+        return keep - _names(params.get("omit", ""))
+
+
+class CategorySerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+    summary_fields = ("id", "name")
+
     class Meta:
         model = Category
         fields = ("name", "id", "description")
 
 
-class SubCategorySerializer(serializers.ModelSerializer):
+class SubCategorySerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+    summary_fields = ("id", "name")
+
     class Meta:
         model = SubCategory
         fields = ("id", "name", "category")
 
 
-class PostSerializer(serializers.ModelSerializer):
+class PostSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+    # Вместо текста поста — готовый отрывок, сохранённый вместе с ним.
+    summary_fields = ("id", "title", "excerpt", "author")
+    extra_fields = ("excerpt",)
+
     class Meta:
         model = Post
-        fields = ["id", "title", "content", "author", "category", "subcategory"]
+        fields = [
+            "id",
+            "title",
+            "content",
+            "excerpt",
+            "author",
+            "category",
+            "subcategory",
+        ]
         extra_kwargs = {
             "author": {"read_only": True},
             "category": {"required": False, "write_only": True},
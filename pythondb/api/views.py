@@ -1,37 +1,176 @@
+from django.http import Http404
 from django.shortcuts import get_object_or_404
 from rest_framework import viewsets
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import SAFE_METHODS, IsAuthenticated
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
 
+from api.fast import CompiledFields, FastJSONRenderer, api_fast_read_options
+from api.pagination import KeysetPagination
 from api.serializers import (
     CategorySerializer,
     PostSerializer,
     SubCategorySerializer,
 )
+from knowledge_base.conditional import (
+    make_etag,
+    not_modified,
+    queryset_state,
+    set_validators,
+)
 from knowledge_base.decorators import author_required
+from knowledge_base.identity import identity_map
 from knowledge_base.models import Category, Post, SubCategory
+from knowledge_base.versions import get_version
+from knowledge_base.views import POSTS_ORDERING
+
+
+class ConditionalListMixin:
+    """
+    Условный GET для списка: `ETag` считается одним агрегатным запросом
+    по queryset списка (количество строк и наибольшее значение
+    `last_modified_field`), и при совпадении с копией клиента ответ 304
+    отдаётся без сериализации. Этот запрос выполняется и для ответа 200.
 
+    Без `last_modified_field` изменения строк отражает версия
+    содержимого (`knowledge_base.versions`).
+    """
 
-class CategoryViewSet(viewsets.ReadOnlyModelViewSet):
+    last_modified_field = None
+
+    def list(self, request, *args, **kwargs):
+        state = queryset_state(
+            self.filter_queryset(self.get_queryset()),
+            self.last_modified_field,
+        )
+        parts = [
+            request.get_full_path(),
+            request.accepted_renderer.format,
+            request.user.pk,
+            state["count"],
+            state["last_modified"],
+        ]
+        if self.last_modified_field is None:
+            parts.append(get_version())
+        etag = make_etag(*parts)
+        response = not_modified(request, etag)
+        if response is None:
+            response = super().list(request, *args, **kwargs)
+        return set_validators(response, etag)
+
+
+class SparseQuerysetMixin:
+    """
+    Чтение только тех колонок, которые попадут в ответ: поля,
+    выбранные сериализатором (`api.serializers.SparseFieldsetMixin`),
+    и поля сортировки страницы передаются в `.only()`, поэтому
+    `?fields=id,title` или `?view=summary` не читают из базы текст
+    поста.
+    """
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        if self.request.method not in SAFE_METHODS:
+            return queryset
+        columns = [
+            field.source
+            for field in self.get_serializer().fields.values()
+            if not field.write_only and field.source != "*"
+        ]
+        columns.extend(
+            name.lstrip("-") for name in getattr(self, "ordering", ())
+        )
+        return queryset.only("pk", *columns)
+
+
+class FastListMixin:
+    """
+    Быстрое чтение списков (`KNOWLEDGE_BASE_API_FAST_READ`): строки
+    страницы читаются `values_list()` и превращаются в словари
+    заранее разобранными полями сериализатора (`CompiledFields`),
+    а JSON кодируется `FastJSONRenderer`. Ответ побайтно совпадает
+    с ответом `ModelSerializer`; если сериализатор нельзя так
+    заменить, список строится обычным путём.
+    """
+
+    def list(self, request, *args, **kwargs):
+        if not api_fast_read_options()["ENABLED"]:
+            return super().list(request, *args, **kwargs)
+        fields = CompiledFields.from_serializer(self.get_serializer())
+        if fields is None:
+            return super().list(request, *args, **kwargs)
+        rows = fields.values_list(
+            self.filter_queryset(self.get_queryset()),
+            getattr(self, "ordering", ()),
+        )
+        page = self.paginate_queryset(rows)
+        if page is None:
+            response = Response(fields.to_dicts(rows))
+        else:
+            response = self.get_paginated_response(fields.to_dicts(page))
+        if type(request.accepted_renderer) is JSONRenderer:
+            request.accepted_renderer = FastJSONRenderer()
+        return response
+
+
+class CategoryViewSet(
+    SparseQuerysetMixin,
+    ConditionalListMixin,
+    FastListMixin,
+    viewsets.ReadOnlyModelViewSet,
+):
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
+    pagination_class = KeysetPagination
+    ordering = ("id",)
 
 
-class SubCategoryViewSet(viewsets.ReadOnlyModelViewSet):
+class SubCategoryViewSet(
+    SparseQuerysetMixin,
+    ConditionalListMixin,
+    FastListMixin,
+    viewsets.ReadOnlyModelViewSet,
+):
     serializer_class = SubCategorySerializer
+    pagination_class = KeysetPagination
+    ordering = ("id",)
 
     def get_queryset(self):
         category_id = self.kwargs.get("category_id")
         return SubCategory.objects.filter(category=category_id)
 
 
-class PostViewSet(viewsets.ModelViewSet):
+class PostViewSet(
+    SparseQuerysetMixin,
+    ConditionalListMixin,
+    FastListMixin,
+    viewsets.ModelViewSet,
+):
     serializer_class = PostSerializer
+    pagination_class = KeysetPagination
     permission_classes = [IsAuthenticated]
+    last_modified_field = "updated_at"
+    # Порядок страницы постов сайта: индекс (subcategory, created_at, id).
+    ordering = POSTS_ORDERING
 
     def get_queryset(self):
         subcategory_id = self.kwargs.get("subcategory_id")
         return Post.objects.filter(subcategory=subcategory_id)
 
+    def get_object(self):
+        if self.request.method in SAFE_METHODS:
+            # Чтение: только нужные колонки (`SparseQuerysetMixin`).
+            return super().get_object()
+        # Пост, уже прочитанный в `author_required`, берётся из карты
+        # идентичности запроса.
+        post = identity_map(self.request).get_or_404(
+            Post, pk=self.kwargs[self.lookup_field]
+        )
+        if str(post.subcategory_id) != str(self.kwargs.get("subcategory_id")):
+            raise Http404
+        self.check_object_permissions(self.request, post)
+        return post
+
     def perform_create(self, serializer):
         subcategory_id = self.kwargs.get("subcategory_id")
         subcategory = get_object_or_404(SubCategory, id=subcategory_id)
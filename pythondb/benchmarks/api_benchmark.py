@@ -0,0 +1,166 @@
+"""
+Бенчмарк чтения списков API: ModelSerializer против быстрого чтения.
+
+Запуск из каталога с manage.py:
+
+    python -m benchmarks.api_benchmark
+    python -m benchmarks.api_benchmark --sizes 1000 10000 --keepdb
+
+Создаёт отдельную тестовую базу (как `manage.py test`), наполняет её
+синтетическими постами и категориями до каждого размера и для
+каждого списка выводит пропускную способность (строк в секунду, по
+медиане) обычного пути — экземпляры моделей, `ModelSerializer`,
+`JSONRenderer` — и быстрого — `values_list()`, `CompiledFields`,
+`FastJSONRenderer`. Перед замером проверяется, что оба пути дают
+одинаковые байты.
+"""
+
+import argparse
+import os
+import random
+import statistics
+import time
+
+import django
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "pythondb.settings")
+django.setup()
+
+from django.contrib.auth import get_user_model  # noqa: E402
+from django.db import connection  # noqa: E402
+from rest_framework.renderers import JSONRenderer  # noqa: E402
+
+from api.fast import CompiledFields, FastJSONRenderer, orjson  # noqa: E402
+from api.serializers import CategorySerializer, PostSerializer  # noqa: E402
+from knowledge_base.models import Category, Post, SubCategory  # noqa: E402
+from knowledge_base.views import POSTS_ORDERING  # noqa: E402
+
+WORDS = (
+    "декоратор функция класс модель представление шаблон запрос ответ "
+    "список словарь кортеж генератор итератор исключение контекст "
+    "decorator function class model view template query response list "
+    "dict tuple generator iterator exception context asyncio orm"
+).split()
+BATCH = 5000
+
+
+def fill_posts(target, subcategory, author, rnd):
+    current = Post.objects.count()
+    while current < target:
+        size = min(BATCH, target - current)
+        Post.objects.bulk_create(
+            Post(
+                title=" ".join(rnd.choices(WORDS, k=4)),
+                content=" ".join(rnd.choices(WORDS, k=rnd.randint(50, 300))),
+                category=subcategory.category,
+                subcategory=subcategory,
+                author=author,
+            )
+            for _ in range(size)
+        )
+        current += size
+
+
+def fill_categories(target, rnd):
+    current = Category.objects.count()
+    while current < target:
+        size = min(BATCH, target - current)
+        Category.objects.bulk_create(
+            Category(
+                name=f"Категория {current + i}",
+                slug=f"c{current + i}",
+                description=" ".join(rnd.choices(WORDS, k=10)),
+            )
+            for i in range(size)
+        )
+        current += size
+
+
+def serializer_path(serializer_class, queryset):
+    def run():
+        data = serializer_class(queryset.all(), many=True).data
+        return JSONRenderer().render(data)
+
+    return run
+
+
+def fast_path(serializer_class, queryset, ordering):
+    fields = CompiledFields.from_serializer(serializer_class())
+
+    def run():
+        rows = fields.values_list(queryset.all(), ordering)
+        return FastJSONRenderer().render(fields.to_dicts(rows))
+
+    return run
+
+
+def measure(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000]
+    )
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument(
+        "--keepdb",
+        action="store_true",
+        help="Не удалять тестовую базу, чтобы не наполнять её заново.",
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    if orjson is None:
+        print("orjson не установлен: FastJSONRenderer использует json")
+
+    old_name = connection.settings_dict["NAME"]
+    connection.creation.create_test_db(verbosity=0, keepdb=args.keepdb)
+    try:
+        rnd = random.Random(args.seed)
+        author, _ = get_user_model().objects.get_or_create(username="bench")
+        category, _ = Category.objects.get_or_create(
+            name="Benchmark", slug="benchmark"
+        )
+        subcategory, _ = SubCategory.objects.get_or_create(
+            name="Benchmark", category=category
+        )
+        for size in sorted(args.sizes):
+            fill_posts(size, subcategory, author, rnd)
+            fill_categories(size, rnd)
+            posts = Post.objects.filter(subcategory=subcategory).order_by(
+                *POSTS_ORDERING
+            )[:size]
+            categories = Category.objects.order_by("id")[:size]
+            lists = {
+                "posts": (PostSerializer, posts, POSTS_ORDERING),
+                "categories": (CategorySerializer, categories, ("id",)),
+            }
+            for name, (serializer_class, queryset, ordering) in lists.items():
+                candidates = {
+                    "serializer": serializer_path(serializer_class, queryset),
+                    "fast": fast_path(serializer_class, queryset, ordering),
+                }
+                if candidates["serializer"]() != candidates["fast"]():
+                    raise SystemExit(f"Ответы различаются: {name}, {size}")
+                for path, func in candidates.items():
+                    median = statistics.median(measure(func, args.repeat))
+                    print(
+                        f"{size:>7} строк  {name:<10} {path:<10} "
+                        f"{size / median:>12,.0f} строк/с  "
+                        f"медиана {median * 1000:>9.2f} мс"
+                    )
+    finally:
+        connection.creation.destroy_test_db(
+            old_name, verbosity=0, keepdb=args.keepdb
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""
+Бенчмарк рендеринга постов: однопроходный токенизатор против цепочки
+регулярных выражений.
+
+Запуск из каталога с manage.py:
+
+    python -m benchmarks.render_benchmark
+    python -m benchmarks.render_benchmark --full --repeat 5
+
+Для каждого размера синтетического поста (1 КБ – 1 МБ) выводит
+пропускную способность (МБ/с, по медиане) и худшую задержку. Без
+`--full` измеряется только подготовка текста перед `markdown2`,
+с `--full` — весь рендеринг, включая `markdown2`.
+"""
+
+import argparse
+import os
+import random
+import statistics
+import time
+
+import django
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "pythondb.settings")
+django.setup()
+
+import markdown2  # noqa: E402
+
+from knowledge_base.rendering import (  # noqa: E402
+    MARKDOWN_EXTRAS,
+    prepare_post_markdown,
+    prepare_post_markdown_regex,
+)
+
+SIZES = (1024, 10 * 1024, 100 * 1024, 1024 * 1024)
+
+PARAGRAPHS = (
+    "Списки — изменяемые последовательности, а кортежи — нет.\n\n",
+    "Используйте `dict.get()` вместо проверки через `in`.\n\n",
+    "Сравнение a < b и b > c работает цепочкой: a < b > c.\n\n",
+    "Теги вроде <div class='x'> и <br> экранируются.\n\n",
+    "'''python\ndef example(items):\n    return [i for i in items if i]\n'''\n\n",
+    "'''\nfor key, value in data.items():\n    print(key, value)\n'''\n\n",
+)
+
+
+def typical_post(size, rnd):
+    parts = []
+    length = 0
+    while length < size:
+        paragraph = rnd.choice(PARAGRAPHS)
+        parts.append(paragraph)
+        length += len(paragraph)
+    return "".join(parts)[:size]
+
+
+def pathological_post(size, rnd):
+    # Длинная строка из `<` без закрывающего `>`: худший случай для TAG_RE.
+    return "".join(rnd.choice("<<<< ab") for _ in range(size))
+
+
+def measure(func, text, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func(text)
+        timings.append(time.perf_counter() - started)
+    return timings
+
+
+def report(name, kind, size, timings):
+    megabytes = size / (1024 * 1024)
+    median = statistics.median(timings)
+    throughput = megabytes / median if median else float("inf")
+    print(
+        f"{kind:<12} {size // 1024:>6} КБ  {name:<10} "
+        f"{throughput:>10.2f} МБ/с  худшая {max(timings) * 1000:>10.2f} мс"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument(
+        "--full",
+        action="store_true",
+        help="Измерять весь рендеринг, включая markdown2.",
+    )
+    parser.add_argument(
+        "--regex-pathological-limit",
+        type=int,
+        default=100 * 1024,
+        help=(
+            "Максимальный размер патологического поста для цепочки "
+            "регулярных выражений (она квадратична на таких данных)."
+        ),
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    if args.full:
+        candidates = {
+            "tokenizer": lambda text: markdown2.markdown(
+                prepare_post_markdown(text), extras=MARKDOWN_EXTRAS
+            ),
+            "regex": lambda text: markdown2.markdown(
+                prepare_post_markdown_regex(text), extras=MARKDOWN_EXTRAS
+            ),
+        }
+    else:
+        candidates = {
+            "tokenizer": prepare_post_markdown,
+            "regex": prepare_post_markdown_regex,
+        }
+
+    rnd = random.Random(args.seed)
+    for kind, generate in (
+        ("typical", typical_post),
+        ("pathological", pathological_post),
+    ):
+        for size in SIZES:
+            text = generate(size, rnd)
+            run_regex = (
+                kind == "typical" or size <= args.regex_pathological_limit
+            )
+            if run_regex and prepare_post_markdown(
+                text
+            ) != prepare_post_markdown_regex(text):
+                raise SystemExit(f"Результаты различаются: {kind}, {size}")
+            for name, func in candidates.items():
+                if name == "regex" and not run_regex:
+                    print(
+                        f"{kind:<12} {size // 1024:>6} КБ  {name:<10} пропущено"
+                    )
+                    continue
+                report(name, kind, size, measure(func, text, args.repeat))
+
+
+if __name__ == "__main__":
+    main()
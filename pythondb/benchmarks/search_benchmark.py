@@ -0,0 +1,146 @@
+"""
+Бенчмарк поиска /search/ на 10k, 100k и 1M постов.
+
+Запуск из каталога с manage.py:
+
+    python -m benchmarks.search_benchmark
+    python -m benchmarks.search_benchmark --sizes 10000 100000 --keepdb
+
+Создаёт отдельную тестовую базу (как `manage.py test`), наполняет её
+синтетическими постами до каждого размера и для каждого доступного
+бэкенда поиска выводит медиану, p95 и худшую задержку запросов.
+Полнотекстовый бэкенд измеряется только на PostgreSQL. Для бэкенда
+"index" отдельно выводится время построения индекса.
+"""
+
+import argparse
+import os
+import random
+import statistics
+import time
+
+import django
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "pythondb.settings")
+django.setup()
+
+from django.contrib.auth import get_user_model  # noqa: E402
+from django.db import connection  # noqa: E402
+from django.test import override_settings  # noqa: E402
+
+from knowledge_base.models import Category, Post, SubCategory  # noqa: E402
+from knowledge_base.search.backends import (  # noqa: E402
+    DatabaseSearchBackend,
+    IndexSearchBackend,
+    PostgresSearchBackend,
+)
+from knowledge_base.search.index import get_index, reset_index  # noqa: E402
+
+WORDS = (
+    "декоратор функция класс модель представление шаблон запрос ответ "
+    "список словарь кортеж генератор итератор исключение контекст "
+    "decorator function class model view template query response list "
+    "dict tuple generator iterator exception context asyncio orm"
+).split()
+QUERIES = ("декоратор", "orm", "asyncio генератор", "шаблон view", "xyzzy")
+BATCH = 5000
+
+
+def fill(target, category, subcategory, author, rnd):
+    current = Post.objects.count()
+    while current < target:
+        size = min(BATCH, target - current)
+        Post.objects.bulk_create(
+            Post(
+                title=" ".join(rnd.choices(WORDS, k=4)),
+                content=" ".join(rnd.choices(WORDS, k=rnd.randint(50, 300))),
+                category=category,
+                subcategory=subcategory,
+                author=author,
+            )
+            for _ in range(size)
+        )
+        current += size
+
+
+def measure(backend, repeat):
+    timings = []
+    for query in QUERIES:
+        for _ in range(repeat):
+            started = time.perf_counter()
+            results = backend.search(query.split())
+            # Как во вьюхе: первые секции, страница постов и счётчик.
+            list(results["categories"][:10])
+            list(results["subcategories"][:10])
+            backend.page(results["posts"], None, 20)
+            backend.count(results["posts"], 1000)
+            timings.append(time.perf_counter() - started)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000]
+    )
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument(
+        "--keepdb",
+        action="store_true",
+        help="Не удалять тестовую базу, чтобы не наполнять её заново.",
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    backends = {
+        "database": DatabaseSearchBackend(),
+        "index": IndexSearchBackend(),
+    }
+    if connection.vendor == "postgresql":
+        backends["postgres"] = PostgresSearchBackend()
+
+    old_name = connection.settings_dict["NAME"]
+    connection.creation.create_test_db(verbosity=0, keepdb=args.keepdb)
+    # Индекс строится заново для каждого размера и не пишется на диск.
+    index_settings = override_settings(
+        KNOWLEDGE_BASE_SEARCH={"BACKEND": "index", "INDEX_PATH": None}
+    )
+    index_settings.enable()
+    try:
+        rnd = random.Random(args.seed)
+        author, _ = get_user_model().objects.get_or_create(username="bench")
+        category, _ = Category.objects.get_or_create(
+            name="Benchmark", slug="benchmark"
+        )
+        subcategory, _ = SubCategory.objects.get_or_create(
+            name="Benchmark", category=category
+        )
+        for size in sorted(args.sizes):
+            fill(size, category, subcategory, author, rnd)
+            if connection.vendor == "postgresql":
+                with connection.cursor() as cursor:
+                    cursor.execute("ANALYZE knowledge_base_post")
+            reset_index()
+            started = time.perf_counter()
+            get_index()
+            print(
+                f"{size:>9} постов  построение индекса "
+                f"{time.perf_counter() - started:.1f} с"
+            )
+            for name, backend in backends.items():
+                timings = measure(backend, args.repeat)
+                print(
+                    f"{size:>9} постов  {name:<9} "
+                    f"медиана {statistics.median(timings) * 1000:>9.2f} мс  "
+                    f"p95 {statistics.quantiles(timings, n=20)[-1] * 1000:>9.2f} мс  "
+                    f"худшая {max(timings) * 1000:>9.2f} мс"
+                )
+    finally:
+        index_settings.disable()
+        connection.creation.destroy_test_db(
+            old_name, verbosity=0, keepdb=args.keepdb
+        )
+
+
+if __name__ == "__main__":
+    main()
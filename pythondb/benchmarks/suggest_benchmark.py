@@ -0,0 +1,120 @@
+"""
+Бенчмарк подсказок /search/suggest/ на 10k, 100k и 1M заголовков.
+
+Запуск из каталога с manage.py:
+
+    python -m benchmarks.suggest_benchmark
+    python -m benchmarks.suggest_benchmark --sizes 100000 --queries 2000
+
+Индекс подсказок наполняется синтетическими заголовками напрямую, без
+базы данных. Для каждого размера выводятся время построения и медиана,
+p99 и худшая задержка запросов: префиксы разной длины, несколько слов
+и слова с опечатками.
+"""
+
+import argparse
+import os
+import random
+import statistics
+import time
+
+import django
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "pythondb.settings")
+django.setup()
+
+from knowledge_base.search.suggest import SuggestIndex  # noqa: E402
+
+SYLLABLES = (
+    "ка ко ра ро то те ни на ли ло ме ма де ди ге го ва ви за зи пе по "
+    "ся сь ры ст ор ер ин ан ен ир "
+    "de co ra to ti on ge ne li st ma pe fi le se ry ar in"
+).split()
+CATEGORIES = 20
+SUBCATEGORIES = 400
+
+
+def make_vocabulary(rnd, size):
+    words = set()
+    while len(words) < size:
+        words.add("".join(rnd.choices(SYLLABLES, k=rnd.randint(2, 5))))
+    return sorted(words)
+
+
+def typo(rnd, word):
+    position = rnd.randrange(len(word))
+    return word[:position] + rnd.choice("абвгдеклмнопрстaeiost") + word[
+        position + 1 :
+    ]
+
+
+def make_queries(rnd, titles, count):
+    queries = []
+    for _ in range(count):
+        words = rnd.choice(titles).lower().split()
+        word = rnd.choice(words)
+        kind = rnd.random()
+        if kind < 0.5:
+            queries.append(word[: rnd.randint(1, len(word))])
+        elif kind < 0.8:
+            queries.append(" ".join(words[:2])[: rnd.randint(4, 30)])
+        else:
+            queries.append(typo(rnd, word))
+    return queries
+
+
+def build(rnd, vocabulary, size):
+    index = SuggestIndex()
+    for category_id in range(1, CATEGORIES + 1):
+        index.add_category(
+            category_id, rnd.choice(vocabulary).title(), f"c{category_id}"
+        )
+    for subcategory_id in range(1, SUBCATEGORIES + 1):
+        index.add_subcategory(
+            subcategory_id,
+            rnd.choice(vocabulary).title(),
+            rnd.randint(1, CATEGORIES),
+        )
+    titles = []
+    for post_id in range(1, size + 1):
+        title = " ".join(rnd.choices(vocabulary, k=rnd.randint(2, 7)))
+        titles.append(title)
+        index.add_post(post_id, title, rnd.randint(1, SUBCATEGORIES))
+    return index, titles
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000]
+    )
+    parser.add_argument("--vocabulary", type=int, default=50_000)
+    parser.add_argument("--queries", type=int, default=5000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rnd = random.Random(args.seed)
+    vocabulary = make_vocabulary(rnd, args.vocabulary)
+    for size in args.sizes:
+        started = time.perf_counter()
+        index, titles = build(rnd, vocabulary, size)
+        built = time.perf_counter() - started
+        queries = make_queries(rnd, titles, args.queries)
+        # Первый запрос сортирует словарь после массовой вставки.
+        index.suggest(queries[0])
+
+        timings = []
+        for query in queries:
+            started = time.perf_counter()
+            index.suggest(query)
+            timings.append(time.perf_counter() - started)
+        print(
+            f"{size:>9} заголовков  построение {built:>6.1f} с  "
+            f"медиана {statistics.median(timings) * 1000:>6.2f} мс  "
+            f"p99 {statistics.quantiles(timings, n=100)[-1] * 1000:>6.2f} мс  "
+            f"худшая {max(timings) * 1000:>6.2f} мс"
+        )
+
+
+if __name__ == "__main__":
+    main()
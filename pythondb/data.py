@@ -11,3 +11,6 @@ PATH_MAIN = "knowledge_base/main.html"
 POSTS_BY_SUBCATEGORY = "posts_by_subcategory"
 POSTS = "posts"
 SUBCATEGORY = "subcategory"
+SUBCATEGORY_PREVIEW_POSTS = 5
+POSTS_PAGE_SIZE = 10
+PATH_POST_CARDS = "includes/post_cards.html"
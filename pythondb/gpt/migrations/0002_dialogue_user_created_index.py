@@ -0,0 +1,20 @@
+# Generated by Django 5.1.6 on 2026-10-18 20:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("gpt", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="dialogue",
+            index=models.Index(
+                fields=["user", "created_at"],
+                name="gpt_dialogue_user_created",
+            ),
+        ),
+    ]
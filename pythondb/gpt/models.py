@@ -13,5 +13,15 @@ class Dialogue(models.Model):
     bot_message = models.TextField()
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        # История чата читается страницами по (created_at, id) внутри
+        # диалогов одного пользователя.
+        indexes = [
+            models.Index(
+                fields=["user", "created_at"],
+                name="gpt_dialogue_user_created",
+            ),
+        ]
+
     def __str__(self):
         return f"Диалог {self.id} пользователя {self.user.username}"
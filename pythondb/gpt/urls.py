@@ -1,6 +1,6 @@
 from django.urls import path
 
-from .views import chat, clean_chat, full_chat
+from .views import chat, chat_history, clean_chat, full_chat
 
 app_name = "gpt"
 
@@ -8,4 +8,5 @@ app_name = "gpt"
 urlpatterns = [
     path("", full_chat, name="chat"),
     path("clean-chat/", clean_chat, name="clean_chat"),
+    path("history/", chat_history, name="history"),
 ]
@@ -1,21 +1,22 @@
-import re
-
-import markdown2
 import openai
 from django.conf import settings
 from django.contrib.auth.decorators import login_required
 from django.http import JsonResponse
 from django.shortcuts import redirect, render
 
-from knowledge_base.models import Category
+from knowledge_base.pagination import keyset_page
+from knowledge_base.rendering import render_markup
 from .forms import ChatForm
 from .models import Dialogue
 
 openai.api_key = settings.OPENAI_API_KEY
 
+HISTORY_PAGE_SIZE = 20
+HISTORY_MAX_PAGE_SIZE = 100
+HISTORY_ORDERING = ("-created_at", "-id")
+
 
 def chat(request, fullscreen=False):
-    categories = Category.objects.all()
     if request.method == "POST":
         form = ChatForm(request.POST)
 
@@ -41,16 +42,7 @@ def chat(request, fullscreen=False):
                 model="gpt-4o-mini", messages=messages
             )
             reply = response["choices"][0]["message"]["content"].strip()
-            reply = re.sub(
-                r"```(\w*)\s*(.*?)\s*```",
-                lambda match: f"<pre><code class='language-{match.group(1) or 'python'}'>{match.group(2).strip()}</code></pre>",
-                reply,
-                flags=re.DOTALL,
-            )
-
-            reply_html = markdown2.markdown(
-                reply, extras=["fenced-code-blocks", "code-friendly"]
-            )
+            reply_html = render_markup("chat", reply)
 
             if request.user.is_authenticated:
                 Dialogue.objects.create(
@@ -68,26 +60,17 @@ def chat(request, fullscreen=False):
                 "full_chat.html" if fullscreen else "includes/chat.html",
                 {
                     "form": form,
-                    "categories": categories,
                     "reply": reply_html,
-                    "dialogues": (
-                        request.user.dialogues.all()
-                        if request.user.is_authenticated
-                        else []
-                    ),
                 },
             )
 
     else:
         form = ChatForm()
 
-    dialogues = (
-        request.user.dialogues.all() if request.user.is_authenticated else []
-    )
     return render(
         request,
         "gpt/full_chat.html" if fullscreen else "includes/chat.html",
-        {"form": form, "dialogues": dialogues, "categories": categories},
+        {"form": form},
     )
 
 
@@ -101,3 +84,42 @@ def clean_chat(request):
 
 def full_chat(request):
     return chat(request, fullscreen=True)
+
+
+def chat_history(request):
+    """
+    Возвращает страницу истории чата текущего пользователя в JSON,
+    от новых сообщений к старым.
+
+    Страницы выбираются по курсору на `(created_at, id)` (параметр
+    `after`, значение `next` из предыдущего ответа), поэтому стоимость
+    запроса не зависит от длины истории; неверный курсор открывает
+    первую страницу. Размер страницы — параметр `limit`, не больше
+    `HISTORY_MAX_PAGE_SIZE`. Для анонимного пользователя история пуста.
+    """
+    if not request.user.is_authenticated:
+        return JsonResponse({"results": [], "next": None})
+    try:
+        limit = int(request.GET.get("limit", HISTORY_PAGE_SIZE))
+    except ValueError:
+        limit = HISTORY_PAGE_SIZE
+    dialogues, next_cursor = keyset_page(
+        Dialogue.objects.filter(user=request.user),
+        HISTORY_ORDERING,
+        request.GET.get("after"),
+        min(max(limit, 1), HISTORY_MAX_PAGE_SIZE),
+    )
+    return JsonResponse(
+        {
+            "results": [
+                {
+                    "id": dialogue.id,
+                    "user_message": dialogue.user_message,
+                    "bot_message": dialogue.bot_message,
+                    "created_at": dialogue.created_at.isoformat(),
+                }
+                for dialogue in dialogues
+            ],
+            "next": next_cursor,
+        }
+    )
@@ -0,0 +1,43 @@
+from django.conf import settings
+from django.core.checks import Tags, Warning, register
+
+# Бэкенды, которые не видны другим процессам.
+PROCESS_LOCAL_CACHES = (
+    "django.core.cache.backends.locmem.LocMemCache",
+    "django.core.cache.backends.dummy.DummyCache",
+)
+
+
+@register(Tags.caches, deploy=True)
+def check_shared_caches(app_configs, **kwargs):
+    """
+    Счётчики версий содержимого и дерево навигации согласованы между
+    воркерами, только если их кэш общий (Redis, Memcached).
+    """
+    aliases = {
+        "KNOWLEDGE_BASE_VERSION_CACHE": getattr(
+            settings, "KNOWLEDGE_BASE_VERSION_CACHE", "default"
+        ),
+        "KNOWLEDGE_BASE_NAVIGATION_CACHE": getattr(
+            settings, "KNOWLEDGE_BASE_NAVIGATION_CACHE", None
+        ),
+    }
+    errors = []
+    for name, alias in aliases.items():
+        if alias is None:
+            continue
+        backend = settings.CACHES.get(alias, {}).get("BACKEND")
+        if backend in PROCESS_LOCAL_CACHES:
+            errors.append(
+                Warning(
+                    f"{name} использует кэш '{alias}' в памяти процесса "
+                    f"({backend}).",
+                    hint=(
+                        "Записи в одном воркере не сбрасывают кэши "
+                        "остальных. Задайте REDIS_URL или другой общий "
+                        "бэкенд в CACHES."
+                    ),
+                    id="knowledge_base.W001",
+                )
+            )
+    return errors
@@ -0,0 +1,140 @@
+import hashlib
+from functools import wraps
+
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import quote_etag
+
+from .likes import like_buffer, like_buffer_options
+from .models import Post
+from .versions import get_version
+
+
+def make_etag(*parts) -> str:
+    """ETag из частей состояния страницы: меняется вместе с любой из них."""
+    digest = hashlib.sha256("|".join(map(str, parts)).encode()).hexdigest()
+    return quote_etag(digest[:32])
+
+
+def queryset_state(queryset, last_modified_field=None) -> dict:
+    """
+    Одним запросом считает `count` строк `queryset` и, если задано поле,
+    `last_modified` — наибольшее значение `last_modified_field`.
+    """
+    aggregates = {"count": Count("pk")}
+    if last_modified_field is not None:
+        aggregates["last_modified"] = Max(last_modified_field)
+    state = queryset.order_by().aggregate(**aggregates)
+    state.setdefault("last_modified", None)
+    return state
+
+
+def not_modified(request, etag):
+    """
+    Ответ 304 (или 412), если копия клиента из `If-None-Match` ещё
+    актуальна, иначе `None`.
+    """
+    return get_conditional_response(request, etag=etag)
+
+
+def set_validators(response, etag):
+    """
+    Добавляет к ответам 200 и 304 `ETag`. Браузер хранит страницу, но
+    перед показом всегда проверяет её на сервере.
+
+    `Last-Modified` не выдаётся: время последней правки не меняется при
+    удалении постов, лайках и переименовании категорий, и клиент,
+    который присылает только `If-Modified-Since`, получил бы ложный 304.
+    """
+    if response.status_code not in (200, 304):
+        return response
+    response.headers.setdefault("ETag", etag)
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+def conditional_page(state_func):
+    """
+    Условный GET для вьюхи.
+
+    `state_func(request, *args, **kwargs)` дешёвыми агрегатными
+    запросами возвращает ETag страницы. Если копия клиента совпадает,
+    вьюха не вызывается и клиент получает 304 без рендеринга шаблона.
+    Запросы `state_func` выполняются и для ответа 200 и входят в бюджет
+    запросов вьюхи.
+    """
+
+    def decorator(view_func):
+        @wraps(view_func)
+        def _wrapped_view(request, *args, **kwargs):
+            if request.method not in ("GET", "HEAD"):
+                return view_func(request, *args, **kwargs)
+            etag = state_func(request, *args, **kwargs)
+            response = not_modified(request, etag)
+            if response is None:
+                response = view_func(request, *args, **kwargs)
+            return set_validators(response, etag)
+
+        return _wrapped_view
+
+    return decorator
+
+
+def category_page_state(request, category_slug):
+    """
+    ETag страницы категории, один запрос.
+
+    Категория, подкатегории и заголовки постов меняются только вместе
+    с версией содержимого; количество постов и время последней правки
+    поста категории добавлены на случай записей в обход сигналов.
+    """
+    state = queryset_state(
+        Post.objects.filter(subcategory__category__slug=category_slug),
+        "updated_at",
+    )
+    return make_etag(
+        "category",
+        category_slug,
+        get_version(),
+        request.user.pk,
+        state["count"],
+        state["last_modified"],
+    )
+
+
+def post_page_state(request, subcategory_id, category_slug):
+    """
+    ETag страницы постов подкатегории и её фрагментов (`post_page`),
+    два запроса (три, если в буфере есть отложенные лайки); курсор
+    страницы входит в ETag вместе с адресом.
+
+    Кроме постов (`MAX(updated_at)` и количество) на странице видны
+    лайки: их отражают количество строк и наибольший ID в таблице
+    лайков постов подкатегории — новый лайк всегда получает новый ID,
+    снятие лайка уменьшает количество. Отложенные лайки буфера входят
+    в ETag тем, что `merge` добавит к постам подкатегории
+    (`LikeBuffer.state_for`): пока их нет, ETag один у всех процессов.
+    """
+    state = queryset_state(
+        Post.objects.filter(subcategory_id=subcategory_id), "updated_at"
+    )
+    likes = Post.likes.through.objects.filter(
+        post__subcategory_id=subcategory_id
+    ).aggregate(count=Count("pk"), last=Max("pk"))
+    parts = [
+        request.get_full_path(),
+        get_version(),
+        request.user.pk,
+        state["count"],
+        state["last_modified"],
+        likes["count"],
+        likes["last"],
+    ]
+    if like_buffer_options()["ENABLED"]:
+        pending = like_buffer.pending_post_ids()
+        if pending:
+            post_ids = Post.objects.filter(
+                subcategory_id=subcategory_id, pk__in=pending
+            ).values_list("pk", flat=True)
+            parts.append(like_buffer.state_for(list(post_ids), request.user))
+    return make_etag(*parts)
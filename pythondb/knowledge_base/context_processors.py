@@ -0,0 +1,13 @@
+from data import CATEGORIES
+
+from .navigation import get_navigation
+
+
+def navigation(request):
+    """
+    Добавляет в контекст шаблонов дерево навигации (`navigation`) и
+    категории для меню в шапке (`categories`) без запросов к базе,
+    пока не изменилось содержимое.
+    """
+    tree = get_navigation()
+    return {"navigation": tree, CATEGORIES: tree.categories}
@@ -1,8 +1,8 @@
 from functools import wraps
 
 from django.core.exceptions import PermissionDenied
-from django.shortcuts import get_object_or_404
 
+from knowledge_base.identity import identity_map
 from knowledge_base.models import Post
 
 
@@ -17,9 +17,11 @@ def author_required(view_func):
             request = self_or_request.request
 
         post_id = kwargs.get("pk", kwargs.get("post_id"))
-        post = get_object_or_404(Post, id=post_id)
+        # Пост остаётся в карте идентичности запроса, и вьюха получает
+        # его без повторного запроса.
+        post = identity_map(request).get_or_404(Post, id=post_id)
 
-        if request.user != post.author and not request.user.is_superuser:
+        if post.author_id != request.user.pk and not request.user.is_superuser:
             raise PermissionDenied(
                 "You do not have permission to edit or delete this post."
             )
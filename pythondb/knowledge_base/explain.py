@@ -0,0 +1,102 @@
+import re
+
+from django.db import connections
+from django.db.models import F
+
+from data import POSTS_PAGE_SIZE, SUBCATEGORY_PREVIEW_POSTS
+from gpt.models import Dialogue
+from gpt.views import HISTORY_ORDERING, HISTORY_PAGE_SIZE
+
+from .models import Category, Post, User
+from .views import POSTS_ORDERING, preview_posts
+
+# Полный просмотр таблицы в планах PostgreSQL (`Seq Scan on t`) и SQLite
+# (`SCAN t` без `USING INDEX`).
+SEQ_SCAN_PATTERNS = (
+    re.compile(r"Seq Scan on (\w+)"),
+    re.compile(r"\bSCAN (\w+)\b(?! USING)"),
+)
+
+
+def hot_queries():
+    """
+    Запросы горячих страниц в том виде, в котором их выполняют вьюхи:
+    `(название, queryset)`. Параметры берутся из существующих строк,
+    чтобы план строился по реальному распределению данных.
+    """
+    post = Post.objects.order_by("-id").only("subcategory", "author").first()
+    subcategory_id = post.subcategory_id if post else 0
+    author_id = post.author_id if post else 0
+    category = Category.objects.order_by("pk").first() or Category(pk=0)
+    dialogue = Dialogue.objects.order_by("-id").only("user").first()
+    dialogue_user_id = dialogue.user_id if dialogue else 0
+
+    return [
+        (
+            "main: последние посты",
+            Post.objects.select_related(
+                "category", "subcategory", "author"
+            ).order_by("-created_at")[:5],
+        ),
+        (
+            "main: топ пользователей",
+            User.objects.filter(stats__post_count__gt=0)
+            .annotate(post_count=F("stats__post_count"))
+            .order_by("-stats__post_count")[:5],
+        ),
+        (
+            "category: превью постов подкатегорий",
+            preview_posts(category, SUBCATEGORY_PREVIEW_POSTS + 1),
+        ),
+        (
+            "post: посты подкатегории",
+            Post.objects.filter(subcategory_id=subcategory_id)
+            .select_related("author", "category")
+            .defer("content")
+            .order_by(*POSTS_ORDERING)[: POSTS_PAGE_SIZE + 1],
+        ),
+        (
+            "profile: посты автора",
+            Post.objects.filter(author_id=author_id).order_by("-created_at"),
+        ),
+        (
+            "gpt: история чата",
+            Dialogue.objects.filter(user_id=dialogue_user_id).order_by(
+                *HISTORY_ORDERING
+            )[: HISTORY_PAGE_SIZE + 1],
+        ),
+        (
+            "gpt: контекст диалога",
+            Dialogue.objects.filter(user_id=dialogue_user_id).order_by(
+                "created_at"
+            ),
+        ),
+    ]
+
+
+def explain(queryset, **options) -> str:
+    """
+    План запроса `queryset`. В отличие от `QuerySet.explain()` префикс
+    `EXPLAIN` ставится перед готовым SQL, поэтому работает и для
+    запросов, которые Django оборачивает в подзапрос (фильтр по
+    оконной функции в `preview_posts`).
+    """
+    connection = connections[queryset.db]
+    sql, params = queryset.query.sql_with_params()
+    prefix = connection.ops.explain_query_prefix(**options)
+    with connection.cursor() as cursor:
+        cursor.execute(f"{prefix} {sql}", params)
+        return "\n".join(" ".join(map(str, row)) for row in cursor.fetchall())
+
+
+def find_seq_scans(plan, tables) -> list:
+    """
+    Таблицы из `tables`, которые план `plan` просматривает целиком.
+    Имена не из `tables` — подзапросы и CTE — пропускаются.
+    """
+    found = []
+    for pattern in SEQ_SCAN_PATTERNS:
+        for table in pattern.findall(plan):
+            if table in tables and table not in found:
+                found.append(table)
+    return found
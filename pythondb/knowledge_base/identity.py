@@ -0,0 +1,66 @@
+from django.core.exceptions import ValidationError
+from django.http import Http404
+
+
+class IdentityMap:
+    """
+    Карта идентичности одного запроса: каждый объект модели читается из
+    базы не больше одного раза.
+
+    Объект запоминается по первичному ключу и по полям, по которым его
+    искали, поэтому категория, найденная по slug, а затем по ID,
+    остаётся тем же экземпляром. Карта живёт столько же, сколько
+    запрос (`identity_map`), и не требует сброса: записи в пределах
+    запроса меняют сам экземпляр.
+    """
+
+    def __init__(self):
+        self._objects = {}
+
+    @staticmethod
+    def _key(model, lookup):
+        opts = model._meta
+        fields = []
+        for name, value in lookup.items():
+            field = opts.pk if name in ("pk", "id") else opts.get_field(name)
+            fields.append((field.attname, field.to_python(value)))
+        return (opts.label, tuple(sorted(fields)))
+
+    def add(self, obj, **lookup):
+        """Запоминает `obj` по первичному ключу и по полям `lookup`."""
+        model = type(obj)
+        self._objects[self._key(model, {"pk": obj.pk})] = obj
+        if lookup:
+            self._objects[self._key(model, lookup)] = obj
+        return obj
+
+    def get(self, model, **lookup):
+        """
+        Объект `model` по точному совпадению полей `lookup`. Если его
+        нет в базе, исключение `model.DoesNotExist`.
+        """
+        obj = self._objects.get(self._key(model, lookup))
+        if obj is None:
+            obj = model._default_manager.get(**lookup)
+            self.add(obj, **lookup)
+        return obj
+
+    def get_or_404(self, model, **lookup):
+        """
+        Как `get`, но если объекта нет или значение поля не подходит
+        (например, нечисловой ID из URL API), — 404.
+        """
+        try:
+            return self.get(model, **lookup)
+        except (model.DoesNotExist, ValidationError, ValueError, TypeError):
+            raise Http404(f"No {model._meta.object_name} matches the query.")
+
+
+def identity_map(request) -> IdentityMap:
+    """Карта идентичности запроса (в том числе запроса DRF)."""
+    request = getattr(request, "_request", request)
+    try:
+        return request._identity_map
+    except AttributeError:
+        request._identity_map = IdentityMap()
+        return request._identity_map
@@ -0,0 +1,233 @@
+import atexit
+import logging
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Q
+
+from .models import Post
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LIKE_BUFFER = {
+    "ENABLED": False,
+    "FLUSH_INTERVAL": 5,
+    "FLUSH_SIZE": 100,
+}
+
+
+def like_buffer_options():
+    return {
+        **DEFAULT_LIKE_BUFFER,
+        **getattr(settings, "KNOWLEDGE_BASE_LIKE_BUFFER", {}),
+    }
+
+
+class LikeBuffer:
+    """
+    Буфер лайков с отложенной записью (write-behind).
+
+    Переключения лайков копятся в памяти процесса и сворачиваются по
+    паре (пользователь, пост): хранится только итоговое состояние, и
+    только если оно отличается от записанного в базе — лайк и снятие
+    лайка до сброса не дают ни одной записи. Буфер сбрасывается пачкой
+    (`bulk_create` и один `DELETE` по таблице лайков, затем пересчёт
+    `like_count` затронутых постов), когда в нём набралось
+    `flush_size` пар или с прошлого сброса прошло `flush_interval`
+    секунд, а также при завершении процесса.
+
+    Буфер свой у каждого процесса, поэтому до сброса отложенные лайки
+    видны только в нём: `merge` добавляет их к постам, прочитанным из
+    базы, и пользователь сразу видит свой лайк. Ошибка сброса из
+    `merge` и `toggle` только пишется в лог: пары остаются в буфере до
+    следующего сброса, а запрос получает ответ.
+    """
+
+    def __init__(self, flush_interval=5, flush_size=100):
+        self.flush_interval = flush_interval
+        self.flush_size = flush_size
+        self._pending = {}
+        self._flushed_at = time.monotonic()
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+
+    @classmethod
+    def from_settings(cls):
+        options = like_buffer_options()
+        return cls(
+            flush_interval=options["FLUSH_INTERVAL"],
+            flush_size=options["FLUSH_SIZE"],
+        )
+
+    def __len__(self):
+        return len(self._pending)
+
+    def toggle(self, user, post_id) -> bool:
+        """
+        Переключает лайк `user` для поста `post_id` в буфере и
+        возвращает, стоит ли лайк теперь.
+        """
+        key = (user.pk, post_id)
+        with self._lock:
+            pending = self._pending.pop(key, None)
+        if pending is not None:
+            # Повторное переключение возвращает состояние из базы.
+            liked = not pending
+        else:
+            liked = not Post.likes.through.objects.filter(
+                user_id=user.pk, post_id=post_id
+            ).exists()
+            with self._lock:
+                self._pending[key] = liked
+        self.maybe_flush()
+        return liked
+
+    def pending_for(self, user, post_ids) -> dict:
+        """Отложенные состояния лайков `user` для постов `post_ids`."""
+        with self._lock:
+            return {
+                post_id: self._pending[(user.pk, post_id)]
+                for post_id in post_ids
+                if (user.pk, post_id) in self._pending
+            }
+
+    def pending_post_ids(self) -> set:
+        """ID постов, у которых есть отложенные лайки."""
+        with self._lock:
+            return {post_id for _, post_id in self._pending}
+
+    def state_for(self, post_ids, user) -> tuple:
+        """
+        То, что `merge` добавит к постам `post_ids` для `user`: пары
+        (ID поста, изменение `like_count`) и отложенные лайки `user`.
+        Не зависит от порядка переключений, поэтому годится для ETag.
+        """
+        deltas = self.deltas(post_ids)
+        liked = (
+            self.pending_for(user, post_ids) if user.is_authenticated else {}
+        )
+        return (
+            tuple(sorted(deltas.items())),
+            tuple(sorted(liked.items())),
+        )
+
+    def deltas(self, post_ids) -> Counter:
+        """Изменения `like_count` постов `post_ids`, ещё не записанные."""
+        post_ids = set(post_ids)
+        deltas = Counter()
+        with self._lock:
+            for (_, post_id), liked in self._pending.items():
+                if post_id in post_ids:
+                    deltas[post_id] += 1 if liked else -1
+        return deltas
+
+    def merge(self, posts, user):
+        """
+        Добавляет к постам, прочитанным из базы, отложенные лайки:
+        меняет `like_count` и, если он есть, атрибут `liked`.
+        """
+        if not self._pending:
+            return posts
+        post_ids = [post.pk for post in posts]
+        deltas = self.deltas(post_ids)
+        liked = (
+            self.pending_for(user, post_ids) if user.is_authenticated else {}
+        )
+        for post in posts:
+            post.like_count += deltas.get(post.pk, 0)
+            if post.pk in liked:
+                post.liked = liked[post.pk]
+        # Без фонового потока сброс по интервалу происходит при чтении.
+        self.maybe_flush()
+        return posts
+
+    def maybe_flush(self):
+        """
+        Сбрасывает буфер, если он полон или истёк интервал. Вызывается
+        из запросов, поэтому ошибка сброса не выходит наружу.
+        """
+        elapsed = time.monotonic() - self._flushed_at
+        if len(self._pending) >= self.flush_size or (
+            self._pending and elapsed >= self.flush_interval
+        ):
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Не удалось записать отложенные лайки")
+
+    def flush(self) -> int:
+        """
+        Записывает отложенные лайки в базу и возвращает количество
+        сброшенных пар. Пары удалённых постов и пользователей
+        отбрасываются.
+        """
+        with self._flush_lock:
+            with self._lock:
+                pending, self._pending = self._pending, {}
+                self._flushed_at = time.monotonic()
+            if not pending:
+                return 0
+            likes = Post.likes.through
+            removed = [key for key, liked in pending.items() if not liked]
+            try:
+                with transaction.atomic():
+                    # Посты и пользователей могли удалить, пока лайки
+                    # ждали в буфере.
+                    existing = set(
+                        Post.objects.filter(
+                            pk__in={post_id for _, post_id in pending}
+                        ).values_list("pk", flat=True)
+                    )
+                    users = set(
+                        get_user_model()
+                        .objects.filter(
+                            pk__in={user_id for user_id, _ in pending}
+                        )
+                        .values_list("pk", flat=True)
+                    )
+                    likes.objects.bulk_create(
+                        [
+                            likes(user_id=user_id, post_id=post_id)
+                            for (user_id, post_id), liked in pending.items()
+                            if liked
+                            and post_id in existing
+                            and user_id in users
+                        ],
+                        ignore_conflicts=True,
+                    )
+                    if removed:
+                        likes.objects.filter(
+                            Q.create(
+                                [
+                                    Q(user_id=user_id, post_id=post_id)
+                                    for user_id, post_id in removed
+                                ],
+                                connector=Q.OR,
+                            )
+                        ).delete()
+                    Post.objects.filter(pk__in=existing).recount_likes()
+            except Exception:
+                # Лайки не теряются при временной ошибке: пары
+                # возвращаются в буфер, если их не успели переключить
+                # заново.
+                with self._lock:
+                    self._pending = {**pending, **self._pending}
+                raise
+            logger.debug("Записано отложенных лайков: %s", len(pending))
+            return len(pending)
+
+
+like_buffer = LikeBuffer.from_settings()
+
+
+@atexit.register
+def _flush_on_exit():
+    if len(like_buffer):
+        try:
+            like_buffer.flush()
+        except Exception:
+            logger.exception("Не удалось записать отложенные лайки")
@@ -0,0 +1,34 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from knowledge_base.search import search_options
+from knowledge_base.search.index import build_index
+
+
+class Command(BaseCommand):
+    help = (
+        "Строит инвертированный индекс поиска по всем постам и сохраняет "
+        "снимок в KNOWLEDGE_BASE_SEARCH['INDEX_PATH']. Процессы сайта "
+        "загружают снимок при первом поиске вместо полной индексации."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--path",
+            help="Куда сохранить снимок (по умолчанию INDEX_PATH).",
+        )
+
+    def handle(self, *args, **options):
+        path = options["path"] or search_options()["INDEX_PATH"]
+        if not path:
+            raise CommandError("Не задан путь снимка индекса (INDEX_PATH).")
+        started = time.monotonic()
+        index = build_index()
+        index.save(path)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Проиндексировано постов: {len(index)} за "
+                f"{time.monotonic() - started:.1f} с, снимок: {path}"
+            )
+        )
@@ -0,0 +1,63 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from knowledge_base.explain import explain, find_seq_scans, hot_queries
+
+
+class Command(BaseCommand):
+    help = (
+        "Выполняет EXPLAIN для запросов горячих страниц (главная, "
+        "категория, посты, профиль, история чата) на текущей базе и "
+        "отмечает полные просмотры таблиц. На маленьких таблицах "
+        "PostgreSQL выбирает полный просмотр и при наличии индекса, "
+        "поэтому запускать стоит на базе с реальными данными."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--analyze",
+            action="store_true",
+            help="EXPLAIN ANALYZE: выполнить запросы и показать время "
+            "(только PostgreSQL).",
+        )
+        parser.add_argument(
+            "--check",
+            action="store_true",
+            help="Завершиться с ошибкой, если есть полные просмотры.",
+        )
+
+    def handle(self, *args, **options):
+        explain_options = {}
+        if options["analyze"]:
+            if connection.vendor != "postgresql":
+                raise CommandError(
+                    "EXPLAIN ANALYZE поддерживается только для PostgreSQL."
+                )
+            explain_options["analyze"] = True
+
+        tables = set(connection.introspection.table_names())
+        flagged = []
+        for name, queryset in hot_queries():
+            plan = explain(queryset, **explain_options)
+            scanned = find_seq_scans(plan, tables)
+            self.stdout.write(self.style.MIGRATE_HEADING(name))
+            if options["verbosity"] > 1:
+                self.stdout.write(plan)
+            if scanned:
+                flagged.append(name)
+                self.stdout.write(
+                    self.style.WARNING(
+                        "  полный просмотр: " + ", ".join(scanned)
+                    )
+                )
+            else:
+                self.stdout.write("  полных просмотров нет")
+
+        if not flagged:
+            self.stdout.write(
+                self.style.SUCCESS("Все запросы используют индексы.")
+            )
+        elif options["check"]:
+            raise CommandError(
+                f"Запросов с полным просмотром таблиц: {len(flagged)}"
+            )
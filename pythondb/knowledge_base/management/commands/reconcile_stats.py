@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from knowledge_base.stats import reconcile_stats
+
+
+class Command(BaseCommand):
+    help = (
+        "Пересчитывает статистику главной страницы (счётчики категорий, "
+        "подкатегорий и постов, счётчики лайков постов, статистику "
+        "авторов) по таблицам и исправляет расхождения, например после "
+        "массовых операций в обход сигналов."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--check",
+            action="store_true",
+            help="Только найти расхождения, ничего не исправляя.",
+        )
+
+    def handle(self, *args, **options):
+        drift = reconcile_stats(fix=not options["check"])
+        for name, stored, actual in drift:
+            self.stdout.write(
+                f"{name}: сохранено {stored}, на самом деле {actual}"
+            )
+        if not drift:
+            self.stdout.write(self.style.SUCCESS("Расхождений нет."))
+        elif options["check"]:
+            raise CommandError(f"Найдено расхождений: {len(drift)}")
+        else:
+            self.stdout.write(
+                self.style.SUCCESS(f"Исправлено расхождений: {len(drift)}")
+            )
@@ -0,0 +1,230 @@
+import json
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from knowledge_base.models import Post
+from knowledge_base.rendering import RENDERER_VERSION, render_post_content
+
+
+def render_batch(batch):
+    """
+    Рендерит пачку `(id, updated_at, content)` в процессе-воркере.
+    Возвращает `(id, updated_at, html)`.
+    """
+    return [
+        (post_id, updated_at, render_post_content(content))
+        for post_id, updated_at, content in batch
+    ]
+
+
+class Command(BaseCommand):
+    help = (
+        "Перерендеривает сохранённый HTML постов (rendered_html) в пуле "
+        "процессов. По умолчанию обрабатывает только посты, которые ещё "
+        "не рендерились или отрендерены устаревшей версией."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--all",
+            action="store_true",
+            help="Перерендерить все посты, независимо от версии.",
+        )
+        parser.add_argument(
+            "--since",
+            help=(
+                "Обрабатывать только посты, изменённые начиная с этой даты "
+                "(YYYY-MM-DD или ISO 8601)."
+            ),
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="Размер пачки для чтения, рендеринга и bulk_update.",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=os.cpu_count() or 1,
+            help="Количество процессов; 1 — рендерить в текущем процессе.",
+        )
+        parser.add_argument(
+            "--checkpoint",
+            help=(
+                "Файл с ID последнего обработанного поста. Если файл есть "
+                "и записан с теми же --all, --since и версией рендеринга, "
+                "обработка продолжается после этого ID. После успешного "
+                "завершения файл удаляется."
+            ),
+        )
+        parser.add_argument(
+            "--reset-checkpoint",
+            action="store_true",
+            help="Начать заново, игнорируя сохранённый чекпоинт.",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        if batch_size < 1:
+            raise CommandError("--batch-size должен быть больше нуля.")
+
+        posts = Post.objects.all()
+        if not options["all"]:
+            posts = posts.exclude(renderer_version=RENDERER_VERSION)
+        if options["since"]:
+            posts = posts.filter(updated_at__gte=self._parse_since(options))
+
+        checkpoint = (
+            Path(options["checkpoint"]) if options["checkpoint"] else None
+        )
+        # Чекпоинт годится только для запуска с теми же фильтрами и той
+        # же версией рендеринга: иначе посты до его ID не обработаны.
+        self.run = {
+            "all": options["all"],
+            "since": options["since"],
+            "renderer_version": RENDERER_VERSION,
+        }
+        last_id = 0
+        if checkpoint and checkpoint.exists():
+            if options["reset_checkpoint"]:
+                checkpoint.unlink()
+            else:
+                last_id = self._read_checkpoint(checkpoint)
+                if last_id:
+                    self.stdout.write(f"Продолжение после поста #{last_id}")
+                else:
+                    self.stdout.write(
+                        "Чекпоинт записан другим запуском, начинаем заново"
+                    )
+        posts = posts.filter(id__gt=last_id).order_by("id")
+
+        self.total = posts.count()
+        self.done = 0
+        self.skipped = 0
+        self.started = time.monotonic()
+        self.checkpoint = checkpoint
+        rows = posts.values_list("id", "updated_at", "content").iterator(
+            chunk_size=batch_size
+        )
+
+        if options["workers"] > 1:
+            with ProcessPoolExecutor(max_workers=options["workers"]) as pool:
+                self._run_pool(pool, rows, batch_size, options["workers"])
+        else:
+            for batch in self._batches(rows, batch_size):
+                self._save(render_batch(batch))
+        if checkpoint:
+            # Все посты обработаны: следующий запуск начнёт сначала.
+            checkpoint.unlink(missing_ok=True)
+
+        elapsed = time.monotonic() - self.started
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Перерендерено постов: {self.done - self.skipped} за "
+                f"{elapsed:.1f} с"
+            )
+        )
+        if self.skipped:
+            self.stdout.write(
+                f"Пропущено постов, изменённых во время рендеринга: "
+                f"{self.skipped}"
+            )
+
+    def _run_pool(self, pool, rows, batch_size, workers):
+        # Результаты сохраняются в порядке отправки, чтобы чекпоинт
+        # никогда не опережал необработанные посты.
+        in_flight = deque()
+        for batch in self._batches(rows, batch_size):
+            in_flight.append(pool.submit(render_batch, batch))
+            if len(in_flight) >= workers * 2:
+                self._save(in_flight.popleft().result())
+        while in_flight:
+            self._save(in_flight.popleft().result())
+
+    @staticmethod
+    def _batches(rows, batch_size):
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    def _save(self, rendered):
+        # Пост, изменённый после чтения пачки, уже отрендерен при
+        # сохранении (`Post.save`), и старый HTML его бы затёр. Такие
+        # посты пропускаются; строки блокируются до записи, чтобы правка
+        # не попала между проверкой `updated_at` и `bulk_update`.
+        with transaction.atomic():
+            current = dict(
+                Post.objects.select_for_update()
+                .filter(id__in=[post_id for post_id, _, _ in rendered])
+                .values_list("id", "updated_at")
+            )
+            unchanged = [
+                Post(
+                    id=post_id,
+                    rendered_html=html,
+                    renderer_version=RENDERER_VERSION,
+                )
+                for post_id, updated_at, html in rendered
+                if current.get(post_id) == updated_at
+            ]
+            Post.objects.bulk_update(
+                unchanged, ["rendered_html", "renderer_version"]
+            )
+        self.done += len(rendered)
+        self.skipped += len(rendered) - len(unchanged)
+        if self.checkpoint:
+            self.checkpoint.write_text(
+                json.dumps({**self.run, "last_id": rendered[-1][0]})
+            )
+
+        elapsed = time.monotonic() - self.started
+        rate = self.done / elapsed if elapsed else 0
+        self.stdout.write(
+            f"{self.done}/{self.total} постов, {rate:.0f} постов/с, "
+            f"{elapsed:.1f} с"
+        )
+
+    def _read_checkpoint(self, checkpoint):
+        """ID из чекпоинта или 0, если он записан другим запуском."""
+        try:
+            saved = json.loads(checkpoint.read_text())
+        except ValueError:
+            return 0
+        if not isinstance(saved, dict):
+            return 0
+        last_id = saved.pop("last_id", 0)
+        if saved != self.run or not isinstance(last_id, int):
+            return 0
+        return last_id
+
+    @staticmethod
+    def _parse_since(options):
+        value = options["since"]
+        try:
+            since = parse_datetime(value)
+            date = parse_date(value) if since is None else None
+        except ValueError:
+            # Формат верный, но такой даты нет (2025-02-30).
+            since = date = None
+        if since is None:
+            if date is None:
+                raise CommandError(f"Не удалось разобрать дату: {value}")
+            since = datetime.combine(date, datetime.min.time())
+        if timezone.is_naive(since):
+            since = timezone.make_aware(since)
+        return since
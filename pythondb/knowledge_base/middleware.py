@@ -0,0 +1,148 @@
+import logging
+import re
+import time
+from collections import Counter
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_QUERY_BUDGET = {
+    "ENABLED": False,
+    "HEADERS": False,
+    "REPEAT_THRESHOLD": 3,
+    "BUDGETS": {},
+}
+
+# Списки параметров `IN (%s, %s, ...)` и литералы сворачиваются, чтобы
+# запросы, отличающиеся только значениями, давали один отпечаток.
+IN_LIST_RE = re.compile(r"\bIN \((?:%s|\?)(?:, (?:%s|\?))*\)")
+STRING_LITERAL_RE = re.compile(r"'(?:[^']|'')*'")
+NUMBER_LITERAL_RE = re.compile(r"\b\d+(?:\.\d+)?\b")
+
+
+def fingerprint(sql) -> str:
+    """SQL без конкретных значений: одинаков для повторов одного запроса."""
+    sql = STRING_LITERAL_RE.sub("?", sql)
+    sql = NUMBER_LITERAL_RE.sub("?", sql)
+    return IN_LIST_RE.sub("IN (...)", sql)
+
+
+class QueryRecorder:
+    """
+    Записывает SQL-запросы ко всем базам внутри блока `with`.
+
+    Хранит количество запросов, суммарное время и отпечатки запросов;
+    повторяющиеся отпечатки обычно означают N+1 — запрос в цикле по
+    объектам. Работает и без `DEBUG`, через `execute_wrapper`.
+    """
+
+    def __init__(self):
+        self.queries = []
+        self._stack = None
+
+    def __enter__(self):
+        self._stack = ExitStack()
+        for connection in connections.all():
+            self._stack.enter_context(connection.execute_wrapper(self))
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stack.close()
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append((sql, time.perf_counter() - started))
+
+    @property
+    def count(self) -> int:
+        return len(self.queries)
+
+    @property
+    def duration(self) -> float:
+        return sum(duration for _, duration in self.queries)
+
+    def repeated(self, threshold=2):
+        """Отпечатки, выполненные не меньше `threshold` раз."""
+        counts = Counter(fingerprint(sql) for sql, _ in self.queries)
+        return [
+            (sql, count)
+            for sql, count in counts.most_common()
+            if count >= threshold
+        ]
+
+    def report(self, threshold=2) -> str:
+        lines = [
+            f"{self.count} запросов, {self.duration * 1000:.1f} мс",
+        ]
+        for sql, count in self.repeated(threshold):
+            lines.append(f"  повторов {count}: {sql}")
+        return "\n".join(lines)
+
+
+def query_budget_options():
+    return {
+        **DEFAULT_QUERY_BUDGET,
+        **getattr(settings, "KNOWLEDGE_BASE_QUERY_BUDGET", {}),
+    }
+
+
+class QueryBudgetMiddleware:
+    """
+    Считает SQL-запросы каждого запроса к сайту.
+
+    Если включены заголовки, добавляет к ответу `X-DB-Query-Count`,
+    `X-DB-Time-Ms` и `X-DB-Repeated-Queries`. Превышение бюджета вьюхи
+    из `BUDGETS` (ключ — имя URL, например `knowledge_base:main`) или
+    повторы одного запроса не меньше `REPEAT_THRESHOLD` раз пишутся
+    в лог предупреждением с отпечатками запросов.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        options = query_budget_options()
+        if not options["ENABLED"]:
+            return self.get_response(request)
+
+        with QueryRecorder() as recorder:
+            response = self.get_response(request)
+
+        threshold = options["REPEAT_THRESHOLD"]
+        repeated = recorder.repeated(threshold)
+        match = request.resolver_match
+        view_name = match.view_name if match else None
+        budget = options["BUDGETS"].get(view_name)
+
+        if options["HEADERS"]:
+            response["X-DB-Query-Count"] = str(recorder.count)
+            response["X-DB-Time-Ms"] = f"{recorder.duration * 1000:.1f}"
+            response["X-DB-Repeated-Queries"] = str(len(repeated))
+            if budget is not None:
+                response["X-DB-Query-Budget"] = str(budget)
+
+        over_budget = budget is not None and recorder.count > budget
+        if over_budget or repeated:
+            logger.warning(
+                "%s %s (%s): бюджет %s\n%s",
+                request.method,
+                request.path,
+                view_name,
+                budget,
+                recorder.report(threshold),
+            )
+        else:
+            logger.debug(
+                "%s %s: %s запросов, %.1f мс",
+                request.method,
+                request.path,
+                recorder.count,
+                recorder.duration * 1000,
+            )
+        return response
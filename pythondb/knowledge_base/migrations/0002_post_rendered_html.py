@@ -0,0 +1,23 @@
+# Generated by Django 5.1.6 on 2026-10-18 19:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("knowledge_base", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="post",
+            name="rendered_html",
+            field=models.TextField(blank=True, editable=False),
+        ),
+        migrations.AddField(
+            model_name="post",
+            name="renderer_version",
+            field=models.PositiveSmallIntegerField(default=0, editable=False),
+        ),
+    ]
@@ -0,0 +1,65 @@
+# Generated by Django 5.1.6 on 2026-10-18 19:28
+
+import django.contrib.postgres.search
+from django.db import migrations
+
+# Триггер поддерживает search_vector при любой записи заголовка или текста,
+# включая bulk_create/bulk_update и update(). Только для PostgreSQL: на других
+# базах колонка остаётся пустой, и поиск использует DatabaseSearchBackend.
+CREATE_SEARCH_VECTOR = """
+CREATE FUNCTION knowledge_base_post_search_vector_update() RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector :=
+        setweight(to_tsvector('russian', coalesce(NEW.title, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(NEW.title, '')), 'A') ||
+        setweight(to_tsvector('russian', coalesce(NEW.content, '')), 'B') ||
+        setweight(to_tsvector('english', coalesce(NEW.content, '')), 'B');
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER knowledge_base_post_search_vector_trigger
+BEFORE INSERT OR UPDATE OF title, content ON knowledge_base_post
+FOR EACH ROW EXECUTE FUNCTION knowledge_base_post_search_vector_update();
+
+UPDATE knowledge_base_post SET title = title;
+
+CREATE INDEX knowledge_base_post_search_vector_gin
+ON knowledge_base_post USING gin (search_vector);
+"""
+
+DROP_SEARCH_VECTOR = """
+DROP INDEX IF EXISTS knowledge_base_post_search_vector_gin;
+DROP TRIGGER IF EXISTS knowledge_base_post_search_vector_trigger
+ON knowledge_base_post;
+DROP FUNCTION IF EXISTS knowledge_base_post_search_vector_update();
+"""
+
+
+def postgres_only(sql):
+    def run(apps, schema_editor):
+        if schema_editor.connection.vendor == "postgresql":
+            schema_editor.execute(sql)
+
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("knowledge_base", "0002_post_rendered_html"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="post",
+            name="search_vector",
+            field=django.contrib.postgres.search.SearchVectorField(
+                editable=False, null=True
+            ),
+        ),
+        migrations.RunPython(
+            postgres_only(CREATE_SEARCH_VECTOR),
+            postgres_only(DROP_SEARCH_VECTOR),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.1.6 on 2026-10-18 19:43
+
+from django.db import migrations, models
+
+from knowledge_base.rendering import make_excerpt
+
+BATCH_SIZE = 1000
+
+
+def fill_excerpts(apps, schema_editor):
+    Post = apps.get_model("knowledge_base", "Post")
+    batch = []
+    for post in Post.objects.only("id", "content").iterator(
+        chunk_size=BATCH_SIZE
+    ):
+        post.excerpt = make_excerpt(post.content)
+        batch.append(post)
+        if len(batch) >= BATCH_SIZE:
+            Post.objects.bulk_update(batch, ["excerpt"])
+            batch = []
+    Post.objects.bulk_update(batch, ["excerpt"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("knowledge_base", "0003_post_search_vector"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="post",
+            name="excerpt",
+            field=models.CharField(blank=True, editable=False, max_length=255),
+        ),
+        migrations.RunPython(fill_excerpts, migrations.RunPython.noop),
+    ]
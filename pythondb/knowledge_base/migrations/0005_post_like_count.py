@@ -0,0 +1,33 @@
+# Generated by Django 5.1.6 on 2026-10-18 20:12
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def fill_like_counts(apps, schema_editor):
+    Post = apps.get_model("knowledge_base", "Post")
+    Like = Post.likes.through
+    counts = (
+        Like.objects.filter(post_id=OuterRef("pk"))
+        .values("post_id")
+        .annotate(count=Count("*"))
+        .values("count")
+    )
+    Post.objects.update(like_count=Coalesce(Subquery(counts), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("knowledge_base", "0004_post_excerpt"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="post",
+            name="like_count",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(fill_like_counts, migrations.RunPython.noop),
+    ]
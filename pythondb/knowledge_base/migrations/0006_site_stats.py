@@ -0,0 +1,79 @@
+# Generated by Django 5.1.6 on 2026-10-18 20:14
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def fill_stats(apps, schema_editor):
+    Category = apps.get_model("knowledge_base", "Category")
+    SubCategory = apps.get_model("knowledge_base", "SubCategory")
+    Post = apps.get_model("knowledge_base", "Post")
+    SiteCounter = apps.get_model("knowledge_base", "SiteCounter")
+    UserStats = apps.get_model("knowledge_base", "UserStats")
+    SiteCounter.objects.bulk_create(
+        [
+            SiteCounter(name="categories", value=Category.objects.count()),
+            SiteCounter(
+                name="subcategories", value=SubCategory.objects.count()
+            ),
+            SiteCounter(name="posts", value=Post.objects.count()),
+        ]
+    )
+    rows = (
+        Post.objects.order_by()
+        .values("author_id")
+        .annotate(count=Count("*"))
+        .values_list("author_id", "count")
+    )
+    UserStats.objects.bulk_create(
+        (
+            UserStats(user_id=user_id, post_count=count)
+            for user_id, count in rows
+        ),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("auth", "0012_alter_user_first_name_max_length"),
+        ("knowledge_base", "0005_post_like_count"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SiteCounter",
+            fields=[
+                (
+                    "name",
+                    models.CharField(
+                        max_length=50, primary_key=True, serialize=False
+                    ),
+                ),
+                ("value", models.BigIntegerField(default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name="UserStats",
+            fields=[
+                (
+                    "user",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="stats",
+                        serialize=False,
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+                (
+                    "post_count",
+                    models.PositiveIntegerField(db_index=True, default=0),
+                ),
+            ],
+        ),
+        migrations.RunPython(fill_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,68 @@
+# Generated by Django 5.1.6 on 2026-10-18 20:39
+
+from django.conf import settings
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class AddIndexConcurrentlyOnPostgres(AddIndexConcurrently):
+    """
+    На PostgreSQL индекс строится `CREATE INDEX CONCURRENTLY` и не
+    блокирует запись в таблицу постов; на остальных базах — обычный
+    `CREATE INDEX`. Если построение прервётся, PostgreSQL оставит
+    невалидный индекс: его нужно удалить перед повторным `migrate`.
+    """
+
+    def database_forwards(
+        self, app_label, schema_editor, from_state, to_state
+    ):
+        if schema_editor.connection.vendor == "postgresql":
+            super().database_forwards(
+                app_label, schema_editor, from_state, to_state
+            )
+        else:
+            migrations.AddIndex.database_forwards(
+                self, app_label, schema_editor, from_state, to_state
+            )
+
+    def database_backwards(
+        self, app_label, schema_editor, from_state, to_state
+    ):
+        if schema_editor.connection.vendor == "postgresql":
+            super().database_backwards(
+                app_label, schema_editor, from_state, to_state
+            )
+        else:
+            migrations.AddIndex.database_backwards(
+                self, app_label, schema_editor, from_state, to_state
+            )
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY нельзя выполнить внутри транзакции.
+    atomic = False
+
+    dependencies = [
+        ("knowledge_base", "0006_site_stats"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        AddIndexConcurrentlyOnPostgres(
+            model_name="post",
+            index=models.Index(
+                fields=["subcategory", "created_at", "id"],
+                name="post_subcategory_created",
+            ),
+        ),
+        AddIndexConcurrentlyOnPostgres(
+            model_name="post",
+            index=models.Index(fields=["-created_at"], name="post_created"),
+        ),
+        AddIndexConcurrentlyOnPostgres(
+            model_name="post",
+            index=models.Index(
+                fields=["author", "-created_at"], name="post_author_created"
+            ),
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 5.1.6 on 2026-10-18 20:50
+
+from django.db import migrations, models
+from django.db.models import Max, Sum
+
+
+def fill_author_stats(apps, schema_editor):
+    Post = apps.get_model("knowledge_base", "Post")
+    UserStats = apps.get_model("knowledge_base", "UserStats")
+    rows = (
+        Post.objects.order_by()
+        .values("author_id")
+        .annotate(likes=Sum("like_count"), last=Max("created_at"))
+        .values_list("author_id", "likes", "last")
+    )
+    UserStats.objects.bulk_update(
+        (
+            UserStats(user_id=user_id, likes_received=likes, last_post_at=last)
+            for user_id, likes, last in rows
+        ),
+        ["likes_received", "last_post_at"],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("knowledge_base", "0007_post_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="userstats",
+            name="last_post_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="userstats",
+            name="likes_received",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(fill_author_stats, migrations.RunPython.noop),
+    ]
@@ -1,5 +1,10 @@
 from django.contrib.auth import get_user_model
-from django.db import models
+from django.contrib.postgres.search import SearchVectorField
+from django.db import models, transaction
+from django.db.models import Count, Exists, F, OuterRef, Q, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+from .rendering import RENDERER_VERSION, make_excerpt, render_markup
 
 User = get_user_model()
 
@@ -25,6 +30,38 @@ class SubCategory(models.Model):
         return self.name
 
 
+class PostQuerySet(models.QuerySet):
+    def with_liked(self, user):
+        """
+        Добавляет каждому посту атрибут `liked` — лайкнул ли его `user` —
+        подзапросом `EXISTS` в том же запросе, без запроса на каждый пост.
+        """
+        if not user.is_authenticated:
+            return self.annotate(liked=models.Value(False))
+        return self.annotate(
+            liked=Exists(
+                Post.likes.through.objects.filter(
+                    post_id=OuterRef("pk"), user_id=user.pk
+                )
+            )
+        )
+
+    def recount_likes(self):
+        """
+        Пересчитывает `like_count` постов по таблице лайков одним
+        запросом `UPDATE`, а затем `likes_received` их авторов.
+        """
+        counts = (
+            Post.likes.through.objects.filter(post_id=OuterRef("pk"))
+            .values("post_id")
+            .annotate(count=Count("*"))
+            .values("count")
+        )
+        updated = self.update(like_count=Coalesce(Subquery(counts), 0))
+        UserStats.recount_likes(self.values("author_id"))
+        return updated
+
+
 class Post(models.Model):
     title = models.CharField(max_length=200, verbose_name="Заголовок")
     content = models.TextField(verbose_name="Содержимое")
@@ -40,12 +77,212 @@ class Post(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     likes = models.ManyToManyField(User, related_name="liked_posts", blank=True)
+    # Денормализованное количество лайков: меняется вместе со строкой
+    # в таблице лайков в одной транзакции (см. `toggle_like`).
+    like_count = models.PositiveIntegerField(default=0, editable=False)
+    rendered_html = models.TextField(blank=True, editable=False)
+    renderer_version = models.PositiveSmallIntegerField(
+        default=0, editable=False
+    )
+    excerpt = models.CharField(max_length=255, blank=True, editable=False)
+    # Заполняется триггером PostgreSQL (миграция 0003_post_search_vector),
+    # на других базах остаётся пустым.
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    objects = PostQuerySet.as_manager()
+
+    class Meta:
+        # Частые запросы: посты подкатегории по дате (страница постов),
+        # последние посты (главная) и посты автора по дате (профиль).
+        indexes = [
+            models.Index(
+                fields=["subcategory", "created_at", "id"],
+                name="post_subcategory_created",
+            ),
+            models.Index(fields=["-created_at"], name="post_created"),
+            models.Index(
+                fields=["author", "-created_at"],
+                name="post_author_created",
+            ),
+        ]
 
     def __str__(self):
         return self.title
 
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get("update_fields")
+        if update_fields is None or "content" in update_fields:
+            self.render_content()
+            self.excerpt = make_excerpt(self.content)
+            if update_fields is not None:
+                kwargs["update_fields"] = {
+                    *update_fields,
+                    "rendered_html",
+                    "renderer_version",
+                    "excerpt",
+                }
+        # Статистика автора (`UserStats`) обновляется сигналами в той же
+        # транзакции, что и пост.
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
+    def render_content(self):
+        self.rendered_html = render_markup("post", self.content)
+        self.renderer_version = RENDERER_VERSION
+
+    @property
+    def is_rendered(self):
+        return self.renderer_version == RENDERER_VERSION
+
+    def is_liked_by(self, user):
+        return Post.likes.through.objects.filter(
+            post_id=self.pk, user_id=user.pk
+        ).exists()
+
     def toggle_like(self, user):
-        if user in self.likes.all():
-            self.likes.remove(user)
-        else:
-            self.likes.add(user)
+        """
+        Ставит или снимает лайк `user` и возвращает, стоит ли лайк теперь.
+
+        Строка в таблице лайков, `like_count` и `likes_received` автора
+        меняются в одной транзакции; счётчики обновляются через `F()`,
+        поэтому одновременные лайки разных пользователей не теряются.
+        """
+        likes = Post.likes.through.objects
+        with transaction.atomic():
+            deleted, _ = likes.filter(
+                post_id=self.pk, user_id=user.pk
+            ).delete()
+            if deleted:
+                delta, liked = -deleted, False
+            else:
+                _, created = likes.get_or_create(
+                    post_id=self.pk, user_id=user.pk
+                )
+                delta, liked = int(created), True
+            if delta:
+                Post.objects.filter(pk=self.pk).update(
+                    like_count=F("like_count") + delta
+                )
+                UserStats.add_likes(self.author_id, delta)
+        self.like_count += delta
+        return liked
+
+
+def add_to_counter(model, lookups, field, delta):
+    """
+    Атомарно прибавляет `delta` к полю-счётчику `field` строки `model`,
+    найденной по `lookups`, и создаёт строку, если её ещё нет. Счётчик
+    не уходит ниже нуля: такие расхождения исправляет `reconcile_stats`.
+    """
+    rows = model.objects.filter(**lookups)
+    if delta < 0:
+        rows.filter(**{f"{field}__gte": -delta}).update(
+            **{field: F(field) + delta}
+        )
+    elif not rows.update(**{field: F(field) + delta}):
+        _, created = model.objects.get_or_create(
+            **lookups, defaults={field: delta}
+        )
+        if not created:
+            rows.update(**{field: F(field) + delta})
+
+
+class SiteCounter(models.Model):
+    """
+    Общие счётчики сайта (категории, подкатегории, посты).
+
+    Поддерживаются сигналами (`signals.py`), поэтому главная страница
+    читает готовые значения вместо `COUNT(*)` по таблицам. Расхождения
+    после массовых операций в обход сигналов исправляет команда
+    `reconcile_stats`.
+    """
+
+    CATEGORIES = "categories"
+    SUBCATEGORIES = "subcategories"
+    POSTS = "posts"
+
+    name = models.CharField(max_length=50, primary_key=True)
+    value = models.BigIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.name}: {self.value}"
+
+    @classmethod
+    def add(cls, name, delta):
+        """Атомарно прибавляет `delta` к счётчику `name`."""
+        add_to_counter(cls, {"name": name}, "value", delta)
+
+    @classmethod
+    def values(cls) -> dict:
+        return dict(cls.objects.values_list("name", "value"))
+
+
+class UserStats(models.Model):
+    """
+    Статистика автора: количество постов, полученные лайки и время
+    последнего поста.
+
+    Поддерживается сигналами создания и удаления постов и
+    `Post.toggle_like` в тех же транзакциях, поэтому профиль и топ
+    авторов не считают посты. Расхождения исправляет `reconcile_stats`.
+    """
+
+    user = models.OneToOneField(
+        User, on_delete=models.CASCADE, primary_key=True, related_name="stats"
+    )
+    post_count = models.PositiveIntegerField(default=0, db_index=True)
+    likes_received = models.PositiveIntegerField(default=0)
+    last_post_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.user}: {self.post_count}"
+
+    @classmethod
+    def add_posts(cls, user_id, delta):
+        """Атомарно прибавляет `delta` к числу постов пользователя."""
+        add_to_counter(cls, {"user_id": user_id}, "post_count", delta)
+
+    @classmethod
+    def add_likes(cls, user_id, delta):
+        """Атомарно прибавляет `delta` к лайкам, полученным пользователем."""
+        add_to_counter(cls, {"user_id": user_id}, "likes_received", delta)
+
+    @classmethod
+    def post_added(cls, user_id, created_at):
+        """Учитывает новый пост пользователя, созданный в `created_at`."""
+        cls.add_posts(user_id, 1)
+        cls.objects.filter(user_id=user_id).filter(
+            Q(last_post_at__isnull=True) | Q(last_post_at__lt=created_at)
+        ).update(last_post_at=created_at)
+
+    @classmethod
+    def post_removed(cls, user_id, created_at, like_count):
+        """
+        Учитывает удалённый пост пользователя: вычитает пост и его лайки,
+        а если пост был последним, берёт время предыдущего.
+        """
+        cls.add_posts(user_id, -1)
+        if like_count:
+            cls.add_likes(user_id, -like_count)
+        last_post_at = (
+            Post.objects.filter(author_id=user_id)
+            .order_by("-created_at")
+            .values("created_at")[:1]
+        )
+        cls.objects.filter(
+            user_id=user_id, last_post_at__lte=created_at
+        ).update(last_post_at=Subquery(last_post_at))
+
+    @classmethod
+    def recount_likes(cls, user_ids):
+        """Пересчитывает `likes_received` пользователей `user_ids`."""
+        likes = (
+            Post.objects.filter(author_id=OuterRef("user_id"))
+            .order_by()
+            .values("author_id")
+            .annotate(likes=Sum("like_count"))
+            .values("likes")
+        )
+        cls.objects.filter(user_id__in=user_ids).update(
+            likes_received=Coalesce(Subquery(likes), 0)
+        )
@@ -0,0 +1,187 @@
+import threading
+import time
+from typing import NamedTuple
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models import Count
+
+from .models import Category, SubCategory
+from .versions import get_version
+
+# Дерево навигации в общем кэше живёт сутки: после смены версии старые
+# деревья больше не читаются и вытесняются по времени.
+NAVIGATION_TIMEOUT = 60 * 60 * 24
+# Дерево в памяти процесса перестраивается из базы не реже раза в минуту,
+# даже если версия не изменилась: так устаревание ограничено, когда
+# счётчик версий живёт в памяти процесса и записи других воркеров его
+# не меняют.
+NAVIGATION_LOCAL_TIMEOUT = 60
+
+
+class SubCategoryNode(NamedTuple):
+    id: int
+    name: str
+    category_id: int
+    post_count: int
+
+
+class CategoryNode(NamedTuple):
+    id: int
+    name: str
+    slug: str
+    post_count: int
+    subcategories: tuple
+
+
+class NavigationTree:
+    """
+    Неизменяемое дерево навигации: категории с подкатегориями и
+    количеством постов.
+
+    Узлы — именованные кортежи, поэтому дерево компактно в памяти,
+    сериализуется для общего кэша и безопасно разделяется между потоками.
+    """
+
+    __slots__ = ("version", "categories", "_by_slug", "_subcategories")
+
+    def __init__(self, version, categories):
+        self.version = version
+        self.categories = tuple(categories)
+        self._by_slug = {node.slug: node for node in self.categories}
+        self._subcategories = {
+            sub.id: sub
+            for node in self.categories
+            for sub in node.subcategories
+        }
+
+    def __reduce__(self):
+        return (type(self), (self.version, self.categories))
+
+    def __iter__(self):
+        return iter(self.categories)
+
+    def __len__(self):
+        return len(self.categories)
+
+    def category(self, slug):
+        """Узел категории по slug или `None`."""
+        return self._by_slug.get(slug)
+
+    def subcategory(self, subcategory_id):
+        """Узел подкатегории по ID или `None`."""
+        return self._subcategories.get(subcategory_id)
+
+    @property
+    def subcategory_count(self) -> int:
+        return len(self._subcategories)
+
+    @property
+    def post_count(self) -> int:
+        return sum(node.post_count for node in self.categories)
+
+
+def build_navigation(version) -> NavigationTree:
+    """Строит дерево навигации двумя запросами."""
+    subcategories = {}
+    rows = (
+        SubCategory.objects.annotate(post_count=Count("posts"))
+        .order_by("pk")
+        .values_list("id", "name", "category_id", "post_count")
+    )
+    for row in rows:
+        node = SubCategoryNode(*row)
+        subcategories.setdefault(node.category_id, []).append(node)
+    rows = Category.objects.order_by("pk").values_list("id", "name", "slug")
+    categories = []
+    for category_id, name, slug in rows:
+        children = tuple(subcategories.get(category_id, ()))
+        categories.append(
+            CategoryNode(
+                category_id,
+                name,
+                slug,
+                sum(sub.post_count for sub in children),
+                children,
+            )
+        )
+    return NavigationTree(version, categories)
+
+
+class NavigationCache:
+    """
+    Дерево навигации текущей версии содержимого.
+
+    Дерево хранится в памяти процесса и перестраивается, когда
+    меняется версия (`knowledge_base.versions`): её увеличивает любая
+    запись категорий, подкатегорий и постов. Построенное дерево
+    кладётся в общий кэш Django с версией в ключе, поэтому после
+    изменения его строит один процесс, а остальные воркеры читают
+    готовое.
+
+    Дерево в памяти процесса старше `local_timeout` секунд строится
+    заново из базы, минуя общий кэш: версия и общий кэш согласованы
+    между воркерами, только если это общий бэкенд (Redis, Memcached).
+    """
+
+    def __init__(
+        self,
+        cache_alias=None,
+        timeout=NAVIGATION_TIMEOUT,
+        local_timeout=NAVIGATION_LOCAL_TIMEOUT,
+    ):
+        self.cache_alias = cache_alias
+        self.timeout = timeout
+        self.local_timeout = local_timeout
+        self._tree = None
+        self._built_at = 0.0
+        self._lock = threading.Lock()
+        self.builds = 0
+
+    @classmethod
+    def from_settings(cls):
+        return cls(
+            cache_alias=getattr(
+                settings, "KNOWLEDGE_BASE_NAVIGATION_CACHE", None
+            )
+        )
+
+    @staticmethod
+    def make_key(version):
+        return f"knowledge_base:navigation:{version}"
+
+    def get(self) -> NavigationTree:
+        version = get_version()
+        tree = self._tree
+        expired = (
+            tree is not None
+            and time.monotonic() - self._built_at > self.local_timeout
+        )
+        if tree is not None and tree.version == version and not expired:
+            return tree
+        shared = caches[self.cache_alias] if self.cache_alias else None
+        tree = None
+        if shared is not None and not expired:
+            tree = shared.get(self.make_key(version))
+        if tree is None:
+            tree = build_navigation(version)
+            with self._lock:
+                self.builds += 1
+            if shared is not None:
+                shared.set(self.make_key(version), tree, self.timeout)
+        self._tree = tree
+        self._built_at = time.monotonic()
+        return tree
+
+    def clear(self):
+        self._tree = None
+        self._built_at = 0.0
+        self.builds = 0
+
+
+navigation_cache = NavigationCache.from_settings()
+
+
+def get_navigation() -> NavigationTree:
+    """Дерево навигации текущей версии содержимого."""
+    return navigation_cache.get()
@@ -0,0 +1,172 @@
+import hashlib
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import caches
+from django.http import HttpResponse
+from django.middleware.csrf import get_token
+from django.utils.cache import get_conditional_response
+
+from .versions import get_version
+
+DEFAULT_PAGE_CACHE = {
+    "ENABLED": False,
+    "CACHE_ALIAS": "default",
+    "LOCK_TIMEOUT": 30,
+    "LOCK_WAIT": 5,
+    "VIEWS": {},
+}
+DEFAULT_VIEW_OPTIONS = {
+    "TIMEOUT": 60,
+    "STALE": 300,
+}
+
+# Заголовок ответа с результатом обращения к кэшу страниц.
+STATUS_HEADER = "X-Page-Cache"
+HIT = "HIT"
+STALE = "STALE"
+MISS = "MISS"
+BYPASS = "BYPASS"
+
+# Заголовки ответа, которые не сохраняются: куки и служебные заголовки
+# относятся к конкретному посетителю или запросу.
+SKIPPED_HEADERS = {"set-cookie", "vary", STATUS_HEADER.lower()}
+LOCK_POLL_INTERVAL = 0.05
+
+
+def page_cache_options():
+    return {
+        **DEFAULT_PAGE_CACHE,
+        **getattr(settings, "KNOWLEDGE_BASE_PAGE_CACHE", {}),
+    }
+
+
+def make_key(request):
+    """Ключ страницы: хэш полного URL вместе с хостом и параметрами."""
+    digest = hashlib.sha256(request.build_absolute_uri().encode()).hexdigest()
+    return f"page:{digest}"
+
+
+def is_cacheable(request):
+    """Одинакова ли страница для всех: анонимный GET или HEAD."""
+    if request.method not in ("GET", "HEAD"):
+        return False
+    return not request.user.is_authenticated
+
+
+def cached_response(entry, status):
+    """Ответ из записи кэша с заголовком статуса `status`."""
+    status_code, headers, content = entry["response"]
+    response = HttpResponse(content, status=status_code)
+    for name, value in headers:
+        response[name] = value
+    response[STATUS_HEADER] = status
+    return response
+
+
+def anonymous_page_cache(view_func):
+    """
+    Кэш целых страниц для анонимных GET-запросов.
+
+    Страница одинакова для всех анонимных посетителей, поэтому ответ
+    кэшируется по полному URL. Запись помнит версию содержимого
+    (`knowledge_base.versions`) и время создания: она свежая, пока
+    версия не изменилась и не прошло `TIMEOUT` секунд.
+
+    Устаревшая запись отдаётся ещё `STALE` секунд (stale-while-
+    revalidate), пока страницу перестраивает один запрос — тот, что
+    первым взял блокировку в кэше. Без записи остальные запросы ждут
+    его до `LOCK_WAIT` секунд, а не рендерят страницу одновременно.
+
+    Вьюха кэшируется, только если её имя URL есть в `VIEWS` настройки
+    `KNOWLEDGE_BASE_PAGE_CACHE`; значение — `TIMEOUT` и `STALE` этой
+    вьюхи. Результат — в заголовке `X-Page-Cache`: `HIT`, `STALE`,
+    `MISS` или `BYPASS`.
+    """
+
+    @wraps(view_func)
+    def _wrapped_view(request, *args, **kwargs):
+        options = page_cache_options()
+        match = request.resolver_match
+        view_options = options["VIEWS"].get(match.view_name if match else None)
+        if not options["ENABLED"] or view_options is None:
+            return view_func(request, *args, **kwargs)
+        if not is_cacheable(request):
+            response = view_func(request, *args, **kwargs)
+            response[STATUS_HEADER] = BYPASS
+            return response
+
+        view_options = {**DEFAULT_VIEW_OPTIONS, **view_options}
+        timeout, stale = view_options["TIMEOUT"], view_options["STALE"]
+        cache = caches[options["CACHE_ALIAS"]]
+        key = make_key(request)
+        lock_key = f"{key}:lock"
+        version = get_version()
+
+        def render_and_store():
+            try:
+                response = view_func(request, *args, **kwargs)
+                if response.status_code == 200 and not response.streaming:
+                    cache.set(
+                        key,
+                        make_entry(response, version),
+                        timeout + stale,
+                    )
+                response[STATUS_HEADER] = MISS
+                return response
+            finally:
+                cache.delete(lock_key)
+
+        entry = cache.get(key)
+        if entry is not None:
+            age = time.time() - entry["created"]
+            if entry["version"] == version and age < timeout:
+                return visitor_response(request, entry, HIT)
+            if age < timeout + stale:
+                if cache.add(lock_key, 1, options["LOCK_TIMEOUT"]):
+                    return render_and_store()
+                # Страницу уже перестраивает другой запрос.
+                return visitor_response(request, entry, STALE)
+
+        if cache.add(lock_key, 1, options["LOCK_TIMEOUT"]):
+            return render_and_store()
+        deadline = time.monotonic() + options["LOCK_WAIT"]
+        while time.monotonic() < deadline:
+            time.sleep(LOCK_POLL_INTERVAL)
+            entry = cache.get(key)
+            if entry is not None and entry["version"] == version:
+                return visitor_response(request, entry, HIT)
+            if cache.get(lock_key) is None:
+                break
+        # Не дождались: страница рендерится без блокировки.
+        response = view_func(request, *args, **kwargs)
+        response[STATUS_HEADER] = MISS
+        return response
+
+    return _wrapped_view
+
+
+def make_entry(response, version):
+    headers = [
+        (name, value)
+        for name, value in response.items()
+        if name.lower() not in SKIPPED_HEADERS
+    ]
+    return {
+        "version": version,
+        "created": time.time(),
+        "response": (response.status_code, headers, response.content),
+    }
+
+
+def visitor_response(request, entry, status):
+    # В закэшированной странице CSRF-токен чужой: посетителю ставится
+    # своя кука, а формы берут токен из неё (см. `includes/chat.html`).
+    get_token(request)
+    response = cached_response(entry, status)
+    # Если вьюха выдала ETag (`conditional_page`), он сохранён в записи:
+    # актуальная копия клиента получает 304.
+    return get_conditional_response(
+        request, etag=response.get("ETag"), response=response
+    )
@@ -0,0 +1,142 @@
+import base64
+import binascii
+import json
+from functools import reduce
+from operator import or_
+
+from django.core.exceptions import ValidationError
+from django.core.paginator import Paginator
+from django.db.models import Q
+
+
+def encode_cursor(values) -> str:
+    """Упаковывает значения ключа последней строки в непрозрачную строку."""
+    data = json.dumps(values, default=str, separators=(",", ":"))
+    return base64.urlsafe_b64encode(data.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    """
+    Распаковывает курсор из `encode_cursor`. Для пустого или
+    повреждённого курсора возвращает `None` — страница начинается
+    с начала.
+    """
+    if not cursor:
+        return None
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (binascii.Error, ValueError, UnicodeDecodeError):
+        return None
+    return values if isinstance(values, list) else None
+
+
+def cursor_values(model, ordering, cursor):
+    """
+    Значения курсора, приведённые к типам полей сортировки `ordering`
+    модели `model` (`to_python`). Для пустого, повреждённого или
+    подделанного курсора — другой длины, с `null` или значениями
+    не того типа — возвращает `None`.
+    """
+    values = decode_cursor(cursor)
+    if values is None or len(values) != len(ordering):
+        return None
+    opts = model._meta
+    converted = []
+    for field, value in zip(ordering, values):
+        name = field.lstrip("-")
+        model_field = opts.pk if name == "pk" else opts.get_field(name)
+        try:
+            value = model_field.to_python(value)
+        except (ValidationError, TypeError, ValueError):
+            return None
+        if value is None:
+            return None
+        converted.append(value)
+    return converted
+
+
+def keyset_filter(ordering, values):
+    """
+    Условие «строго после строки с ключом `values`» для сортировки
+    `ordering` — списка полей в формате `order_by` (`"-created_at"`).
+    """
+    conditions = []
+    for position, field in enumerate(ordering):
+        name = field.lstrip("-")
+        lookup = "lt" if field.startswith("-") else "gt"
+        condition = Q(**{f"{name}__{lookup}": values[position]})
+        for previous, value in zip(ordering[:position], values):
+            condition &= Q(**{previous.lstrip("-"): value})
+        conditions.append(condition)
+    return reduce(or_, conditions)
+
+
+def keyset_page(queryset, ordering, cursor=None, page_size=20):
+    """
+    Страница `queryset` при сортировке `ordering` после курсора.
+
+    В отличие от `OFFSET`, стоимость запроса не зависит от номера
+    страницы: следующая страница выбирается условием на ключ последней
+    строки. Последнее поле `ordering` должно быть уникальным (обычно
+    `id`). Неверный курсор (`cursor_values`) открывает первую страницу.
+    Возвращает `(строки, курсор следующей страницы или None)`.
+    """
+    queryset = queryset.order_by(*ordering)
+    values = cursor_values(queryset.model, ordering, cursor)
+    if values is not None:
+        queryset = queryset.filter(keyset_filter(ordering, values))
+    rows = list(queryset[: page_size + 1])
+    if len(rows) <= page_size:
+        return rows, None
+    rows = rows[:page_size]
+    last = rows[-1]
+    return rows, encode_cursor(
+        [getattr(last, field.lstrip("-")) for field in ordering]
+    )
+
+
+def cursor_before(queryset, ordering, pk):
+    """
+    Курсор, с которым `keyset_page` начинает страницу со строки `pk`:
+    ключ предыдущей строки при сортировке `ordering`. Два запроса по
+    индексу сортировки, без подсчёта строк перед `pk`. Возвращает
+    `None`, если строка первая или её нет в `queryset`.
+    """
+    names = [field.lstrip("-") for field in ordering]
+    row = queryset.filter(pk=pk).values_list(*names).first()
+    if row is None:
+        return None
+    backwards = [
+        name if field.startswith("-") else f"-{name}"
+        for field, name in zip(ordering, names)
+    ]
+    previous = (
+        queryset.filter(keyset_filter(backwards, row))
+        .order_by(*backwards)
+        .values_list(*names)
+        .first()
+    )
+    return encode_cursor(list(previous)) if previous is not None else None
+
+
+def capped_count(queryset, cap):
+    """
+    Количество строк, но не больше `cap + 1`: вместо полного `COUNT(*)`
+    читается не более `cap + 1` идентификаторов. Возвращает
+    `(количество, обрезано ли)`.
+    """
+    count = len(queryset.values_list("pk", flat=True)[: cap + 1])
+    return min(count, cap), count > cap
+
+
+class CountedPaginator(Paginator):
+    """
+    `Paginator` с заранее известным количеством объектов (например, из
+    денормализованного счётчика): `COUNT(*)` по `object_list` не
+    выполняется.
+    """
+
+    def __init__(self, object_list, per_page, count, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.count = count
@@ -0,0 +1,330 @@
+import hashlib
+import re
+import threading
+from collections import OrderedDict
+
+import markdown2
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.html import strip_tags
+from django.utils.text import Truncator
+
+# Версия конвейера рендеринга. Увеличивается при любом изменении
+# регулярных выражений или набора extras, чтобы сохранённый HTML
+# считался устаревшим и был перерендерен командой `rerender_posts`.
+RENDERER_VERSION = 1
+
+MARKDOWN_EXTRAS = ["fenced-code-blocks", "code-friendly"]
+
+CODE_BLOCK_RE = re.compile(r"'''(\w*)\s*(.*?)\s*'''", flags=re.DOTALL)
+TAG_RE = re.compile(r"<(?!pre|code|/pre|/code).*?>")
+DESCRIPTION_CODE_RE = re.compile(r"\'\'\'(.*?)\'\'\'", flags=re.DOTALL)
+CHAT_CODE_BLOCK_RE = re.compile(r"```(\w*)\s*(.*?)\s*```", flags=re.DOTALL)
+
+# Длина анонса поста в результатах поиска.
+EXCERPT_LENGTH = 200
+WHITESPACE_RE = re.compile(r"\s+")
+
+DEFAULT_RENDER_CACHE = {
+    "MAXSIZE": 1024,
+    "CACHE_ALIAS": None,
+    "TIMEOUT": 60 * 60 * 24,
+}
+
+
+def _code_block(match):
+    language = match.group(1) or "python"
+    return (
+        f"<pre><code class='language-{language}'>"
+        f"{match.group(2).strip()}</code></pre>"
+    )
+
+
+def _escape_tag(match):
+    return f"&lt;{match.group(0)[1:-1]}&gt;"
+
+
+FENCE = "'''"
+FENCE_HEADER_RE = re.compile(r"(\w*)\s*")
+# Линейный аналог TAG_RE: `<` захватывает текст до первого `>` или конца
+# строки. Без `>` совпадение возвращается без изменений, и поиск
+# продолжается после него, а не с каждого следующего `<`, как у TAG_RE.
+TAG_SCAN_RE = re.compile(r"<(?!pre|code|/pre|/code)([^>\n]*)(>?)")
+
+
+def _escape_scanned_tag(match):
+    if match.group(2):
+        return f"&lt;{match.group(1)}&gt;"
+    return match.group(0)
+
+
+class _TagEscaper:
+    """
+    Потоковая замена `TAG_RE.sub(_escape_tag, ...)`.
+
+    Принимает текст кусками и экранирует теги так же, как регулярное
+    выражение: `<` вместе с текстом до ближайшего `>` в той же строке
+    превращается в `&lt;...&gt;`, если тег не начинается с `pre`/`code`.
+    Хвост куска после последнего `>` или перевода строки, начинающийся
+    с `<`, откладывается до следующего куска: его судьба зависит от
+    текста, которого ещё нет.
+    """
+
+    def __init__(self):
+        self.parts = []
+        self._pending = ""
+
+    def feed(self, chunk, final=False):
+        if self._pending:
+            chunk = self._pending + chunk
+            self._pending = ""
+        if not final:
+            tail = max(chunk.rfind(">"), chunk.rfind("\n")) + 1
+            start = chunk.find("<", tail)
+            if start != -1:
+                self._pending = chunk[start:]
+                chunk = chunk[:start]
+        if "<" in chunk:
+            chunk = TAG_SCAN_RE.sub(_escape_scanned_tag, chunk)
+        self.parts.append(chunk)
+
+    def feed_markup(self, markup):
+        """
+        Добавляет сгенерированные теги `<pre>`/`<code>`. Сами они не
+        экранируются, поэтому через `feed` их нужно пропускать, только
+        если отложенный `<` может закрыться их `>`.
+        """
+        if self._pending:
+            self.feed(markup)
+        else:
+            self.parts.append(markup)
+
+    def close(self) -> str:
+        if self._pending:
+            self.feed("", final=True)
+        return "".join(self.parts)
+
+
+def prepare_post_markdown(content) -> str:
+    """
+    Готовит текст поста для `markdown2` за один линейный проход.
+
+    **Параметры:**
+    - `content` (str): Исходный текст поста.
+
+    **Возвращает:**
+    - str: Текст с блоками `<pre><code>` и экранированными тегами.
+
+    **Что делает внутри:**
+    - Обрезает пробельные символы по краям.
+    - Находит блоки кода в тройных кавычках и превращает их в `<pre><code>`
+      с языком из первого слова (по умолчанию `python`).
+    - Передаёт получившийся поток в `_TagEscaper`, который экранирует все
+      HTML-теги, кроме `pre` и `code`.
+
+    Результат совпадает с последовательным применением `strip()`,
+    `CODE_BLOCK_RE` и `TAG_RE`.
+    """
+    content = content.strip()
+    escaper = _TagEscaper()
+    pos = 0
+    while True:
+        opening = content.find(FENCE, pos)
+        if opening == -1:
+            break
+        header = FENCE_HEADER_RE.match(content, opening + 3)
+        closing = content.find(FENCE, header.end())
+        if closing == -1:
+            break
+        language = header.group(1) or "python"
+
+        escaper.feed(content[pos:opening])
+        escaper.feed_markup(f"<pre><code class='language-{language}'>")
+        escaper.feed(content[header.end() : closing].rstrip())
+        escaper.feed_markup("</code></pre>")
+        pos = closing + 3
+
+    escaper.feed(content[pos:], final=True)
+    return escaper.close()
+
+
+def render_post_content(content) -> str:
+    """
+    Преобразует текст поста в HTML.
+
+    **Параметры:**
+    - `content` (str): Исходный текст поста.
+
+    **Возвращает:**
+    - str: HTML, готовый к выводу в шаблоне.
+
+    **Что делает внутри:**
+    - Готовит текст функцией `prepare_post_markdown`: обрезает пробельные
+      символы, преобразует блоки кода в тройных кавычках в `<pre><code>`
+      и экранирует все HTML-теги, кроме `pre` и `code`.
+    - Преобразует результат в HTML с помощью `markdown2`.
+    """
+    return markdown2.markdown(
+        prepare_post_markdown(content), extras=MARKDOWN_EXTRAS
+    )
+
+
+def prepare_post_markdown_regex(content) -> str:
+    """
+    Прежняя подготовка текста поста цепочкой регулярных выражений.
+
+    Оставлена как эталон для тестов совпадения и бенчмарка
+    `benchmarks/render_benchmark.py`.
+    """
+    content = CODE_BLOCK_RE.sub(_code_block, content.strip())
+    return TAG_RE.sub(_escape_tag, content)
+
+
+def render_category_description(description) -> str:
+    """
+    Преобразует описание категории в HTML.
+
+    Сначала применяется `markdown2`, затем блоки в тройных кавычках
+    превращаются в `<pre><code class="language-python">`.
+    """
+    html = markdown2.markdown(description)
+    return DESCRIPTION_CODE_RE.sub(
+        r'<pre><code class="language-python">\1</code></pre>', html
+    )
+
+
+def render_chat_reply(reply) -> str:
+    """
+    Преобразует ответ GPT в HTML.
+
+    Блоки кода в обратных кавычках превращаются в `<pre><code>`,
+    после чего текст обрабатывается `markdown2`.
+    """
+    reply = CHAT_CODE_BLOCK_RE.sub(_code_block, reply)
+    return markdown2.markdown(reply, extras=MARKDOWN_EXTRAS)
+
+
+def make_excerpt(content) -> str:
+    """
+    Короткий анонс поста: текст без тегов и лишних пробелов,
+    обрезанный до `EXCERPT_LENGTH` символов.
+    """
+    text = WHITESPACE_RE.sub(" ", strip_tags(content)).strip()
+    return Truncator(text).chars(EXCERPT_LENGTH)
+
+
+# Рендереры, доступные через кэш, и опции, входящие в ключ кэша.
+RENDERERS = {
+    "post": (render_post_content, (RENDERER_VERSION, *MARKDOWN_EXTRAS)),
+    "category": (render_category_description, (RENDERER_VERSION,)),
+    "chat": (render_chat_reply, (RENDERER_VERSION, *MARKDOWN_EXTRAS)),
+}
+
+
+class RenderCache:
+    """
+    Двухуровневый кэш результатов рендеринга.
+
+    Первый уровень — ограниченный LRU в памяти процесса, второй
+    (необязательный) — бэкенд кэша Django, общий для всех воркеров.
+    Ключом служит хэш исходного текста и опций рендерера.
+    """
+
+    def __init__(self, maxsize=1024, cache_alias=None, timeout=None):
+        self.maxsize = maxsize
+        self.cache_alias = cache_alias
+        self.timeout = timeout
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @classmethod
+    def from_settings(cls):
+        options = {
+            **DEFAULT_RENDER_CACHE,
+            **getattr(settings, "KNOWLEDGE_BASE_RENDER_CACHE", {}),
+        }
+        return cls(
+            maxsize=options["MAXSIZE"],
+            cache_alias=options["CACHE_ALIAS"],
+            timeout=options["TIMEOUT"],
+        )
+
+    @staticmethod
+    def make_key(kind, options, text):
+        digest = hashlib.sha256()
+        digest.update(repr((kind, options)).encode())
+        digest.update(b"\0")
+        digest.update(text.encode())
+        return f"render:{kind}:{digest.hexdigest()}"
+
+    def get_or_render(self, key, render):
+        with self._lock:
+            html = self._entries.get(key)
+            if html is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return html
+
+        shared = caches[self.cache_alias] if self.cache_alias else None
+        html = shared.get(key) if shared is not None else None
+        if html is not None:
+            with self._lock:
+                self.shared_hits += 1
+        else:
+            html = render()
+            with self._lock:
+                self.misses += 1
+            if shared is not None:
+                shared.set(key, html, self.timeout)
+
+        self._store(key, html)
+        return html
+
+    def _store(self, key, html):
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._entries[key] = html
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.shared_hits = self.misses = self.evictions = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.shared_hits + self.misses
+            return {
+                "hits": self.hits,
+                "shared_hits": self.shared_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "hit_ratio": (
+                    (self.hits + self.shared_hits) / lookups
+                    if lookups
+                    else 0.0
+                ),
+            }
+
+
+render_cache = RenderCache.from_settings()
+
+
+def render_markup(kind, text) -> str:
+    """
+    Рендерит текст рендерером `kind` ("post", "category" или "chat"),
+    используя общий кэш `render_cache`.
+    """
+    renderer, options = RENDERERS[kind]
+    key = RenderCache.make_key(kind, options, text)
+    return render_cache.get_or_render(key, lambda: renderer(text))
@@ -0,0 +1,86 @@
+import logging
+
+from django.conf import settings
+from django.db import connection
+from django.utils.module_loading import import_string
+
+from .cache import normalize_terms, search_cache
+
+logger = logging.getLogger(__name__)
+
+BACKENDS = {
+    "database": "knowledge_base.search.backends.DatabaseSearchBackend",
+    "postgres": "knowledge_base.search.backends.PostgresSearchBackend",
+    "index": "knowledge_base.search.backends.IndexSearchBackend",
+}
+
+DEFAULT_SEARCH_OPTIONS = {
+    "BACKEND": "auto",
+    "INDEX_PATH": None,
+    "INDEX_SYNC_INTERVAL": 30,
+    "PAGE_SIZE": 20,
+    "SECTION_LIMIT": 10,
+    "COUNT_CAP": 1000,
+    "WARM_UP": True,
+}
+
+
+def search_options():
+    """Настройки `KNOWLEDGE_BASE_SEARCH` поверх значений по умолчанию."""
+    return {
+        **DEFAULT_SEARCH_OPTIONS,
+        **getattr(settings, "KNOWLEDGE_BASE_SEARCH", {}),
+    }
+
+
+def get_search_backend():
+    """
+    Возвращает поисковый бэкенд из `KNOWLEDGE_BASE_SEARCH["BACKEND"]`.
+
+    Значение `"auto"` (по умолчанию) выбирает полнотекстовый поиск
+    PostgreSQL, если база — PostgreSQL, и `icontains` для остальных баз.
+    """
+    name = search_options()["BACKEND"]
+    if name == "auto":
+        name = "postgres" if connection.vendor == "postgresql" else "database"
+    return import_string(BACKENDS.get(name, name))()
+
+
+def search_ids(query) -> dict:
+    """
+    Ранжированные списки ID категорий, подкатегорий и постов для
+    запроса `query`: не больше `SECTION_LIMIT` категорий и подкатегорий
+    и `COUNT_CAP + 1` постов (лишний пост показывает, что счётчик
+    обрезан). Результат кэшируется по нормализованным словам запроса.
+    """
+    options = search_options()
+    terms = normalize_terms(query)
+    backend = get_search_backend()
+    return search_cache.get_or_search(
+        type(backend).__name__,
+        terms,
+        lambda: backend.ranked_ids(
+            terms, options["SECTION_LIMIT"], options["COUNT_CAP"] + 1
+        ),
+    )
+
+
+def warm_up():
+    """
+    Загружает индексы поиска процесса до первого запроса: индекс
+    подсказок и, для бэкенда `"index"`, индекс BM25. Вызывается при
+    запуске сервера (`wsgi.py`, `asgi.py`); если база недоступна,
+    индексы построятся при первом запросе.
+    """
+    options = search_options()
+    if not options["WARM_UP"]:
+        return
+    from .index import get_index
+    from .suggest import get_suggest_index
+
+    try:
+        get_suggest_index()
+        if options["BACKEND"] == "index":
+            get_index()
+    except Exception:
+        logger.exception("Не удалось загрузить индексы поиска")
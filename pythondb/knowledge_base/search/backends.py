@@ -0,0 +1,259 @@
+from functools import reduce
+from operator import or_
+
+from django.contrib.postgres.search import (
+    SearchQuery,
+    SearchRank,
+    SearchVector,
+)
+from django.db.models import F, Q
+
+from knowledge_base.models import Category, Post, SubCategory
+from knowledge_base.pagination import decode_cursor, encode_cursor
+
+# Конфигурации полнотекстового поиска PostgreSQL. Должны совпадать
+# с конфигурациями триггера из миграции 0003_post_search_vector.
+SEARCH_CONFIGS = ("russian", "english")
+
+# Колонки, нужные карточке поста в результатах поиска: текст поста
+# не загружается, вместо него показывается сохранённый анонс.
+POST_CARD_FIELDS = (
+    "id",
+    "title",
+    "excerpt",
+    "category__name",
+    "category__slug",
+    "subcategory__name",
+)
+
+
+def post_cards(queryset):
+    return queryset.select_related("category", "subcategory").only(
+        *POST_CARD_FIELDS
+    )
+
+
+class SearchBackend:
+    """
+    Общая часть бэкендов поиска.
+
+    `search(terms)` возвращает словарь ленивых выборок `categories`,
+    `subcategories` и `posts`. `ranked_ids` превращает их в короткие
+    списки ID в порядке выдачи — их кэширует `SearchResultCache`,
+    а страница результатов загружает только нужные строки.
+    """
+
+    # Сортировка постов в результатах; последнее поле уникально.
+    post_ordering = ("-id",)
+
+    def search(self, terms) -> dict:
+        raise NotImplementedError
+
+    def ranked_ids(self, terms, section_limit, post_limit) -> dict:
+        results = self.search(terms)
+        return {
+            "categories": list(
+                results["categories"].values_list("id", flat=True)[
+                    :section_limit
+                ]
+            ),
+            "subcategories": list(
+                results["subcategories"].values_list("id", flat=True)[
+                    :section_limit
+                ]
+            ),
+            "posts": self.post_ids(results["posts"], post_limit),
+        }
+
+    def post_ids(self, posts, limit):
+        return list(
+            posts.order_by(*self.post_ordering).values_list("id", flat=True)[
+                :limit
+            ]
+        )
+
+
+class DatabaseSearchBackend(SearchBackend):
+    """
+    Поиск через `icontains`, работающий на любой базе данных.
+
+    Совпадение любого из слов запроса с названием или описанием
+    категории, названием подкатегории, заголовком или текстом поста.
+    Используется на SQLite и как запасной вариант.
+    """
+
+    def search(self, terms) -> dict:
+        category_query = Q()
+        for term in terms:
+            category_query |= Q(name__icontains=term) | Q(
+                description__icontains=term
+            )
+        categories = Category.objects.filter(category_query).distinct()
+
+        subcategory_query = Q()
+        for term in terms:
+            subcategory_query |= Q(name__icontains=term)
+        subcategories = SubCategory.objects.filter(
+            subcategory_query
+        ).distinct()
+
+        post_query = Q()
+        for term in terms:
+            post_query |= Q(title__icontains=term) | Q(content__icontains=term)
+        posts = Post.objects.filter(post_query).distinct()
+
+        return {
+            "categories": categories,
+            "subcategories": subcategories,
+            "posts": posts,
+        }
+
+
+class PostgresSearchBackend(SearchBackend):
+    """
+    Полнотекстовый поиск PostgreSQL с ранжированием.
+
+    Посты ищутся по хранимой колонке `search_vector` (русская и
+    английская конфигурации, заголовок с весом A, текст с весом B),
+    которую поддерживает триггер и индексирует GIN. Категории и
+    подкатегории — маленькие таблицы, их вектор строится на лету.
+    Результаты упорядочены по `SearchRank`.
+    """
+
+    post_ordering = ("-rank", "-id")
+
+    @staticmethod
+    def build_query(terms):
+        return reduce(
+            or_,
+            (
+                SearchQuery(term, config=config, search_type="plain")
+                for term in terms
+                for config in SEARCH_CONFIGS
+            ),
+        )
+
+    @staticmethod
+    def build_vector(*fields):
+        return reduce(
+            lambda left, right: left + right,
+            (
+                SearchVector(field, config=config, weight=weight)
+                for field, weight in fields
+                for config in SEARCH_CONFIGS
+            ),
+        )
+
+    def search(self, terms) -> dict:
+        query = self.build_query(terms)
+
+        categories = self._ranked(
+            Category.objects.annotate(
+                document=self.build_vector(("name", "A"), ("description", "B"))
+            ),
+            query,
+        )
+        subcategories = self._ranked(
+            SubCategory.objects.annotate(
+                document=self.build_vector(("name", "A"))
+            ),
+            query,
+        )
+        posts = (
+            Post.objects.filter(search_vector=query)
+            .annotate(rank=SearchRank(F("search_vector"), query))
+            .order_by(*self.post_ordering)
+        )
+
+        return {
+            "categories": categories,
+            "subcategories": subcategories,
+            "posts": posts,
+        }
+
+    @staticmethod
+    def _ranked(queryset, query):
+        return (
+            queryset.filter(document=query)
+            .annotate(rank=SearchRank(F("document"), query))
+            .order_by("-rank", "id")
+        )
+
+
+class RankedResults:
+    """
+    Объекты в порядке ранжирования по списку ID.
+
+    Ведёт себя как ленивый queryset: строки загружаются из базы только
+    для запрошенного среза (`ranked[:20]`) или при переборе, одним
+    запросом `id__in`, и упорядочиваются по позиции ID в списке.
+    """
+
+    def __init__(self, ids, queryset):
+        self.ids = list(ids)
+        self.queryset = queryset
+        self._cache = None
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __bool__(self):
+        return bool(self.ids)
+
+    def count(self):
+        return len(self.ids)
+
+    def __iter__(self):
+        if self._cache is None:
+            self._cache = self._fetch(self.ids)
+        return iter(self._cache)
+
+    def __getitem__(self, item):
+        if self._cache is not None:
+            return self._cache[item]
+        if isinstance(item, slice):
+            return self._fetch(self.ids[item])
+        return self._fetch([self.ids[item]])[0]
+
+    def page(self, cursor=None, page_size=20):
+        """
+        Страница после курсора. Курсор хранит позицию в списке ID:
+        список уже упорядочен и целиком лежит в памяти.
+        """
+        values = decode_cursor(cursor)
+        start = values[0] if values and isinstance(values[0], int) else 0
+        start = max(start, 0)
+        end = start + page_size
+        next_cursor = encode_cursor([end]) if end < len(self.ids) else None
+        return self[start:end], next_cursor
+
+    def _fetch(self, ids):
+        objects = self.queryset.in_bulk(ids)
+        return [objects[pk] for pk in ids if pk in objects]
+
+
+class IndexSearchBackend(SearchBackend):
+    """
+    Поиск постов по инвертированному индексу в памяти процесса (BM25).
+
+    Работает на любой базе данных. Индекс загружается из снимка на диске
+    (`KNOWLEDGE_BASE_SEARCH["INDEX_PATH"]`) и обновляется сигналами
+    моделей. Категории и подкатегории ищутся через
+    `DatabaseSearchBackend`: это маленькие таблицы.
+    """
+
+    def search(self, terms) -> dict:
+        from . import search_options
+        from .index import get_index
+
+        # Ранжируется столько постов, сколько можно пролистать.
+        limit = search_options()["COUNT_CAP"] + 1
+        results = DatabaseSearchBackend().search(terms)
+        results["posts"] = RankedResults(
+            (post_id for post_id, _ in get_index().search(terms, limit)),
+            post_cards(Post.objects.all()),
+        )
+        return results
+
+    def post_ids(self, posts, limit):
+        return posts.ids[:limit]
@@ -0,0 +1,164 @@
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+
+from knowledge_base.versions import get_version
+
+DEFAULT_SEARCH_CACHE = {
+    "MAXSIZE": 512,
+    "CACHE_ALIAS": None,
+    "TIMEOUT": 300,
+}
+
+
+def normalize_terms(query) -> tuple:
+    """
+    Слова запроса в нормальной форме: в нижнем регистре, без повторов,
+    отсортированные. Запросы "ORM Django" и "django orm" дают один ключ.
+    """
+    return tuple(sorted({term.lower() for term in query.split()}))
+
+
+class SearchResultCache:
+    """
+    Кэш ранжированных списков ID результатов поиска.
+
+    Ключ — имя бэкенда, нормализованные слова запроса и версия
+    содержимого (`knowledge_base.versions`): любая запись поста,
+    подкатегории или категории увеличивает версию, и старые записи
+    перестают находиться. Записи живут не дольше `timeout` секунд,
+    LRU в памяти процесса ограничен `maxsize`; необязательный второй
+    уровень — общий бэкенд кэша Django.
+
+    Для каждой записи запоминается, сколько длился поиск, поэтому
+    статистика показывает не только долю попаданий, но и сэкономленное
+    время.
+    """
+
+    def __init__(self, maxsize=512, cache_alias=None, timeout=300):
+        self.maxsize = maxsize
+        self.cache_alias = cache_alias
+        self.timeout = timeout
+        self._entries = OrderedDict()
+        self._version = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.saved_seconds = 0.0
+        self.search_seconds = 0.0
+
+    @classmethod
+    def from_settings(cls):
+        options = {
+            **DEFAULT_SEARCH_CACHE,
+            **getattr(settings, "KNOWLEDGE_BASE_SEARCH_CACHE", {}),
+        }
+        return cls(
+            maxsize=options["MAXSIZE"],
+            cache_alias=options["CACHE_ALIAS"],
+            timeout=options["TIMEOUT"],
+        )
+
+    @staticmethod
+    def make_key(backend, terms, version):
+        digest = hashlib.sha256(
+            json.dumps(terms, ensure_ascii=False).encode()
+        ).hexdigest()
+        return f"search:{backend}:{version}:{digest}"
+
+    def get_or_search(self, backend, terms, search):
+        """
+        Возвращает закэшированный результат `search()` для запроса
+        `terms` к бэкенду `backend` или выполняет поиск и запоминает его.
+        """
+        version = get_version()
+        key = self.make_key(backend, terms, version)
+        now = time.monotonic()
+        with self._lock:
+            if version != self._version:
+                # Содержимое изменилось: прежние записи уже не найдутся.
+                self._entries.clear()
+                self._version = version
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires, result, cost = entry
+                if expires > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    self.saved_seconds += cost
+                    return result
+                del self._entries[key]
+                self.expirations += 1
+
+        shared = caches[self.cache_alias] if self.cache_alias else None
+        entry = shared.get(key) if shared is not None else None
+        if entry is not None:
+            result, cost = entry
+            with self._lock:
+                self.shared_hits += 1
+                self.saved_seconds += cost
+        else:
+            started = time.perf_counter()
+            result = search()
+            cost = time.perf_counter() - started
+            with self._lock:
+                self.misses += 1
+                self.search_seconds += cost
+            if shared is not None:
+                shared.set(key, (result, cost), self.timeout)
+
+        self._store(key, (now + self.timeout, result, cost))
+        return result
+
+    def _store(self, key, entry):
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._version = None
+            self.hits = self.shared_hits = self.misses = 0
+            self.evictions = self.expirations = 0
+            self.saved_seconds = self.search_seconds = 0.0
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.shared_hits + self.misses
+            return {
+                "hits": self.hits,
+                "shared_hits": self.shared_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "hit_ratio": (
+                    (self.hits + self.shared_hits) / lookups
+                    if lookups
+                    else 0.0
+                ),
+                "saved_seconds": round(self.saved_seconds, 6),
+                "average_search_ms": (
+                    round(self.search_seconds / self.misses * 1000, 3)
+                    if self.misses
+                    else 0.0
+                ),
+            }
+
+
+search_cache = SearchResultCache.from_settings()
@@ -0,0 +1,455 @@
+import bisect
+import heapq
+import json
+import math
+import mmap
+import os
+import re
+import struct
+import sys
+import threading
+import time
+from array import array
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from django.db.models import Max, Q
+
+from knowledge_base.models import Category, Post, SubCategory
+
+from . import search_options
+
+TOKEN_RE = re.compile(r"\w+")
+
+# Вес поля при подсчёте частоты термина (упрощённый BM25F).
+FIELD_WEIGHTS = {
+    "title": 3.0,
+    "subcategory": 2.0,
+    "category": 1.5,
+    "content": 1.0,
+}
+BM25_K1 = 1.2
+BM25_B = 0.75
+# Термины запроса от трёх символов дополнительно ищутся как префиксы
+# ("декоратор" находит "декораторы") с пониженным весом.
+PREFIX_MIN_LENGTH = 3
+PREFIX_EXPANSIONS = 50
+PREFIX_WEIGHT = 0.5
+# Доля удалённых документов, после которой индекс перестраивается.
+COMPACT_RATIO = 0.25
+# Запас при догоняющей синхронизации: транзакции других процессов могут
+# зафиксироваться позже, чем записанный ими `updated_at`.
+SYNC_OVERLAP = timedelta(minutes=1)
+
+SNAPSHOT_MAGIC = b"KBIDX\x01\x00\x00"
+
+
+def tokenize(text):
+    return TOKEN_RE.findall(text.lower().replace("ё", "е"))
+
+
+class InvertedIndex:
+    """
+    Инвертированный индекс постов с ранжированием BM25.
+
+    Списки вхождений хранятся компактно: для каждого термина два
+    массива `array` — внутренние номера документов (`I`) и взвешенные
+    частоты (`f`). После загрузки снимка массивы — это срезы
+    `memoryview` над отображённым в память файлом; при первом изменении
+    термин копируется в обычный `array`.
+
+    Удаление помечает внутренний номер документа как удалённый;
+    при накоплении удалённых документов индекс уплотняется.
+    """
+
+    def __init__(self):
+        self._postings = {}
+        self._doc_ids = array("Q")
+        self._lengths = array("f")
+        self._docs = {}
+        self._deleted = set()
+        self._total_length = 0.0
+        self._sorted_terms = None
+        self._lock = threading.RLock()
+        self._mmap = None
+        self.high_water = None
+        # Названия категорий и подкатегорий, с которыми проиндексированы
+        # посты: `{"category": {id: name}, "subcategory": {id: name}}`.
+        self.group_names = {"category": {}, "subcategory": {}}
+
+    def __len__(self):
+        return len(self._docs)
+
+    def __contains__(self, post_id):
+        return post_id in self._docs
+
+    def add_document(self, post_id, fields):
+        """
+        Добавляет или заменяет пост. `fields` — словарь
+        `{"title": ..., "content": ..., "subcategory": ..., "category": ...}`.
+        """
+        frequencies = Counter()
+        for field, text in fields.items():
+            weight = FIELD_WEIGHTS.get(field, 1.0)
+            for token in tokenize(text or ""):
+                frequencies[token] += weight
+        length = sum(frequencies.values())
+
+        with self._lock:
+            self._remove(post_id)
+            doc = len(self._doc_ids)
+            self._doc_ids.append(post_id)
+            self._lengths.append(length)
+            self._docs[post_id] = doc
+            self._total_length += length
+            for term, frequency in frequencies.items():
+                docs, tfs = self._writable_postings(term)
+                docs.append(doc)
+                tfs.append(frequency)
+            self._maybe_compact()
+
+    def remove_document(self, post_id):
+        with self._lock:
+            self._remove(post_id)
+            self._maybe_compact()
+
+    def post_ids(self):
+        with self._lock:
+            return list(self._docs)
+
+    def _remove(self, post_id):
+        doc = self._docs.pop(post_id, None)
+        if doc is not None:
+            self._deleted.add(doc)
+            self._total_length -= self._lengths[doc]
+
+    def _maybe_compact(self):
+        if len(self._deleted) > max(1000, len(self._docs) * COMPACT_RATIO):
+            self.compact()
+
+    def _writable_postings(self, term):
+        postings = self._postings.get(term)
+        if postings is None:
+            postings = (array("I"), array("f"))
+            self._postings[term] = postings
+            self._sorted_terms = None
+        elif not isinstance(postings[0], array):
+            postings = (array("I", postings[0]), array("f", postings[1]))
+            self._postings[term] = postings
+        return postings
+
+    def compact(self):
+        """Убирает удалённые документы и перенумеровывает оставшиеся."""
+        with self._lock:
+            if not self._deleted:
+                return
+            renumber = {}
+            doc_ids, lengths = array("Q"), array("f")
+            for doc, post_id in enumerate(self._doc_ids):
+                if doc not in self._deleted:
+                    renumber[doc] = len(doc_ids)
+                    doc_ids.append(post_id)
+                    lengths.append(self._lengths[doc])
+
+            postings = {}
+            for term, (docs, tfs) in self._postings.items():
+                new_docs, new_tfs = array("I"), array("f")
+                for doc, frequency in zip(docs, tfs):
+                    new_doc = renumber.get(doc)
+                    if new_doc is not None:
+                        new_docs.append(new_doc)
+                        new_tfs.append(frequency)
+                if new_docs:
+                    postings[term] = (new_docs, new_tfs)
+
+            self._postings = postings
+            self._doc_ids = doc_ids
+            self._lengths = lengths
+            self._docs = {post_id: doc for doc, post_id in enumerate(doc_ids)}
+            self._deleted = set()
+            self._sorted_terms = None
+
+    def _expand(self, term):
+        expansions = []
+        if term in self._postings:
+            expansions.append((term, 1.0))
+        if len(term) >= PREFIX_MIN_LENGTH:
+            if self._sorted_terms is None:
+                self._sorted_terms = sorted(self._postings)
+            start = bisect.bisect_right(self._sorted_terms, term)
+            for candidate in self._sorted_terms[
+                start : start + PREFIX_EXPANSIONS
+            ]:
+                if not candidate.startswith(term):
+                    break
+                expansions.append((candidate, PREFIX_WEIGHT))
+        return expansions
+
+    def search(self, terms, limit=None):
+        """
+        Возвращает список `(post_id, score)` по убыванию релевантности.
+        Пост подходит, если содержит хотя бы один из терминов.
+        """
+        with self._lock:
+            count = len(self._docs)
+            if not count:
+                return []
+            average_length = self._total_length / count or 1.0
+            scores = defaultdict(float)
+            tokens = {token for term in terms for token in tokenize(term)}
+            for token in tokens:
+                for term, weight in self._expand(token):
+                    docs, tfs = self._postings[term]
+                    frequency = len(docs)
+                    idf = math.log(
+                        1 + (count - frequency + 0.5) / (frequency + 0.5)
+                    )
+                    for doc, tf in zip(docs, tfs):
+                        if doc in self._deleted:
+                            continue
+                        norm = BM25_K1 * (
+                            1
+                            - BM25_B
+                            + BM25_B * self._lengths[doc] / average_length
+                        )
+                        scores[doc] += (
+                            weight * idf * tf * (BM25_K1 + 1) / (tf + norm)
+                        )
+
+            doc_ids = self._doc_ids
+            if limit is None:
+                ranked = sorted(scores.items(), key=lambda item: -item[1])
+            else:
+                ranked = heapq.nlargest(
+                    limit, scores.items(), key=lambda item: item[1]
+                )
+            return [(doc_ids[doc], score) for doc, score in ranked]
+
+    def save(self, path):
+        """
+        Сохраняет снимок индекса. Файл записывается рядом и атомарно
+        подменяет старый, поэтому читающие воркеры не видят его частично.
+        """
+        path = Path(path)
+        with self._lock:
+            self.compact()
+            terms = []
+            docs, tfs = array("I"), array("f")
+            for term, (term_docs, term_tfs) in self._postings.items():
+                terms.append((term, len(docs), len(term_docs)))
+                docs.extend(term_docs)
+                tfs.extend(term_tfs)
+            regions = [
+                ("docs", docs),
+                ("tfs", tfs),
+                ("doc_ids", self._doc_ids),
+                ("lengths", self._lengths),
+            ]
+            header = {
+                "byteorder": sys.byteorder,
+                "terms": terms,
+                "total_length": self._total_length,
+                "high_water": (
+                    self.high_water.isoformat() if self.high_water else None
+                ),
+                "group_names": self.group_names,
+                "regions": {},
+            }
+            offset = 0
+            for name, values in regions:
+                size = len(values) * values.itemsize
+                header["regions"][name] = [offset, size]
+                offset += size + (-size % 8)
+            encoded = json.dumps(header, ensure_ascii=False).encode()
+            encoded += b" " * (-len(encoded) % 8)
+
+            temporary = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+            with open(temporary, "wb") as file:
+                file.write(SNAPSHOT_MAGIC)
+                file.write(struct.pack("<Q", len(encoded)))
+                file.write(encoded)
+                for _, values in regions:
+                    data = values.tobytes()
+                    file.write(data)
+                    file.write(b"\0" * (-len(data) % 8))
+            os.replace(temporary, path)
+
+    @classmethod
+    def load(cls, path):
+        """
+        Загружает снимок, отображая его в память. Списки вхождений
+        не копируются, пока не изменятся.
+        """
+        with open(path, "rb") as file:
+            mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        view = memoryview(mapped)
+        if bytes(view[:8]) != SNAPSHOT_MAGIC:
+            raise ValueError(f"{path} не является снимком поискового индекса")
+        (header_size,) = struct.unpack("<Q", view[8:16])
+        header = json.loads(bytes(view[16 : 16 + header_size]))
+        if header["byteorder"] != sys.byteorder:
+            raise ValueError(f"{path} записан с другим порядком байтов")
+
+        base = 16 + header_size
+
+        def region(name, typecode):
+            start, size = header["regions"][name]
+            return view[base + start : base + start + size].cast(typecode)
+
+        docs, tfs = region("docs", "I"), region("tfs", "f")
+        index = cls()
+        index._mmap = mapped
+        index._postings = {
+            term: (docs[start : start + size], tfs[start : start + size])
+            for term, start, size in header["terms"]
+        }
+        index._doc_ids = array("Q", region("doc_ids", "Q"))
+        index._lengths = array("f", region("lengths", "f"))
+        index._docs = {
+            post_id: doc for doc, post_id in enumerate(index._doc_ids)
+        }
+        index._total_length = header["total_length"]
+        if header["high_water"]:
+            index.high_water = datetime.fromisoformat(header["high_water"])
+        # В JSON ключи — строки. В снимке без названий все группы
+        # считаются переименованными, и первая синхронизация обновит их.
+        index.group_names = {
+            kind: {int(key): name for key, name in names.items()}
+            for kind, names in header.get(
+                "group_names", {"category": {}, "subcategory": {}}
+            ).items()
+        }
+        return index
+
+
+def post_fields(title, content, subcategory, category):
+    return {
+        "title": title,
+        "content": content,
+        "subcategory": subcategory,
+        "category": category,
+    }
+
+
+def _index_rows(index, queryset):
+    high_water = queryset.aggregate(high_water=Max("updated_at"))["high_water"]
+    rows = queryset.values_list(
+        "id",
+        "title",
+        "content",
+        "subcategory__name",
+        "category__name",
+    ).iterator(chunk_size=2000)
+    for post_id, title, content, subcategory, category in rows:
+        index.add_document(
+            post_id, post_fields(title, content, subcategory, category)
+        )
+    if high_water is not None and (
+        index.high_water is None or high_water > index.high_water
+    ):
+        index.high_water = high_water
+
+
+def group_names():
+    """Текущие названия категорий и подкатегорий: таблицы маленькие."""
+    return {
+        "category": dict(Category.objects.values_list("id", "name")),
+        "subcategory": dict(SubCategory.objects.values_list("id", "name")),
+    }
+
+
+def diff_post_ids(indexed_ids):
+    """
+    Сравнивает ID постов индекса с базой и возвращает пару множеств:
+    ID удалённых из базы и ID, которых нет в индексе. Сравниваются сами
+    ID, а не их количество: удаление одного поста и создание другого
+    количество не меняют.
+    """
+    existing = set(Post.objects.values_list("id", flat=True))
+    indexed = set(indexed_ids)
+    return indexed - existing, existing - indexed
+
+
+def build_index():
+    """Строит индекс по всем постам из базы данных."""
+    index = InvertedIndex()
+    index.group_names = group_names()
+    _index_rows(index, Post.objects.all())
+    return index
+
+
+def sync_index(index):
+    """
+    Догоняет изменения, сделанные другими процессами: индексирует посты,
+    изменённые после `high_water` или пропущенные, посты переименованных
+    категорий и подкатегорий, и убирает удалённые из базы.
+    """
+    names = group_names()
+    renamed = {
+        kind: [
+            group_id
+            for group_id, name in names[kind].items()
+            if index.group_names[kind].get(group_id) != name
+        ]
+        for kind in names
+    }
+    index.group_names = names
+    posts = Post.objects.all()
+    if index.high_water:
+        posts = posts.filter(updated_at__gte=index.high_water - SYNC_OVERLAP)
+    _index_rows(index, posts)
+    if renamed["category"] or renamed["subcategory"]:
+        _index_rows(
+            index,
+            Post.objects.filter(
+                Q(category__in=renamed["category"])
+                | Q(subcategory__in=renamed["subcategory"])
+            ),
+        )
+    deleted, missing = diff_post_ids(index.post_ids())
+    for post_id in deleted:
+        index.remove_document(post_id)
+    if missing:
+        _index_rows(index, Post.objects.filter(id__in=missing))
+
+
+_index = None
+_index_lock = threading.Lock()
+_last_sync = 0.0
+
+
+def loaded_index():
+    """Индекс текущего процесса, если он уже загружен, иначе `None`."""
+    return _index
+
+
+def get_index():
+    """
+    Возвращает индекс процесса. При первом вызове загружает снимок
+    с диска (или строит индекс и сохраняет снимок), а затем не чаще
+    раза в `INDEX_SYNC_INTERVAL` секунд догоняет изменения в базе.
+    """
+    global _index, _last_sync
+    options = search_options()
+    with _index_lock:
+        if _index is None:
+            path = options["INDEX_PATH"]
+            if path and Path(path).exists():
+                _index = InvertedIndex.load(path)
+                sync_index(_index)
+            else:
+                _index = build_index()
+                if path:
+                    _index.save(path)
+            _last_sync = time.monotonic()
+        elif time.monotonic() - _last_sync >= options["INDEX_SYNC_INTERVAL"]:
+            sync_index(_index)
+            _last_sync = time.monotonic()
+    return _index
+
+
+def reset_index():
+    global _index
+    with _index_lock:
+        _index = None
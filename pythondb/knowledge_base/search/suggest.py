@@ -0,0 +1,418 @@
+import bisect
+import logging
+import threading
+import time
+from array import array
+from collections import Counter, defaultdict
+
+from django.db import connection
+from django.db.models import Max
+from django.urls import reverse
+
+from knowledge_base.models import Category, Post, SubCategory
+
+from . import search_options
+from .index import SYNC_OVERLAP, diff_post_ids, tokenize
+
+logger = logging.getLogger(__name__)
+
+SUGGEST_LIMIT = 10
+SUGGEST_MAX_LIMIT = 20
+# Сколько терминов словаря перебирается для одного префикса и сколько
+# записей-кандидатов проверяется на запрос. Ограничения держат время
+# ответа постоянным для коротких префиксов вроде "д".
+MAX_PREFIX_TERMS = 200
+MAX_CANDIDATES = 500
+# Минимальное сходство по триграммам (как `pg_trgm.similarity_threshold`)
+# и сколько похожих терминов берётся для слова с опечаткой.
+TRIGRAM_THRESHOLD = 0.3
+MAX_SIMILAR_TERMS = 20
+# Доля удалённых записей, после которой секция перестраивается.
+COMPACT_RATIO = 0.25
+
+# Типы подсказок и атрибуты их секций, в порядке вывода при равном
+# качестве совпадения.
+SECTIONS = {
+    "category": "categories",
+    "subcategory": "subcategories",
+    "post": "posts",
+}
+
+# Качество совпадения: чем меньше, тем выше подсказка.
+MATCH_START = 0
+MATCH_WORD = 1
+MATCH_FUZZY = 2
+
+
+def trigrams(term):
+    """Триграммы слова с дополнением пробелами, как в `pg_trgm`."""
+    padded = f"  {term} "
+    return {padded[i : i + 3] for i in range(len(padded) - 2)}
+
+
+class SuggestSection:
+    """
+    Индекс подсказок для одного типа объектов (посты, подкатегории или
+    категории).
+
+    Слова названий хранятся в отсортированном словаре: поиск по префиксу
+    — это `bisect` и перебор соседних терминов, то есть обход плоского
+    префиксного дерева. Для каждого термина хранится компактный список
+    номеров записей (`array("I")`). Для слов с опечатками словарь
+    дополнительно проиндексирован по триграммам.
+
+    Удалённые записи помечаются и отфильтровываются при поиске,
+    а при их накоплении секция перестраивается.
+    """
+
+    def __init__(self):
+        self._ids = array("Q")
+        self._titles = []
+        self._payloads = []
+        self._nums = {}
+        self._removed = 0
+        self._postings = {}
+        self._vocabulary = []
+        self._vocabulary_sorted = True
+        self._trigrams = defaultdict(list)
+        self._trigram_counts = {}
+
+    def __len__(self):
+        return len(self._nums)
+
+    def __contains__(self, object_id):
+        return object_id in self._nums
+
+    def add(self, object_id, title, payload=None):
+        """Добавляет или заменяет запись."""
+        self._remove(object_id)
+        num = len(self._ids)
+        self._ids.append(object_id)
+        self._titles.append(title)
+        self._payloads.append(payload)
+        self._nums[object_id] = num
+        for term in set(tokenize(title)):
+            postings = self._postings.get(term)
+            if postings is None:
+                postings = self._postings[term] = array("I")
+                self._vocabulary.append(term)
+                self._vocabulary_sorted = False
+                grams = trigrams(term)
+                self._trigram_counts[term] = len(grams)
+                for gram in grams:
+                    self._trigrams[gram].append(term)
+            postings.append(num)
+
+    def remove(self, object_id):
+        self._remove(object_id)
+        if self._removed > max(1000, len(self._nums) * COMPACT_RATIO):
+            self.compact()
+
+    def _remove(self, object_id):
+        num = self._nums.pop(object_id, None)
+        if num is not None:
+            self._titles[num] = None
+            self._payloads[num] = None
+            self._removed += 1
+
+    def compact(self):
+        """Перестраивает секцию без удалённых записей."""
+        fresh = SuggestSection()
+        for object_id, num in self._nums.items():
+            fresh.add(object_id, self._titles[num], self._payloads[num])
+        self.__dict__.update(fresh.__dict__)
+
+    def payload(self, object_id):
+        num = self._nums.get(object_id)
+        return None if num is None else self._payloads[num]
+
+    def entry(self, num):
+        return self._ids[num], self._titles[num], self._payloads[num]
+
+    def _prefix_terms(self, token):
+        if not self._vocabulary_sorted:
+            self._vocabulary.sort()
+            self._vocabulary_sorted = True
+        start = bisect.bisect_left(self._vocabulary, token)
+        terms = []
+        for term in self._vocabulary[start : start + MAX_PREFIX_TERMS]:
+            if not term.startswith(token):
+                break
+            terms.append(term)
+        return terms
+
+    def _similar_terms(self, token):
+        grams = trigrams(token)
+        shared = Counter()
+        for gram in grams:
+            shared.update(self._trigrams.get(gram, ()))
+        similar = []
+        for term, count in shared.items():
+            similarity = count / (
+                len(grams) + self._trigram_counts[term] - count
+            )
+            if similarity >= TRIGRAM_THRESHOLD:
+                similar.append((similarity, term))
+        similar.sort(reverse=True)
+        return [term for _, term in similar[:MAX_SIMILAR_TERMS]]
+
+    def _expand(self, token):
+        """
+        Термины словаря для слова запроса: по префиксу, а если таких
+        нет — похожие по триграммам. Возвращает `(термины, нечёткое)`.
+        """
+        terms = self._prefix_terms(token)
+        if terms:
+            return terms, False
+        return self._similar_terms(token), True
+
+    def search(self, tokens):
+        """
+        Возвращает до `MAX_CANDIDATES` пар `(оценка, номер записи)`,
+        в которых каждое слово запроса совпало со словом названия.
+        Меньшая оценка — лучшая подсказка.
+        """
+        if not tokens:
+            return []
+        specs = []
+        for token in tokens:
+            terms, fuzzy = self._expand(token)
+            if not terms:
+                return []
+            size = sum(len(self._postings[term]) for term in terms)
+            specs.append((size, token, terms, fuzzy))
+        # Кандидаты берутся по самому редкому слову запроса,
+        # остальные слова проверяются по названию.
+        specs.sort(key=lambda spec: spec[0])
+        _, _, driver_terms, _ = specs[0]
+
+        candidates = []
+        seen = set()
+        for term in driver_terms:
+            for num in self._postings[term]:
+                if num in seen or self._titles[num] is None:
+                    continue
+                seen.add(num)
+                candidates.append(num)
+                if len(candidates) >= MAX_CANDIDATES:
+                    break
+            if len(candidates) >= MAX_CANDIDATES:
+                break
+
+        fuzzy = any(spec[3] for spec in specs)
+        checks = [
+            (token, set(terms) if is_fuzzy else None)
+            for _, token, terms, is_fuzzy in specs
+        ]
+        first = tokens[0]
+        results = []
+        for num in candidates:
+            title = self._titles[num]
+            words = tokenize(title)
+            if len(specs) > 1 and not all(
+                any(
+                    word in terms if terms else word.startswith(token)
+                    for word in words
+                )
+                for token, terms in checks
+            ):
+                continue
+            if fuzzy:
+                quality = MATCH_FUZZY
+            elif words and words[0].startswith(first):
+                quality = MATCH_START
+            else:
+                quality = MATCH_WORD
+            results.append(((quality, len(title)), num))
+        return results
+
+
+class SuggestIndex:
+    """
+    Подсказки для строки поиска по названиям категорий, подкатегорий
+    и заголовкам постов.
+    """
+
+    def __init__(self):
+        self.categories = SuggestSection()
+        self.subcategories = SuggestSection()
+        self.posts = SuggestSection()
+        self.high_water = None
+        self._lock = threading.RLock()
+
+    def section(self, kind):
+        return getattr(self, SECTIONS[kind])
+
+    def add_category(self, category_id, name, slug):
+        with self._lock:
+            self.categories.add(category_id, name, slug)
+
+    def add_subcategory(self, subcategory_id, name, category_id):
+        with self._lock:
+            self.subcategories.add(subcategory_id, name, category_id)
+
+    def add_post(self, post_id, title, subcategory_id):
+        with self._lock:
+            self.posts.add(post_id, title, subcategory_id)
+
+    def remove(self, kind, object_id):
+        with self._lock:
+            self.section(kind).remove(object_id)
+
+    def suggest(self, query, limit=SUGGEST_LIMIT):
+        """
+        Возвращает до `limit` подсказок `{"type", "title", "url"}`:
+        сначала совпадения с начала названия, затем с начала любого
+        слова, затем похожие по триграммам; при равенстве — категории,
+        подкатегории, посты и более короткие названия.
+        """
+        tokens = tokenize(query)
+        if not tokens:
+            return []
+        with self._lock:
+            scored = []
+            for order, kind in enumerate(SECTIONS):
+                for (quality, length), num in self.section(kind).search(
+                    tokens
+                ):
+                    scored.append(((quality, order, length), kind, num))
+            scored.sort(key=lambda item: item[0])
+
+            suggestions = []
+            for _, kind, num in scored:
+                object_id, title, payload = self.section(kind).entry(num)
+                url = self._url(kind, object_id, payload)
+                if url is not None:
+                    suggestions.append(
+                        {"type": kind, "title": title, "url": url}
+                    )
+                    if len(suggestions) >= limit:
+                        break
+            return suggestions
+
+    def _url(self, kind, object_id, payload):
+        if kind == "category":
+            return reverse("knowledge_base:category", args=[payload])
+        if kind == "subcategory":
+            slug = self.categories.payload(payload)
+            if slug is None:
+                return None
+            return reverse("knowledge_base:post", args=[slug, object_id])
+        category_id = self.subcategories.payload(payload)
+        slug = self.categories.payload(category_id)
+        if slug is None:
+            return None
+        url = reverse("knowledge_base:post", args=[slug, payload])
+        return f"{url}?post={object_id}#post-{object_id}"
+
+
+def _index_groups(index):
+    """Перестраивает секции категорий и подкатегорий: таблицы маленькие."""
+    categories, subcategories = SuggestSection(), SuggestSection()
+    for category_id, name, slug in Category.objects.values_list(
+        "id", "name", "slug"
+    ):
+        categories.add(category_id, name, slug)
+    for subcategory_id, name, category_id in SubCategory.objects.values_list(
+        "id", "name", "category_id"
+    ):
+        subcategories.add(subcategory_id, name, category_id)
+    with index._lock:
+        index.categories = categories
+        index.subcategories = subcategories
+
+
+def _index_posts(index, queryset):
+    high_water = queryset.aggregate(high_water=Max("updated_at"))["high_water"]
+    rows = queryset.values_list("id", "title", "subcategory_id").iterator(
+        chunk_size=5000
+    )
+    for post_id, title, subcategory_id in rows:
+        index.add_post(post_id, title, subcategory_id)
+    if high_water is not None and (
+        index.high_water is None or high_water > index.high_water
+    ):
+        index.high_water = high_water
+
+
+def build_suggest_index():
+    """Строит индекс подсказок по всем категориям, подкатегориям и постам."""
+    index = SuggestIndex()
+    _index_groups(index)
+    _index_posts(index, Post.objects.all())
+    return index
+
+
+def sync_suggest_index(index):
+    """
+    Догоняет изменения других процессов: перечитывает категории
+    и подкатегории, индексирует посты, изменённые после `high_water`
+    или пропущенные, и убирает удалённые посты.
+    """
+    _index_groups(index)
+    posts = Post.objects.all()
+    if index.high_water:
+        posts = posts.filter(updated_at__gte=index.high_water - SYNC_OVERLAP)
+    _index_posts(index, posts)
+    with index._lock:
+        indexed = list(index.posts._nums)
+    deleted, missing = diff_post_ids(indexed)
+    for post_id in deleted:
+        index.remove("post", post_id)
+    if missing:
+        _index_posts(index, Post.objects.filter(id__in=missing))
+
+
+_suggest_index = None
+_suggest_lock = threading.Lock()
+_last_sync = 0.0
+_sync_thread = None
+
+
+def loaded_suggest_index():
+    """Индекс подсказок текущего процесса, если он уже построен."""
+    return _suggest_index
+
+
+def _sync_in_background(index):
+    try:
+        sync_suggest_index(index)
+    except Exception:
+        logger.exception("Не удалось синхронизировать индекс подсказок")
+    finally:
+        # У потока своё соединение с базой.
+        connection.close()
+
+
+def get_suggest_index():
+    """
+    Возвращает индекс подсказок процесса: строит его при первом вызове
+    (обычно заранее, `knowledge_base.search.warm_up`) и не чаще раза
+    в `INDEX_SYNC_INTERVAL` секунд запускает догоняющую синхронизацию
+    в фоновом потоке. Запрос её не ждёт и отвечает по текущему индексу.
+    """
+    global _suggest_index, _last_sync, _sync_thread
+    with _suggest_lock:
+        if _suggest_index is None:
+            _suggest_index = build_suggest_index()
+            _last_sync = time.monotonic()
+        elif (
+            time.monotonic() - _last_sync
+            >= search_options()["INDEX_SYNC_INTERVAL"]
+            and (_sync_thread is None or not _sync_thread.is_alive())
+        ):
+            _last_sync = time.monotonic()
+            _sync_thread = threading.Thread(
+                target=_sync_in_background,
+                args=(_suggest_index,),
+                name="suggest-index-sync",
+                daemon=True,
+            )
+            _sync_thread.start()
+    return _suggest_index
+
+
+def reset_suggest_index():
+    global _suggest_index
+    with _suggest_lock:
+        _suggest_index = None
@@ -0,0 +1,207 @@
+from django.db import transaction
+from django.db.models.signals import (
+    m2m_changed,
+    post_delete,
+    post_save,
+    pre_delete,
+)
+from django.dispatch import receiver
+
+from .models import (
+    Category,
+    Post,
+    SiteCounter,
+    SubCategory,
+    User,
+    UserStats,
+)
+from .search.index import loaded_index, post_fields
+from .search.suggest import loaded_suggest_index
+from .versions import bump_version
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+@receiver(post_save, sender=SubCategory)
+@receiver(post_delete, sender=SubCategory)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def bump_content_version(sender, **kwargs):
+    """
+    Сбрасывает кэши, зависящие от версии содержимого.
+
+    Сигнал приходит внутри транзакции записи (`Post.save`), до её
+    фиксации. Версия увеличивается сразу — чтения в той же транзакции
+    не получают устаревшие записи кэша — и ещё раз после фиксации:
+    другой процесс мог прочитать промежуточную версию вместе с ещё
+    не зафиксированными данными и закэшировать их под ней.
+    """
+    bump_version()
+    transaction.on_commit(bump_version)
+
+
+@receiver(post_save, sender=Post)
+def index_post(sender, instance, **kwargs):
+    """Обновляет пост в поисковых индексах процесса, если они загружены."""
+    index = loaded_index()
+    if index is not None:
+        index.add_document(
+            instance.id,
+            post_fields(
+                instance.title,
+                instance.content,
+                instance.subcategory.name,
+                instance.category.name,
+            ),
+        )
+    suggest_index = loaded_suggest_index()
+    if suggest_index is not None:
+        suggest_index.add_post(
+            instance.id, instance.title, instance.subcategory_id
+        )
+
+
+@receiver(post_delete, sender=Post)
+def unindex_post(sender, instance, **kwargs):
+    """Убирает удалённый пост из поисковых индексов процесса."""
+    index = loaded_index()
+    if index is not None:
+        index.remove_document(instance.id)
+    suggest_index = loaded_suggest_index()
+    if suggest_index is not None:
+        suggest_index.remove("post", instance.id)
+
+
+@receiver(post_save, sender=Category)
+def index_category(sender, instance, **kwargs):
+    suggest_index = loaded_suggest_index()
+    if suggest_index is not None:
+        suggest_index.add_category(instance.id, instance.name, instance.slug)
+
+
+@receiver(post_save, sender=SubCategory)
+def index_subcategory(sender, instance, **kwargs):
+    suggest_index = loaded_suggest_index()
+    if suggest_index is not None:
+        suggest_index.add_subcategory(
+            instance.id, instance.name, instance.category_id
+        )
+
+
+@receiver(post_delete, sender=Category)
+def unindex_category(sender, instance, **kwargs):
+    suggest_index = loaded_suggest_index()
+    if suggest_index is not None:
+        suggest_index.remove("category", instance.id)
+
+
+@receiver(post_delete, sender=SubCategory)
+def unindex_subcategory(sender, instance, **kwargs):
+    suggest_index = loaded_suggest_index()
+    if suggest_index is not None:
+        suggest_index.remove("subcategory", instance.id)
+
+
+@receiver(post_save, sender=SubCategory)
+@receiver(post_save, sender=Category)
+def reindex_posts(sender, instance, created, **kwargs):
+    """
+    Переиндексирует посты переименованной категории или подкатегории:
+    их названия входят в документ поста.
+    """
+    index = loaded_index()
+    if index is None or created:
+        return
+    lookup = "category" if sender is Category else "subcategory"
+    index.group_names[lookup][instance.id] = instance.name
+    rows = Post.objects.filter(**{lookup: instance}).values_list(
+        "id", "title", "content", "subcategory__name", "category__name"
+    )
+    for post_id, title, content, subcategory, category in rows:
+        index.add_document(
+            post_id, post_fields(title, content, subcategory, category)
+        )
+
+
+@receiver(m2m_changed, sender=Post.likes.through)
+def recount_likes(sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    Пересчитывает `like_count` после изменения лайков в обход
+    `Post.toggle_like` (например, через админку или `post.likes.add`).
+    """
+    if action == "pre_clear" and reverse:
+        # После `user.liked_posts.clear()` затронутые посты уже не
+        # найти, поэтому они запоминаются до очистки.
+        instance._cleared_like_post_ids = liked_post_ids(instance)
+        return
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+    if not reverse:
+        post_ids = [instance.pk]
+    elif action == "post_clear":
+        post_ids = instance.__dict__.pop("_cleared_like_post_ids", [])
+    else:
+        post_ids = pk_set
+    Post.objects.filter(pk__in=post_ids).recount_likes()
+
+
+def liked_post_ids(user):
+    return list(
+        Post.likes.through.objects.filter(user_id=user.pk).values_list(
+            "post_id", flat=True
+        )
+    )
+
+
+@receiver(pre_delete, sender=User)
+def remember_liked_posts(sender, instance, **kwargs):
+    """
+    Лайки удаляемого пользователя удаляются каскадом, без
+    `m2m_changed`: посты, которые он лайкнул, запоминаются до удаления.
+    """
+    instance._liked_post_ids = liked_post_ids(instance)
+
+
+@receiver(post_delete, sender=User)
+def recount_likes_of_deleted_user(sender, instance, **kwargs):
+    """Пересчитывает лайки постов, которые лайкнул удалённый пользователь."""
+    post_ids = instance.__dict__.pop("_liked_post_ids", None)
+    if post_ids:
+        Post.objects.filter(pk__in=post_ids).recount_likes()
+
+
+COUNTERS = {
+    Category: SiteCounter.CATEGORIES,
+    SubCategory: SiteCounter.SUBCATEGORIES,
+    Post: SiteCounter.POSTS,
+}
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_save, sender=SubCategory)
+@receiver(post_save, sender=Category)
+def count_created(sender, instance, created, **kwargs):
+    """
+    Обновляет счётчики главной страницы и статистику автора при
+    создании объекта.
+    """
+    if not created:
+        return
+    SiteCounter.add(COUNTERS[sender], 1)
+    if sender is Post:
+        UserStats.post_added(instance.author_id, instance.created_at)
+
+
+@receiver(post_delete, sender=Post)
+@receiver(post_delete, sender=SubCategory)
+@receiver(post_delete, sender=Category)
+def count_deleted(sender, instance, **kwargs):
+    """
+    Обновляет счётчики главной страницы и статистику автора при
+    удалении объекта.
+    """
+    SiteCounter.add(COUNTERS[sender], -1)
+    if sender is Post:
+        UserStats.post_removed(
+            instance.author_id, instance.created_at, instance.like_count
+        )
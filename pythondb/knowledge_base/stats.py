@@ -0,0 +1,128 @@
+from django.db import transaction
+from django.db.models import Count, F, Max, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from .models import Category, Post, SiteCounter, SubCategory, UserStats
+
+
+def actual_counters() -> dict:
+    """Счётчики сайта, посчитанные по таблицам."""
+    return {
+        SiteCounter.CATEGORIES: Category.objects.count(),
+        SiteCounter.SUBCATEGORIES: SubCategory.objects.count(),
+        SiteCounter.POSTS: Post.objects.count(),
+    }
+
+
+# Поля `UserStats`, которые сверяет `reconcile_stats`.
+USER_STATS_FIELDS = ("post_count", "likes_received", "last_post_at")
+
+
+def like_count_drift() -> list:
+    """
+    Посты, у которых `like_count` не совпадает с таблицей лайков:
+    `[(ID поста, сохранено, на самом деле)]`.
+    """
+    likes = Post.likes.through.objects
+    counts = (
+        likes.filter(post_id=OuterRef("pk"))
+        .order_by()
+        .values("post_id")
+        .annotate(count=Count("*"))
+        .values("count")
+    )
+    return list(
+        Post.objects.annotate(actual=Coalesce(Subquery(counts), 0))
+        .exclude(like_count=F("actual"))
+        .order_by("id")
+        .values_list("id", "like_count", "actual")
+    )
+
+
+def actual_user_stats() -> dict:
+    """
+    Статистика каждого автора, посчитанная по таблицам постов и лайков:
+    `{ID пользователя: (постов, лайков, время последнего поста)}`.
+    Лайки считаются по самой таблице лайков, а не по `like_count`,
+    чтобы расхождение счётчиков постов не переносилось в статистику.
+    """
+    likes = dict(
+        Post.likes.through.objects.order_by()
+        .values("post__author_id")
+        .annotate(count=Count("*"))
+        .values_list("post__author_id", "count")
+    )
+    rows = (
+        Post.objects.order_by()
+        .values("author_id")
+        .annotate(count=Count("*"), last=Max("created_at"))
+        .values_list("author_id", "count", "last")
+    )
+    return {
+        author_id: (count, likes.get(author_id, 0), last)
+        for author_id, count, last in rows
+    }
+
+
+def reconcile_stats(fix=True) -> list:
+    """
+    Сравнивает сохранённую статистику с пересчитанной по таблицам и,
+    если `fix`, исправляет расхождения.
+
+    Возвращает список расхождений `(имя, сохранено, на самом деле)`;
+    для статистики пользователей имя — `user:<id>:<поле>`, для
+    счётчиков лайков постов — `post:<id>:like_count`.
+    """
+    drift = []
+    with transaction.atomic():
+        posts = like_count_drift()
+        for post_id, old, new in posts:
+            drift.append((f"post:{post_id}:like_count", old, new))
+
+        stored = SiteCounter.values()
+        for name, actual in actual_counters().items():
+            if stored.get(name) != actual:
+                drift.append((name, stored.get(name), actual))
+                if fix:
+                    SiteCounter.objects.update_or_create(
+                        name=name, defaults={"value": actual}
+                    )
+
+        stored = {
+            user_id: tuple(stats)
+            for user_id, *stats in UserStats.objects.values_list(
+                "user_id", *USER_STATS_FIELDS
+            )
+        }
+        actual = actual_user_stats()
+        empty = (0, 0, None)
+        changed = []
+        for user_id in stored.keys() | actual.keys():
+            old, new = stored.get(user_id), actual.get(user_id, empty)
+            if old == new or (old is None and new == empty):
+                continue
+            # Для отсутствующей строки — только ненулевые значения.
+            for field, old_value, new_value in zip(
+                USER_STATS_FIELDS, old or (None, None, None), new
+            ):
+                if old_value != new_value and (old is not None or new_value):
+                    drift.append(
+                        (f"user:{user_id}:{field}", old_value, new_value)
+                    )
+            changed.append(
+                UserStats(user_id=user_id, **dict(zip(USER_STATS_FIELDS, new)))
+            )
+        if fix and changed:
+            UserStats.objects.bulk_create(
+                changed,
+                update_conflicts=True,
+                unique_fields=["user"],
+                update_fields=USER_STATS_FIELDS,
+            )
+        # После статистики авторов: `recount_likes` пересчитывает и их
+        # `likes_received`, но уже по исправленным `like_count`.
+        if fix and posts:
+            Post.objects.filter(
+                pk__in=[post_id for post_id, _, _ in posts]
+            ).recount_likes()
+    return drift
@@ -0,0 +1,34 @@
+from contextlib import contextmanager
+
+from .middleware import QueryRecorder
+
+
+class QueryBudgetMixin:
+    """
+    Проверки бюджета SQL-запросов для `TestCase`.
+
+    В отличие от `assertNumQueries`, бюджет — верхняя граница, а при
+    его превышении в сообщении перечислены повторяющиеся запросы.
+    """
+
+    @contextmanager
+    def assertQueryBudget(self, max_queries, max_repeats=None):
+        """
+        Проверяет, что блок выполняет не больше `max_queries` запросов
+        и (если задано) ни один запрос не повторяется больше
+        `max_repeats` раз.
+        """
+        with QueryRecorder() as recorder:
+            yield recorder
+        if recorder.count > max_queries:
+            self.fail(
+                f"Бюджет {max_queries} запросов превышен: "
+                f"{recorder.report()}"
+            )
+        if max_repeats is not None:
+            repeated = recorder.repeated(max_repeats + 1)
+            if repeated:
+                self.fail(
+                    f"Запрос повторяется больше {max_repeats} раз: "
+                    f"{recorder.report(max_repeats + 1)}"
+                )
@@ -0,0 +1,323 @@
+from pathlib import Path
+from unittest import mock
+
+import yaml
+from django.conf import settings
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from api.fast import CompiledFields, FastJSONRenderer
+from api.serializers import (
+    CategorySerializer,
+    PostSerializer,
+    SubCategorySerializer,
+)
+
+from knowledge_base.models import Category, Post, SubCategory, User
+from knowledge_base.pagination import encode_cursor
+
+
+@override_settings(
+    KNOWLEDGE_BASE_API_PAGINATION={"PAGE_SIZE": 4, "MAX_PAGE_SIZE": 6}
+)
+class ApiPaginationTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="user", password="p")
+        self.category = Category.objects.create(name="Python", slug="python")
+        self.subcategory = SubCategory.objects.create(
+            name="Основы", category=self.category
+        )
+        self.posts = [
+            Post.objects.create(
+                title=f"Пост {i}",
+                content="Текст",
+                category=self.category,
+                subcategory=self.subcategory,
+                author=self.user,
+            )
+            for i in range(10)
+        ]
+        # Одинаковое время создания: порядок внутри него задаёт id.
+        Post.objects.filter(pk__in=[p.pk for p in self.posts[3:7]]).update(
+            created_at=timezone.now()
+        )
+        self.url = f"/api/subcategories/{self.subcategory.id}/posts/"
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def walk(self, url):
+        ids = []
+        while url:
+            data = self.client.get(url).json()
+            ids.extend(row["id"] for row in data["results"])
+            url = data["next"]
+        return ids
+
+    def test_pages_follow_created_at_and_id(self):
+        expected = list(
+            Post.objects.order_by("created_at", "id").values_list(
+                "id", flat=True
+            )
+        )
+        self.assertEqual(self.walk(self.url), expected)
+
+    def test_page(self):
+        # Состояние списка для ETag и сама страница.
+        with self.assertNumQueries(2):
+            data = self.client.get(self.url).json()
+        self.assertEqual(len(data["results"]), 4)
+        self.assertTrue(data["next"].startswith("http://testserver/api/"))
+        self.assertIn("cursor=", data["next"])
+
+    def test_page_size(self):
+        response = self.client.get(self.url, {"page_size": 2})
+        self.assertEqual(len(response.json()["results"]), 2)
+        self.assertIn("page_size=2", response.json()["next"])
+        response = self.client.get(self.url, {"page_size": 1000})
+        self.assertEqual(len(response.json()["results"]), 6)
+        response = self.client.get(self.url, {"page_size": "0"})
+        self.assertEqual(len(response.json()["results"]), 4)
+
+    def test_invalid_cursor(self):
+        for cursor in (
+            "не курсор",
+            encode_cursor(["x"]),
+            encode_cursor(["abc", "x"]),
+            encode_cursor([{"a": 1}, 2]),
+        ):
+            with self.subTest(cursor=cursor):
+                response = self.client.get(self.url, {"cursor": cursor})
+                self.assertEqual(response.status_code, 404)
+        response = self.client.get(
+            "/api/categories/", {"cursor": encode_cursor(["x"])}
+        )
+        self.assertEqual(response.status_code, 404)
+
+    def test_categories_and_subcategories(self):
+        Category.objects.bulk_create(
+            Category(name=f"Категория {i}", slug=f"c{i}") for i in range(6)
+        )
+        self.assertEqual(
+            self.walk("/api/categories/"),
+            list(Category.objects.order_by("id").values_list("id", flat=True)),
+        )
+        data = self.client.get(
+            f"/api/{self.category.id}/subcategories/"
+        ).json()
+        self.assertEqual(
+            data,
+            {
+                "next": None,
+                "results": [
+                    {
+                        "id": self.subcategory.id,
+                        "name": "Основы",
+                        "category": self.category.id,
+                    }
+                ],
+            },
+        )
+
+    def test_users_not_paginated(self):
+        response = self.client.get("/api/users/")
+        self.assertEqual(response.status_code, 200)
+        self.assertIsInstance(response.json(), list)
+
+
+class SparseFieldsetTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="user", password="p")
+        self.category = Category.objects.create(
+            name="Python", slug="python", description="Язык"
+        )
+        self.subcategory = SubCategory.objects.create(
+            name="Основы", category=self.category
+        )
+        self.post = Post.objects.create(
+            title="Пост",
+            content="Длинный текст поста",
+            category=self.category,
+            subcategory=self.subcategory,
+            author=self.user,
+        )
+        self.url = f"/api/subcategories/{self.subcategory.id}/posts/"
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def get(self, url, **params):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        sql = " ".join(query["sql"] for query in queries)
+        return response.json(), sql
+
+    def test_default_fields(self):
+        data, sql = self.get(self.url)
+        self.assertEqual(
+            list(data["results"][0]), ["id", "title", "content", "author"]
+        )
+        self.assertNotIn('"rendered_html"', sql)
+
+    def test_fields_and_omit(self):
+        data, sql = self.get(self.url, fields="id,title,unknown")
+        self.assertEqual(
+            data["results"], [{"id": self.post.id, "title": "Пост"}]
+        )
+        self.assertNotIn('"content"', sql)
+
+        data, sql = self.get(self.url, omit="content")
+        self.assertEqual(list(data["results"][0]), ["id", "title", "author"])
+        self.assertNotIn('"content"', sql)
+
+    def test_summary(self):
+        data, sql = self.get(self.url, view="summary")
+        self.assertEqual(
+            data["results"],
+            [
+                {
+                    "id": self.post.id,
+                    "title": "Пост",
+                    "excerpt": self.post.excerpt,
+                    "author": self.user.id,
+                }
+            ],
+        )
+        self.assertNotIn('"content"', sql)
+
+        data, _ = self.get("/api/categories/", view="summary")
+        self.assertEqual(
+            data["results"], [{"id": self.category.id, "name": "Python"}]
+        )
+
+    def test_retrieve(self):
+        data, sql = self.get(f"{self.url}{self.post.id}/", fields="title")
+        self.assertEqual(data, {"title": "Пост"})
+        self.assertNotIn('"content"', sql)
+
+    def test_schema_documents_fieldsets(self):
+        schema = yaml.safe_load(
+            (Path(settings.BASE_DIR) / "schema.yaml").read_text()
+        )
+        operations = {
+            operation["operationId"]: operation
+            for path in schema["paths"].values()
+            for operation in path.values()
+        }
+        for operation_id in (
+            "listCategories",
+            "retrieveCategory",
+            "listSubCategories",
+            "retrieveSubCategory",
+            "listPosts",
+            "retrievePost",
+        ):
+            with self.subTest(operation=operation_id):
+                params = {
+                    param["name"]
+                    for param in operations[operation_id]["parameters"]
+                }
+                self.assertLessEqual({"fields", "omit", "view"}, params)
+        components = schema["components"]["schemas"]
+        for serializer in (
+            CategorySerializer,
+            SubCategorySerializer,
+            PostSerializer,
+        ):
+            properties = components[serializer.Meta.model.__name__][
+                "properties"
+            ]
+            with self.subTest(serializer=serializer.__name__):
+                self.assertLessEqual(
+                    set(serializer.Meta.fields), set(properties)
+                )
+
+    def test_write_ignores_fieldset(self):
+        response = self.client.post(
+            f"{self.url}?fields=id",
+            {"title": "Новый", "content": "Текст"},
+            format="json",
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(
+            list(response.json()), ["id", "title", "content", "author"]
+        )
+
+
+class FastReadTest(TestCase):
+    TEXTS = (
+        "Обычный текст",
+        'Кавычки " и \\ слэш / и <теги> & 😀',
+        "Строки\nс\tуправляющими\r\x01\x1f\x7f символами",
+        "Разделители\u2028строк\u2029и абзацев",
+    )
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="user", password="p")
+        self.category = Category.objects.create(
+            name="Python", slug="python", description=self.TEXTS[1]
+        )
+        self.subcategory = SubCategory.objects.create(
+            name=self.TEXTS[3], category=self.category
+        )
+        for i, text in enumerate(self.TEXTS * 2):
+            Post.objects.create(
+                title=f"Пост {i} {text}"[:200],
+                content=text,
+                category=self.category,
+                subcategory=self.subcategory,
+                author=self.user,
+            )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def get(self, url, enabled):
+        with self.settings(KNOWLEDGE_BASE_API_FAST_READ={"ENABLED": enabled}):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response.content
+
+    def test_same_bytes(self):
+        posts = f"/api/subcategories/{self.subcategory.id}/posts/"
+        for url in (
+            "/api/categories/",
+            f"/api/{self.category.id}/subcategories/",
+            posts,
+            f"{posts}?page_size=3",
+            f"{posts}?view=summary",
+            f"{posts}?fields=title,id&page_size=5",
+        ):
+            with self.subTest(url=url):
+                self.assertEqual(self.get(url, True), self.get(url, False))
+
+    def test_next_page(self):
+        url = f"/api/subcategories/{self.subcategory.id}/posts/?page_size=3"
+        with self.settings(KNOWLEDGE_BASE_API_FAST_READ={"ENABLED": True}):
+            next_url = self.client.get(url).json()["next"]
+            # Состояние списка для ETag и сама страница.
+            with self.assertNumQueries(2):
+                fast = self.client.get(next_url)
+        self.assertIsInstance(fast.accepted_renderer, FastJSONRenderer)
+        self.assertEqual(len(fast.json()["results"]), 3)
+        self.assertEqual(fast.content, self.client.get(next_url).content)
+
+    def test_unsupported_serializer(self):
+        class DatedSerializer(PostSerializer):
+            class Meta(PostSerializer.Meta):
+                fields = ["id", "created_at"]
+
+        self.assertIsNone(CompiledFields.from_serializer(DatedSerializer()))
+        self.assertEqual(
+            CompiledFields.from_serializer(PostSerializer()).columns,
+            ["id", "title", "content", "author_id"],
+        )
+
+    def test_renderer_without_orjson(self):
+        data = {"next": None, "results": [{"title": self.TEXTS[3]}]}
+        expected = JSONRenderer().render(data)
+        self.assertEqual(FastJSONRenderer().render(data), expected)
+        with mock.patch("api.fast.orjson", None):
+            self.assertEqual(FastJSONRenderer().render(data), expected)
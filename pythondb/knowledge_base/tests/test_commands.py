@@ -0,0 +1,218 @@
+import json
+import tempfile
+from io import StringIO
+from pathlib import Path
+from unittest import mock, skipIf
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.test import TestCase
+
+from knowledge_base.explain import find_seq_scans
+from knowledge_base.management.commands import rerender_posts
+from knowledge_base.models import Category, Post, SubCategory
+from knowledge_base.rendering import RENDERER_VERSION
+
+User = get_user_model()
+
+
+class RerenderPostsCommandTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="testuser", password="testpass"
+        )
+        self.category = Category.objects.create(
+            name="Test Category", slug="test-category"
+        )
+        self.subcategory = SubCategory.objects.create(
+            name="Test SubCategory", category=self.category
+        )
+        self.post = Post.objects.create(
+            title="Test Post",
+            content="Test Content",
+            category=self.category,
+            subcategory=self.subcategory,
+            author=self.user,
+        )
+
+    def test_rerender_posts_fills_stale_posts(self):
+        """Команда заполняет HTML постов с устаревшей версией."""
+        Post.objects.filter(id=self.post.id).update(
+            rendered_html="", renderer_version=0
+        )
+        call_command("rerender_posts", stdout=StringIO())
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.rendered_html, "<p>Test Content</p>\n")
+        self.assertEqual(self.post.renderer_version, RENDERER_VERSION)
+
+    def test_rerender_posts_skips_fresh_posts(self):
+        """Команда не трогает посты с актуальной версией без `--all`."""
+        Post.objects.filter(id=self.post.id).update(rendered_html="cached")
+        call_command("rerender_posts", stdout=StringIO())
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.rendered_html, "cached")
+
+    def test_rerender_posts_skips_posts_edited_during_render(self):
+        """Пост, изменённый после чтения пачки, не затирается старым HTML."""
+        Post.objects.update(rendered_html="", renderer_version=0)
+        render_batch = rerender_posts.render_batch
+
+        def render_then_edit(batch):
+            rendered = render_batch(batch)
+            post = Post.objects.get(id=self.post.id)
+            post.content = "Edited Content"
+            post.save()
+            return rendered
+
+        out = StringIO()
+        with mock.patch.object(
+            rerender_posts, "render_batch", side_effect=render_then_edit
+        ):
+            call_command("rerender_posts", workers=1, stdout=out)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.rendered_html, "<p>Edited Content</p>\n")
+        self.assertIn("Пропущено постов", out.getvalue())
+
+    def test_rerender_posts_process_pool(self):
+        """Команда рендерит посты в пуле процессов пачками."""
+        for number in range(5):
+            Post.objects.create(
+                title=f"Post {number}",
+                content=f"Content {number}",
+                category=self.category,
+                subcategory=self.subcategory,
+                author=self.user,
+            )
+        Post.objects.update(rendered_html="", renderer_version=0)
+        call_command(
+            "rerender_posts", workers=2, batch_size=2, stdout=StringIO()
+        )
+        self.assertFalse(
+            Post.objects.exclude(renderer_version=RENDERER_VERSION).exists()
+        )
+        self.assertEqual(
+            Post.objects.get(title="Post 3").rendered_html,
+            "<p>Content 3</p>\n",
+        )
+
+    def test_rerender_posts_resumes_from_checkpoint(self):
+        """Команда продолжает работу после ID из чекпоинта."""
+        newer = Post.objects.create(
+            title="Newer Post",
+            content="Newer Content",
+            category=self.category,
+            subcategory=self.subcategory,
+            author=self.user,
+        )
+        Post.objects.update(rendered_html="", renderer_version=0)
+        with tempfile.TemporaryDirectory() as directory:
+            checkpoint = Path(directory) / "checkpoint"
+            checkpoint.write_text(
+                json.dumps(
+                    {
+                        "all": False,
+                        "since": None,
+                        "renderer_version": RENDERER_VERSION,
+                        "last_id": self.post.id,
+                    }
+                )
+            )
+            out = StringIO()
+            call_command(
+                "rerender_posts",
+                workers=1,
+                checkpoint=str(checkpoint),
+                stdout=out,
+            )
+            self.assertIn(f"после поста #{self.post.id}", out.getvalue())
+            # Запуск завершён: чекпоинт больше не нужен.
+            self.assertFalse(checkpoint.exists())
+        self.post.refresh_from_db()
+        newer.refresh_from_db()
+        self.assertEqual(self.post.rendered_html, "")
+        self.assertEqual(newer.rendered_html, "<p>Newer Content</p>\n")
+
+    def test_rerender_posts_ignores_foreign_checkpoint(self):
+        """Чекпоинт другого запуска (фильтры, версия) не учитывается."""
+        Post.objects.update(rendered_html="", renderer_version=0)
+        with tempfile.TemporaryDirectory() as directory:
+            checkpoint = Path(directory) / "checkpoint"
+            for saved in (
+                {
+                    "all": True,
+                    "since": None,
+                    "renderer_version": RENDERER_VERSION - 1,
+                    "last_id": self.post.id,
+                },
+                str(self.post.id),
+            ):
+                with self.subTest(saved=saved):
+                    checkpoint.write_text(json.dumps(saved))
+                    call_command(
+                        "rerender_posts",
+                        workers=1,
+                        all=True,
+                        checkpoint=str(checkpoint),
+                        stdout=StringIO(),
+                    )
+                    self.post.refresh_from_db()
+                    self.assertEqual(
+                        self.post.renderer_version, RENDERER_VERSION
+                    )
+                    Post.objects.update(renderer_version=0)
+
+    def test_rerender_posts_since(self):
+        """Флаг `--since` ограничивает посты по дате изменения."""
+        Post.objects.update(rendered_html="", renderer_version=0)
+        call_command(
+            "rerender_posts", workers=1, since="2999-01-01", stdout=StringIO()
+        )
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.rendered_html, "")
+
+    def test_rerender_posts_invalid_since(self):
+        for value in ("вчера", "2025-13-45", "2025-02-30T10:00"):
+            with self.subTest(since=value):
+                with self.assertRaisesMessage(CommandError, value):
+                    call_command(
+                        "rerender_posts",
+                        workers=1,
+                        since=value,
+                        stdout=StringIO(),
+                    )
+
+
+class ExplainHotQueriesCommandTest(TestCase):
+    def test_find_seq_scans(self):
+        tables = {"knowledge_base_post", "auth_user"}
+        self.assertEqual(
+            find_seq_scans(
+                "Seq Scan on knowledge_base_post  (cost=0.00..1.05)", tables
+            ),
+            ["knowledge_base_post"],
+        )
+        self.assertEqual(
+            find_seq_scans(
+                "3 0 0 SCAN knowledge_base_post USING INDEX post_created\n"
+                "9 0 0 SCAN qualify\n"
+                "12 0 0 SCAN auth_user",
+                tables,
+            ),
+            ["auth_user"],
+        )
+
+    def test_explain_hot_queries(self):
+        out = StringIO()
+        call_command("explain_hot_queries", verbosity=2, stdout=out)
+        output = out.getvalue()
+        self.assertIn("post: посты подкатегории", output)
+        self.assertIn("profile: посты автора", output)
+
+    @skipIf(connection.vendor == "postgresql", "ANALYZE есть в PostgreSQL")
+    def test_analyze_requires_postgresql(self):
+        with self.assertRaises(CommandError):
+            call_command(
+                "explain_hot_queries", analyze=True, stdout=StringIO()
+            )
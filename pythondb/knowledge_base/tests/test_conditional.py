@@ -0,0 +1,161 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils.http import http_date
+from rest_framework.test import APIClient
+
+from knowledge_base.models import Category, Post, SubCategory, User
+from knowledge_base.navigation import get_navigation
+
+
+class ConditionalPageTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="user", password="p")
+        self.category = Category.objects.create(name="Python", slug="python")
+        self.subcategory = SubCategory.objects.create(
+            name="Основы", category=self.category
+        )
+        self.post = Post.objects.create(
+            title="Пост",
+            content="Текст",
+            category=self.category,
+            subcategory=self.subcategory,
+            author=self.user,
+        )
+        self.url = reverse(
+            "knowledge_base:post",
+            args=[self.category.slug, self.subcategory.id],
+        )
+        get_navigation()
+
+    def test_not_modified_without_rendering(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn("Last-Modified", response)
+        with self.assertNumQueries(2):
+            cached = self.client.get(
+                self.url, HTTP_IF_NONE_MATCH=response["ETag"]
+            )
+        self.assertEqual(cached.status_code, 304)
+        self.assertEqual(cached.content, b"")
+        self.assertEqual(cached["ETag"], response["ETag"])
+
+    def test_state_queries_precede_rendering(self):
+        """Запросы состояния страницы выполняются и для ответа 200."""
+        with CaptureQueriesContext(connection) as state:
+            etag = self.client.get(self.url)["ETag"]
+            self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        rendered = len(state) - 2
+        self.assertEqual(
+            [q["sql"] for q in state[rendered:]],
+            [q["sql"] for q in state[:2]],
+        )
+
+    def test_if_modified_since_ignored(self):
+        """Без `Last-Modified` удаление поста не даёт ложного 304."""
+        other = Post.objects.create(
+            title="Другой пост",
+            content="Текст",
+            category=self.category,
+            subcategory=self.subcategory,
+            author=self.user,
+        )
+        self.client.get(self.url)
+        other.delete()
+        response = self.client.get(
+            self.url, HTTP_IF_MODIFIED_SINCE=http_date(2**32)
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertNotContains(response, "Другой пост")
+
+    def test_etag_changes_with_content(self):
+        etag = self.client.get(self.url)["ETag"]
+        self.post.title = "Новый заголовок"
+        self.post.save()
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "Новый заголовок")
+
+    def test_etag_changes_with_likes(self):
+        self.client.force_login(self.user)
+        etag = self.client.get(self.url)["ETag"]
+        self.post.toggle_like(self.user)
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "post-like liked")
+
+    def test_etag_depends_on_user(self):
+        etag = self.client.get(self.url)["ETag"]
+        self.client.force_login(self.user)
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_category_not_modified(self):
+        url = reverse("knowledge_base:category", args=[self.category.slug])
+        etag = self.client.get(url)["ETag"]
+        self.assertEqual(
+            self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304
+        )
+        SubCategory.objects.create(name="ООП", category=self.category)
+        self.assertEqual(
+            self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200
+        )
+
+    @override_settings(
+        KNOWLEDGE_BASE_PAGE_CACHE={
+            "ENABLED": True,
+            "VIEWS": {"knowledge_base:post": {"TIMEOUT": 60, "STALE": 0}},
+        }
+    )
+    def test_page_cache_hit_not_modified(self):
+        cache.clear()
+        get_navigation()
+        etag = self.client.get(self.url)["ETag"]
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+
+class ConditionalListTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="user", password="p")
+        category = Category.objects.create(name="Python", slug="python")
+        self.subcategory = SubCategory.objects.create(
+            name="Основы", category=category
+        )
+        self.post = Post.objects.create(
+            title="Пост",
+            content="Текст",
+            category=category,
+            subcategory=self.subcategory,
+            author=self.user,
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_posts_not_modified(self):
+        url = f"/api/subcategories/{self.subcategory.id}/posts/"
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn("Last-Modified", response)
+        with self.assertNumQueries(1):
+            cached = self.client.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(cached.status_code, 304)
+
+        self.post.delete()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {"next": None, "results": []})
+
+    def test_categories_change_with_version(self):
+        url = "/api/categories/"
+        etag = self.client.get(url)["ETag"]
+        self.assertEqual(
+            self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304
+        )
+        Category.objects.filter(slug="python").get().save()
+        self.assertEqual(
+            self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200
+        )
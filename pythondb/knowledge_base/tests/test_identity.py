@@ -0,0 +1,87 @@
+from django.http import Http404
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from knowledge_base.identity import IdentityMap
+from knowledge_base.models import Category, Post, SubCategory, User
+from knowledge_base.navigation import get_navigation
+
+
+class IdentityMapTest(TestCase):
+    def setUp(self):
+        self.category = Category.objects.create(name="Python", slug="python")
+
+    def test_loaded_once(self):
+        objects = IdentityMap()
+        with self.assertNumQueries(1):
+            by_slug = objects.get(Category, slug="python")
+            by_pk = objects.get(Category, pk=self.category.pk)
+            by_id = objects.get(Category, id=str(self.category.pk))
+        self.assertIs(by_slug, by_pk)
+        self.assertIs(by_slug, by_id)
+
+    def test_missing(self):
+        objects = IdentityMap()
+        with self.assertRaises(Category.DoesNotExist):
+            objects.get(Category, slug="missing")
+        with self.assertRaises(Http404):
+            objects.get_or_404(Category, id="abc")
+
+
+class IdentityMapViewTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="user", password="p")
+        self.category = Category.objects.create(name="Python", slug="python")
+        self.subcategory = SubCategory.objects.create(
+            name="Основы", category=self.category
+        )
+        self.post = Post.objects.create(
+            title="Пост",
+            content="Текст",
+            category=self.category,
+            subcategory=self.subcategory,
+            author=self.user,
+        )
+        get_navigation()
+
+    def test_edit_post_reads_post_once(self):
+        self.client.force_login(self.user)
+        url = reverse(
+            "knowledge_base:edit_post",
+            args=[self.category.slug, self.subcategory.id, self.post.id],
+        )
+        # Сессия, пользователь, пост, категория и подкатегория.
+        with self.assertNumQueries(5):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+
+    def test_create_post_reads_category_once(self):
+        self.client.force_login(self.user)
+        url = reverse(
+            "knowledge_base:create_post",
+            args=[self.category.slug, self.subcategory.id],
+        )
+        # Сессия, пользователь, категория и подкатегория.
+        with self.assertNumQueries(4):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+
+    def test_api_update_reads_post_once(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        url = f"/api/subcategories/{self.subcategory.id}/posts/{self.post.id}/"
+        # Пост и его сохранение в транзакции (точка сохранения в тестах).
+        with self.assertNumQueries(4):
+            response = client.patch(url, {"title": "Новый"}, format="json")
+        self.assertEqual(response.status_code, 200)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.title, "Новый")
+
+    def test_api_post_from_other_subcategory(self):
+        other = SubCategory.objects.create(name="ООП", category=self.category)
+        client = APIClient()
+        client.force_authenticate(self.user)
+        url = f"/api/subcategories/{other.id}/posts/{self.post.id}/"
+        response = client.patch(url, {"title": "Новый"}, format="json")
+        self.assertEqual(response.status_code, 404)
@@ -0,0 +1,169 @@
+from unittest import mock
+
+from django.db import DatabaseError
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from knowledge_base.likes import LikeBuffer
+from knowledge_base.models import Category, Post, SubCategory, User
+
+
+class LikeBufferTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="user", password="p")
+        self.other = User.objects.create_user(username="other", password="p")
+        category = Category.objects.create(name="Python", slug="python")
+        subcategory = SubCategory.objects.create(
+            name="Основы", category=category
+        )
+        self.posts = [
+            Post.objects.create(
+                title=f"Пост {i}",
+                content="Текст",
+                category=category,
+                subcategory=subcategory,
+                author=self.user,
+            )
+            for i in range(2)
+        ]
+        self.buffer = LikeBuffer(flush_interval=3600, flush_size=100)
+
+    def test_toggles_coalesced(self):
+        post = self.posts[0]
+        self.assertTrue(self.buffer.toggle(self.user, post.id))
+        self.assertFalse(self.buffer.toggle(self.user, post.id))
+        self.assertEqual(len(self.buffer), 0)
+        self.assertTrue(self.buffer.toggle(self.user, post.id))
+        self.assertEqual(len(self.buffer), 1)
+        self.assertFalse(post.likes.exists())
+
+    def test_merge_pending(self):
+        self.posts[1].toggle_like(self.other)
+        self.buffer.toggle(self.user, self.posts[0].id)
+        self.buffer.toggle(self.other, self.posts[1].id)
+        posts = self.buffer.merge(
+            list(Post.objects.with_liked(self.user).order_by("id")),
+            self.user,
+        )
+        self.assertEqual([post.like_count for post in posts], [1, 0])
+        self.assertEqual([post.liked for post in posts], [True, False])
+
+    def test_flush_in_bulk(self):
+        self.posts[1].toggle_like(self.other)
+        self.buffer.toggle(self.user, self.posts[0].id)
+        self.buffer.toggle(self.other, self.posts[0].id)
+        self.buffer.toggle(self.other, self.posts[1].id)
+        # Проверка постов и пользователей, пересчёт лайков постов и
+        # полученных лайков авторов.
+        with self.assertNumQueries(8):
+            self.assertEqual(self.buffer.flush(), 3)
+        self.assertEqual(len(self.buffer), 0)
+        self.assertEqual(
+            list(Post.objects.order_by("id").values_list("like_count")),
+            [(2,), (0,)],
+        )
+        self.assertTrue(self.posts[0].is_liked_by(self.user))
+        self.assertFalse(self.posts[1].is_liked_by(self.other))
+
+    def test_flush_on_size(self):
+        self.buffer.flush_size = 2
+        self.buffer.toggle(self.user, self.posts[0].id)
+        self.assertEqual(len(self.buffer), 1)
+        self.buffer.toggle(self.user, self.posts[1].id)
+        self.assertEqual(len(self.buffer), 0)
+        self.assertEqual(self.user.liked_posts.count(), 2)
+
+    def test_flush_on_interval(self):
+        self.buffer.toggle(self.user, self.posts[0].id)
+        self.buffer.flush_interval = 0
+        self.buffer.merge([], self.user)
+        self.assertEqual(len(self.buffer), 0)
+        self.assertTrue(self.posts[0].is_liked_by(self.user))
+
+    def test_deleted_post_skipped(self):
+        self.buffer.toggle(self.user, self.posts[0].id)
+        self.posts[0].delete()
+        self.assertEqual(self.buffer.flush(), 1)
+        self.assertFalse(self.user.liked_posts.exists())
+
+    def test_deleted_liker_skipped(self):
+        self.buffer.toggle(self.other, self.posts[0].id)
+        self.buffer.toggle(self.user, self.posts[1].id)
+        self.other.delete()
+        self.buffer.flush_interval = 0
+        self.buffer.merge([], self.user)
+        self.assertEqual(len(self.buffer), 0)
+        self.assertEqual(
+            list(Post.likes.through.objects.values_list("post_id")),
+            [(self.posts[1].id,)],
+        )
+
+    def test_flush_error_not_raised_on_read(self):
+        self.buffer.toggle(self.user, self.posts[0].id)
+        self.buffer.flush_interval = 0
+        with mock.patch.object(
+            Post.likes.through.objects,
+            "bulk_create",
+            side_effect=DatabaseError("нет соединения"),
+        ):
+            with self.assertLogs("knowledge_base.likes", "ERROR"):
+                self.buffer.merge([], self.user)
+        self.assertEqual(len(self.buffer), 1)
+        self.buffer.merge([], self.user)
+        self.assertTrue(self.posts[0].is_liked_by(self.user))
+
+
+class LikeBufferViewTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="user", password="p")
+        category = Category.objects.create(name="Python", slug="python")
+        subcategory = SubCategory.objects.create(
+            name="Основы", category=category
+        )
+        self.post = Post.objects.create(
+            title="Пост",
+            content="Текст",
+            category=category,
+            subcategory=subcategory,
+            author=self.user,
+        )
+        self.url = reverse(
+            "knowledge_base:post", args=[category.slug, subcategory.id]
+        )
+        self.client.force_login(self.user)
+
+    @override_settings(KNOWLEDGE_BASE_LIKE_BUFFER={"ENABLED": True})
+    def test_own_like_visible_before_flush(self):
+        buffer = LikeBuffer(flush_interval=3600, flush_size=100)
+        with mock.patch("knowledge_base.views.like_buffer", buffer):
+            self.client.get(
+                reverse("knowledge_base:like_post", args=[self.post.id])
+            )
+            self.assertFalse(self.post.likes.exists())
+            response = self.client.get(self.url)
+        self.assertContains(response, "post-like liked")
+        self.assertContains(response, "👍 1")
+        buffer.flush()
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.like_count, 1)
+
+    @override_settings(KNOWLEDGE_BASE_LIKE_BUFFER={"ENABLED": True})
+    def test_etag_same_across_buffers(self):
+        """ETag не зависит от того, какой процесс (буфер) ответил."""
+
+        def etag(buffer):
+            with mock.patch("knowledge_base.conditional.like_buffer", buffer):
+                return self.client.get(self.url)["ETag"]
+
+        first = LikeBuffer(flush_interval=3600, flush_size=100)
+        second = LikeBuffer(flush_interval=3600, flush_size=100)
+        clean = etag(first)
+        self.assertEqual(etag(second), clean)
+
+        first.toggle(self.user, self.post.id)
+        pending = etag(first)
+        self.assertNotEqual(pending, clean)
+        second.toggle(self.user, self.post.id)
+        second.toggle(self.user, self.post.id)
+        second.toggle(self.user, self.post.id)
+        self.assertEqual(etag(second), pending)
@@ -0,0 +1,63 @@
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from knowledge_base.middleware import QueryRecorder, fingerprint
+from knowledge_base.models import Category
+from knowledge_base.navigation import get_navigation
+
+
+class QueryRecorderTest(TestCase):
+    def test_counts_and_repeated_fingerprints(self):
+        Category.objects.create(name="Django", slug="django")
+        with QueryRecorder() as recorder:
+            for slug in ("django", "flask", "fastapi"):
+                Category.objects.filter(slug=slug).first()
+            Category.objects.count()
+        self.assertEqual(recorder.count, 4)
+        self.assertGreater(recorder.duration, 0)
+        [(sql, count)] = recorder.repeated(threshold=2)
+        self.assertEqual(count, 3)
+        self.assertIn("knowledge_base_category", sql)
+
+    def test_fingerprint_collapses_values(self):
+        self.assertEqual(
+            fingerprint("SELECT * FROM t WHERE id IN (%s, %s, %s) LIMIT 21"),
+            fingerprint("SELECT * FROM t WHERE id IN (%s) LIMIT 5"),
+        )
+        self.assertEqual(
+            fingerprint("SELECT 'a' WHERE x = 1"),
+            fingerprint("SELECT 'b' WHERE x = 2"),
+        )
+
+
+class QueryBudgetMiddlewareTest(TestCase):
+    def setUp(self):
+        # Дерево навигации строится один раз на версию содержимого.
+        get_navigation()
+
+    @override_settings(
+        KNOWLEDGE_BASE_QUERY_BUDGET={"ENABLED": True, "HEADERS": True}
+    )
+    def test_headers(self):
+        response = self.client.get(reverse("knowledge_base:main"))
+        self.assertEqual(response["X-DB-Query-Count"], "3")
+        self.assertIn("X-DB-Time-Ms", response)
+        self.assertEqual(response["X-DB-Repeated-Queries"], "0")
+
+    @override_settings(
+        KNOWLEDGE_BASE_QUERY_BUDGET={
+            "ENABLED": True,
+            "BUDGETS": {"knowledge_base:main": 1},
+        }
+    )
+    def test_over_budget_logged(self):
+        with self.assertLogs("knowledge_base.middleware", "WARNING") as logs:
+            response = self.client.get(reverse("knowledge_base:main"))
+        self.assertNotIn("X-DB-Query-Count", response)
+        self.assertIn("knowledge_base:main", logs.output[0])
+        self.assertIn("3 запросов", logs.output[0])
+
+    @override_settings(KNOWLEDGE_BASE_QUERY_BUDGET={"ENABLED": False})
+    def test_disabled(self):
+        response = self.client.get(reverse("knowledge_base:main"))
+        self.assertNotIn("X-DB-Query-Count", response)
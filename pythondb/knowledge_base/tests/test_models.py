@@ -2,6 +2,7 @@ from django.contrib.auth import get_user_model
 from django.test import TestCase
 
 from knowledge_base.models import Category, Post, SubCategory
+from knowledge_base.rendering import RENDERER_VERSION
 
 User = get_user_model()
 
@@ -107,3 +108,89 @@ class PostModelTest(TestCase):
 
         self.post.toggle_like(self.user)
         self.assertNotIn(self.user, self.post.likes.all())
+
+    def test_post_like_count(self):
+        """Проверка счётчика лайков при переключении и через `likes`."""
+        other = User.objects.create_user(username="other", password="p")
+        self.assertTrue(self.post.toggle_like(self.user))
+        self.assertTrue(self.post.toggle_like(other))
+        self.assertEqual(self.post.like_count, 2)
+        self.assertTrue(self.post.is_liked_by(self.user))
+
+        self.assertFalse(self.post.toggle_like(self.user))
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.like_count, 1)
+        self.assertFalse(self.post.is_liked_by(self.user))
+
+        self.post.likes.add(self.user)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.like_count, 2)
+        other.liked_posts.clear()
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.like_count, 1)
+
+    def test_like_count_after_liker_deleted(self):
+        """Лайки удалённого пользователя не остаются в счётчиках."""
+        liker = User.objects.create_user(username="liker", password="p")
+        other_post = Post.objects.create(
+            title="Другой пост",
+            content="Текст",
+            category=self.category,
+            subcategory=self.subcategory,
+            author=self.user,
+        )
+        other_post.likes.add(self.user)
+        self.post.toggle_like(liker)
+        liker.delete()
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.like_count, 0)
+        self.assertEqual(self.post.likes.count(), 0)
+        self.assertEqual(self.user.stats.likes_received, 1)
+
+    def test_clear_recounts_only_liked_posts(self):
+        """`user.liked_posts.clear()` пересчитывает только его посты."""
+        other_post = Post.objects.create(
+            title="Другой пост",
+            content="Текст",
+            category=self.category,
+            subcategory=self.subcategory,
+            author=self.user,
+        )
+        self.post.likes.add(self.user)
+        # Счётчик чужого поста не трогается: пересчёт его бы исправил.
+        Post.objects.filter(pk=other_post.pk).update(like_count=5)
+        self.user.liked_posts.clear()
+        self.post.refresh_from_db()
+        other_post.refresh_from_db()
+        self.assertEqual(self.post.like_count, 0)
+        self.assertEqual(other_post.like_count, 5)
+
+    def test_post_with_liked(self):
+        """Проверка отметки `liked` у постов текущего пользователя."""
+        self.post.toggle_like(self.user)
+        other = User.objects.create_user(username="other", password="p")
+        self.assertTrue(Post.objects.with_liked(self.user).get().liked)
+        self.assertFalse(Post.objects.with_liked(other).get().liked)
+
+    def test_post_rendered_on_save(self):
+        """Проверка сохранения HTML поста при сохранении."""
+        self.assertEqual(self.post.rendered_html, "<p>Test Content</p>\n")
+        self.assertEqual(self.post.renderer_version, RENDERER_VERSION)
+
+        self.post.content = "'''\nprint(1)\n'''"
+        self.post.save(update_fields=["content"])
+        self.post.refresh_from_db()
+        self.assertIn(
+            "<pre><code class='language-python'>print(1)</code></pre>",
+            self.post.rendered_html,
+        )
+
+    def test_post_excerpt_on_save(self):
+        """Проверка сохранения анонса поста при изменении текста."""
+        self.assertEqual(self.post.excerpt, "Test Content")
+
+        self.post.content = "<b>Жирный</b>\n\n" + "слово " * 100
+        self.post.save(update_fields=["content"])
+        self.post.refresh_from_db()
+        self.assertTrue(self.post.excerpt.startswith("Жирный слово"))
+        self.assertEqual(len(self.post.excerpt), 200)
@@ -0,0 +1,139 @@
+import pickle
+from unittest import mock
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from knowledge_base.checks import check_shared_caches
+from knowledge_base.middleware import QueryRecorder
+from knowledge_base.models import Category, Post, SubCategory, User
+from knowledge_base.navigation import (
+    NavigationCache,
+    build_navigation,
+    get_navigation,
+)
+from knowledge_base.versions import get_version
+
+
+class NavigationTreeTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="user", password="p")
+        self.python = Category.objects.create(name="Python", slug="python")
+        self.sql = Category.objects.create(name="SQL", slug="sql")
+        self.basics = SubCategory.objects.create(
+            name="Основы", category=self.python
+        )
+        self.orm = SubCategory.objects.create(name="ORM", category=self.python)
+        for i in range(3):
+            Post.objects.create(
+                title=f"Пост {i}",
+                content="Текст",
+                category=self.python,
+                subcategory=self.basics,
+                author=self.user,
+            )
+
+    def test_build(self):
+        with self.assertNumQueries(2):
+            tree = build_navigation(1)
+        python, sql = tree.categories
+        self.assertEqual((python.slug, python.post_count), ("python", 3))
+        self.assertEqual(
+            [(sub.name, sub.post_count) for sub in python.subcategories],
+            [("Основы", 3), ("ORM", 0)],
+        )
+        self.assertEqual(sql.subcategories, ())
+        self.assertEqual(tree.category("sql"), sql)
+        self.assertIsNone(tree.category("go"))
+        self.assertEqual(tree.subcategory(self.orm.id).name, "ORM")
+        self.assertEqual(
+            (len(tree), tree.subcategory_count, tree.post_count), (2, 2, 3)
+        )
+        with self.assertRaises(AttributeError):
+            python.name = "Go"
+
+    def test_pickle(self):
+        tree = build_navigation(1)
+        restored = pickle.loads(pickle.dumps(tree))
+        self.assertEqual(restored.categories, tree.categories)
+        self.assertEqual(restored.category("python"), tree.category("python"))
+
+    def test_rebuilt_after_write(self):
+        tree = get_navigation()
+        with self.assertNumQueries(0):
+            self.assertIs(get_navigation(), tree)
+        Post.objects.create(
+            title="Новый",
+            content="Текст",
+            category=self.python,
+            subcategory=self.orm,
+            author=self.user,
+        )
+        tree = get_navigation()
+        self.assertEqual(tree.subcategory(self.orm.id).post_count, 1)
+        self.assertEqual(tree.category("python").post_count, 4)
+
+    def test_shared_between_workers(self):
+        first = NavigationCache(cache_alias="default")
+        second = NavigationCache(cache_alias="default")
+        tree = first.get()
+        with self.assertNumQueries(0):
+            self.assertEqual(second.get().categories, tree.categories)
+        self.assertEqual((first.builds, second.builds), (1, 0))
+
+    def test_version_bumped_after_commit(self):
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            SubCategory.objects.create(name="Запросы", category=self.sql)
+            # Дерево, построенное до фиксации (как в другом процессе).
+            before_commit = get_navigation()
+        self.assertEqual(len(callbacks), 1)
+        self.assertNotEqual(get_version(), before_commit.version)
+        self.assertIsNot(get_navigation(), before_commit)
+
+    def test_local_tree_expires(self):
+        # Запись в другом воркере с кэшем версий в памяти процесса: версия
+        # здесь не меняется, но дерево всё равно перестраивается по времени.
+        navigation = NavigationCache(cache_alias="default", local_timeout=60)
+        with mock.patch(
+            "knowledge_base.navigation.get_version", return_value=1
+        ):
+            navigation.get()
+            sql = SubCategory.objects.create(name="Запросы", category=self.sql)
+            self.assertIsNone(navigation.get().subcategory(sql.id))
+            navigation._built_at -= 61
+            self.assertIsNotNone(navigation.get().subcategory(sql.id))
+        self.assertEqual(navigation.builds, 2)
+
+    def test_process_local_cache_check(self):
+        locmem = {
+            "default": {
+                "BACKEND": "django.core.cache.backends.locmem.LocMemCache"
+            }
+        }
+        redis = {
+            "default": {
+                "BACKEND": "django.core.cache.backends.redis.RedisCache",
+                "LOCATION": "redis://127.0.0.1:6379/0",
+            }
+        }
+        with override_settings(CACHES=locmem):
+            self.assertEqual(
+                [error.id for error in check_shared_caches(None)],
+                ["knowledge_base.W001", "knowledge_base.W001"],
+            )
+        with override_settings(CACHES=redis):
+            self.assertEqual(check_shared_caches(None), [])
+
+    def test_context_processor(self):
+        tree = get_navigation()
+        with QueryRecorder() as recorder:
+            response = self.client.get(reverse("gpt:chat"))
+        self.assertEqual(response.context["categories"], tree.categories)
+        self.assertContains(
+            response, reverse("knowledge_base:category", args=["sql"])
+        )
+        self.assertFalse(
+            any(
+                "knowledge_base_category" in sql for sql, _ in recorder.queries
+            )
+        )
@@ -0,0 +1,76 @@
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.test.client import RequestFactory
+from django.urls import reverse
+
+from knowledge_base.models import Category, User
+from knowledge_base.page_cache import make_key
+
+PAGE_CACHE = {
+    "ENABLED": True,
+    "CACHE_ALIAS": "default",
+    "LOCK_WAIT": 0.1,
+    "VIEWS": {"knowledge_base:main": {"TIMEOUT": 60, "STALE": 300}},
+}
+
+
+@override_settings(KNOWLEDGE_BASE_PAGE_CACHE=PAGE_CACHE)
+class AnonymousPageCacheTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.url = reverse("knowledge_base:main")
+        self.lock_key = make_key(RequestFactory().get(self.url)) + ":lock"
+
+    def test_hit_after_miss(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response["X-Page-Cache"], "MISS")
+        with self.assertNumQueries(0):
+            cached = self.client.get(self.url)
+        self.assertEqual(cached["X-Page-Cache"], "HIT")
+        self.assertEqual(cached.content, response.content)
+        self.assertEqual(cached["Content-Type"], response["Content-Type"])
+
+    def test_hit_sets_visitor_csrf_cookie(self):
+        self.client.get(self.url)
+        self.client.cookies.clear()
+        response = self.client.get(self.url)
+        self.assertEqual(response["X-Page-Cache"], "HIT")
+        self.assertIn("csrftoken", response.cookies)
+
+    def test_authenticated_bypass(self):
+        user = User.objects.create_user(username="user", password="p")
+        self.client.force_login(user)
+        response = self.client.get(self.url)
+        self.assertEqual(response["X-Page-Cache"], "BYPASS")
+        self.assertIsNone(cache.get(make_key(response.wsgi_request)))
+
+    def test_stale_while_revalidating(self):
+        self.client.get(self.url)
+        Category.objects.create(name="Rust", slug="rust")
+        link = reverse("knowledge_base:category", args=["rust"]).encode()
+        # Страницу новой версии уже перестраивает другой запрос.
+        cache.add(self.lock_key, 1)
+        response = self.client.get(self.url)
+        self.assertEqual(response["X-Page-Cache"], "STALE")
+        self.assertNotIn(link, response.content)
+
+        cache.delete(self.lock_key)
+        response = self.client.get(self.url)
+        self.assertEqual(response["X-Page-Cache"], "MISS")
+        self.assertIn(link, response.content)
+        self.assertEqual(self.client.get(self.url)["X-Page-Cache"], "HIT")
+
+    def test_waits_for_lock_holder(self):
+        cache.add(self.lock_key, 1)
+        response = self.client.get(self.url)
+        # Держатель блокировки не успел: страница отрендерена без неё,
+        # а чужая блокировка осталась на месте.
+        self.assertEqual(response["X-Page-Cache"], "MISS")
+        self.assertEqual(cache.get(self.lock_key), 1)
+
+    def test_view_not_configured(self):
+        category = Category.objects.create(name="Python", slug="python")
+        response = self.client.get(
+            reverse("knowledge_base:category", args=[category.slug])
+        )
+        self.assertNotIn("X-Page-Cache", response)
@@ -0,0 +1,80 @@
+from django.test import TestCase
+
+from knowledge_base.models import Category
+from knowledge_base.pagination import (
+    capped_count,
+    cursor_before,
+    cursor_values,
+    decode_cursor,
+    encode_cursor,
+    keyset_page,
+)
+
+
+class KeysetPaginationTest(TestCase):
+    def setUp(self):
+        Category.objects.bulk_create(
+            Category(
+                name=f"Категория {i}", slug=f"c{i}", description=str(i % 3)
+            )
+            for i in range(25)
+        )
+
+    def test_cursor_round_trip(self):
+        cursor = encode_cursor(["2025-01-01 10:00:00+00:00", 1.5, 7])
+        self.assertEqual(
+            decode_cursor(cursor), ["2025-01-01 10:00:00+00:00", 1.5, 7]
+        )
+        self.assertIsNone(decode_cursor("не курсор"))
+        self.assertIsNone(decode_cursor(""))
+
+    def test_cursor_values(self):
+        ordering = ("description", "-id")
+        self.assertEqual(
+            cursor_values(Category, ordering, encode_cursor(["1", "7"])),
+            ["1", 7],
+        )
+        for values in (["1", "x"], ["1", {"a": 1}], ["1", None], ["1"]):
+            with self.subTest(values=values):
+                cursor = encode_cursor(values)
+                self.assertIsNone(cursor_values(Category, ordering, cursor))
+                rows, _ = keyset_page(
+                    Category.objects.all(), ordering, cursor, page_size=3
+                )
+                self.assertEqual(
+                    rows, list(Category.objects.order_by(*ordering)[:3])
+                )
+
+    def test_pages_cover_all_rows_once(self):
+        ordering = ("description", "-id")
+        seen, cursor = [], None
+        while True:
+            rows, cursor = keyset_page(
+                Category.objects.all(), ordering, cursor, page_size=10
+            )
+            seen.extend(rows)
+            if cursor is None:
+                break
+        self.assertEqual(seen, list(Category.objects.order_by(*ordering)))
+
+    def test_page_query_count_does_not_depend_on_position(self):
+        _, cursor = keyset_page(Category.objects.all(), ("id",), None, 10)
+        with self.assertNumQueries(1):
+            rows, _ = keyset_page(Category.objects.all(), ("id",), cursor, 10)
+        self.assertEqual(len(rows), 10)
+
+    def test_capped_count(self):
+        self.assertEqual(capped_count(Category.objects.all(), 10), (10, True))
+        self.assertEqual(capped_count(Category.objects.all(), 25), (25, False))
+
+    def test_cursor_before_starts_page_at_row(self):
+        ordering = ("description", "-id")
+        rows = list(Category.objects.order_by(*ordering))
+        target = rows[13]
+        cursor = cursor_before(Category.objects.all(), ordering, target.pk)
+        page, _ = keyset_page(Category.objects.all(), ordering, cursor, 5)
+        self.assertEqual(page, rows[13:18])
+        self.assertIsNone(
+            cursor_before(Category.objects.all(), ordering, rows[0].pk)
+        )
+        self.assertIsNone(cursor_before(Category.objects.all(), ordering, 0))
@@ -0,0 +1,118 @@
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from data import POSTS_PAGE_SIZE
+from knowledge_base.models import Category, Post, SubCategory, User
+from knowledge_base.navigation import get_navigation
+from knowledge_base.search.cache import search_cache
+from knowledge_base.testing import QueryBudgetMixin
+
+
+class ViewQueryBudgetTest(QueryBudgetMixin, TestCase):
+    """Количество запросов вьюх не должно зависеть от объёма данных."""
+
+    def setUp(self):
+        self.client = Client()
+        self.created = 0
+
+    def add_posts(self, count):
+        for i in range(self.created, self.created + count):
+            user = User.objects.create_user(username=f"user{i}", password="p")
+            category = Category.objects.create(
+                name=f"Категория {i}", slug=f"category-{i}"
+            )
+            subcategory = SubCategory.objects.create(
+                name=f"Подкатегория {i}", category=category
+            )
+            Post.objects.create(
+                title=f"Пост {i}",
+                content="Текст",
+                category=category,
+                subcategory=subcategory,
+                author=user,
+            )
+        self.created += count
+
+    def assertViewBudget(self, url, max_queries):
+        for count in (1, 30):
+            self.add_posts(count)
+            with self.subTest(posts=self.created):
+                with self.assertQueryBudget(max_queries, max_repeats=1):
+                    response = self.client.get(url)
+                self.assertEqual(response.status_code, 200)
+
+    def test_main(self):
+        # Вместе с перестроением дерева навигации после записи постов.
+        self.assertViewBudget(reverse("knowledge_base:main"), 5)
+
+    def test_category_flat_in_subcategory_count(self):
+        """Число запросов не зависит от числа подкатегорий (1 и 500)."""
+        user = User.objects.create_user(username="author", password="p")
+        category = Category.objects.create(name="Python", slug="python")
+        url = reverse("knowledge_base:category", args=[category.slug])
+        counts = []
+        created = 0
+        for total in (1, 500):
+            subcategories = SubCategory.objects.bulk_create(
+                SubCategory(name=f"Подкатегория {i}", category=category)
+                for i in range(created, total)
+            )
+            created = total
+            Post.objects.bulk_create(
+                Post(
+                    title=f"Пост {i}",
+                    content="Текст",
+                    category=category,
+                    subcategory=subcategory,
+                    author=user,
+                )
+                for subcategory in subcategories
+                for i in range(7)
+            )
+            get_navigation()
+            # Из них 1 — состояние страницы для ETag (`category_page_state`).
+            with self.assertQueryBudget(4, max_repeats=1) as recorder:
+                response = self.client.get(url)
+            self.assertEqual(len(response.context["subcategories"]), total)
+            counts.append(recorder.count)
+        self.assertEqual(counts[0], counts[1])
+
+    def test_post_flat_in_post_count(self):
+        """Лайки и авторы постов не запрашиваются для каждого поста."""
+        user = User.objects.create_user(username="author", password="p")
+        category = Category.objects.create(name="Python", slug="python")
+        subcategory = SubCategory.objects.create(
+            name="Основы", category=category
+        )
+        url = reverse(
+            "knowledge_base:post", args=[category.slug, subcategory.id]
+        )
+        self.client.force_login(user)
+        counts = []
+        created = 0
+        for total in (1, 30):
+            for i in range(created, total):
+                author = User.objects.create_user(
+                    username=f"user{i}", password="p"
+                )
+                post = Post.objects.create(
+                    title=f"Пост {i}",
+                    content="Текст",
+                    category=category,
+                    subcategory=subcategory,
+                    author=author,
+                )
+                post.toggle_like(user)
+            created = total
+            # Из них 2 — состояние страницы для ETag (`post_page_state`).
+            with self.assertQueryBudget(9, max_repeats=1) as recorder:
+                response = self.client.get(url)
+            self.assertContains(
+                response, "👍 1", count=min(total, POSTS_PAGE_SIZE)
+            )
+            counts.append(recorder.count)
+        self.assertEqual(counts[0], counts[1])
+
+    def test_search(self):
+        search_cache.clear()
+        self.assertViewBudget(reverse("knowledge_base:search") + "?q=пост", 7)
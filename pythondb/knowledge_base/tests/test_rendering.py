@@ -0,0 +1,134 @@
+import json
+import random
+from pathlib import Path
+
+from django.core.cache import caches
+from django.test import SimpleTestCase, override_settings
+
+from knowledge_base.rendering import (
+    RenderCache,
+    prepare_post_markdown,
+    prepare_post_markdown_regex,
+    render_category_description,
+    render_chat_reply,
+    render_post_content,
+)
+
+FIXTURE = Path(__file__).resolve().parent.parent / "fixtures/sample_data.json"
+
+
+class RendererTest(SimpleTestCase):
+    def test_render_post_content_escapes_tags(self):
+        html = render_post_content("<script>alert(1)</script>")
+        self.assertNotIn("<script>", html)
+        self.assertIn("&lt;script&gt;", html)
+
+    def test_render_category_description_code_block(self):
+        html = render_category_description("'''print(1)'''")
+        self.assertIn(
+            '<pre><code class="language-python">print(1)</code></pre>', html
+        )
+
+    def test_render_chat_reply_code_block(self):
+        html = render_chat_reply("```js\nlet a = 1;\n```")
+        self.assertIn(
+            "<pre><code class='language-js'>let a = 1;</code></pre>", html
+        )
+
+
+class SinglePassRendererTest(SimpleTestCase):
+    """Однопроходная подготовка совпадает с цепочкой регулярок."""
+
+    CASES = (
+        "",
+        "   Test Content   ",
+        "'''\nprint(1)\n'''",
+        "'''js let a = 1; ''' и '''python\nx = 1\n'''",
+        "'''без закрытия",
+        "a < b и c > d",
+        "<<<<<<<< без закрывающей скобки",
+        "<pre>код</pre> и <code>x</code> и <precious>",
+        "a < b '''x'''",
+        "'''\nif a<b:\n    pass\n'''",
+        "<div\nclass='x'>",
+        "''''''",
+        "'''''''",
+    )
+
+    def assertSameAsRegex(self, content):
+        self.assertEqual(
+            prepare_post_markdown(content),
+            prepare_post_markdown_regex(content),
+            repr(content),
+        )
+
+    def test_cases(self):
+        for content in self.CASES:
+            self.assertSameAsRegex(content)
+
+    def test_fixture_posts(self):
+        for item in json.loads(FIXTURE.read_text(encoding="utf-8")):
+            if item["model"] == "knowledge_base.post":
+                self.assertSameAsRegex(item["fields"]["content"])
+
+    def test_random_inputs(self):
+        tokens = ("<", ">", "'", "'''", "\n", " ", "pre", "code", "/", "x")
+        rnd = random.Random(0)
+        for _ in range(2000):
+            self.assertSameAsRegex(
+                "".join(rnd.choice(tokens) for _ in range(rnd.randint(0, 20)))
+            )
+
+
+@override_settings(
+    CACHES={
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "LOCATION": "render-cache-tests",
+        }
+    }
+)
+class RenderCacheTest(SimpleTestCase):
+    def setUp(self):
+        self.calls = 0
+
+    def render(self):
+        self.calls += 1
+        return f"<p>{self.calls}</p>"
+
+    def test_key_depends_on_text_and_options(self):
+        key = RenderCache.make_key("post", (1,), "text")
+        self.assertEqual(key, RenderCache.make_key("post", (1,), "text"))
+        self.assertNotEqual(key, RenderCache.make_key("post", (2,), "text"))
+        self.assertNotEqual(key, RenderCache.make_key("chat", (1,), "text"))
+        self.assertNotEqual(key, RenderCache.make_key("post", (1,), "other"))
+
+    def test_hits_and_misses(self):
+        cache = RenderCache(maxsize=2)
+        self.assertEqual(cache.get_or_render("a", self.render), "<p>1</p>")
+        self.assertEqual(cache.get_or_render("a", self.render), "<p>1</p>")
+        self.assertEqual(self.calls, 1)
+        stats = cache.stats()
+        self.assertEqual(stats["hits"], 1)
+        self.assertEqual(stats["misses"], 1)
+        self.assertEqual(stats["hit_ratio"], 0.5)
+
+    def test_lru_eviction(self):
+        cache = RenderCache(maxsize=2)
+        cache.get_or_render("a", self.render)
+        cache.get_or_render("b", self.render)
+        cache.get_or_render("a", self.render)
+        cache.get_or_render("c", self.render)
+        self.assertEqual(cache.stats()["evictions"], 1)
+        cache.get_or_render("a", self.render)
+        cache.get_or_render("b", self.render)
+        self.assertEqual(self.calls, 4)
+
+    def test_shared_cache_tier(self):
+        caches["default"].clear()
+        first = RenderCache(maxsize=2, cache_alias="default")
+        second = RenderCache(maxsize=2, cache_alias="default")
+        first.get_or_render("a", self.render)
+        self.assertEqual(second.get_or_render("a", self.render), "<p>1</p>")
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(second.stats()["shared_hits"], 1)
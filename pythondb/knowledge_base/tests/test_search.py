@@ -0,0 +1,383 @@
+import tempfile
+from datetime import timedelta
+from pathlib import Path
+from unittest import mock, skipUnless
+
+from django.contrib.auth import get_user_model
+from django.db import DatabaseError, connection
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from knowledge_base.models import Category, Post, SubCategory
+from knowledge_base.search import get_search_backend
+from knowledge_base.search.backends import (
+    DatabaseSearchBackend,
+    IndexSearchBackend,
+    PostgresSearchBackend,
+)
+from knowledge_base.search.index import (
+    InvertedIndex,
+    build_index,
+    get_index,
+    post_fields,
+    reset_index,
+    sync_index,
+)
+from knowledge_base.search.cache import SearchResultCache, normalize_terms
+from knowledge_base.search import suggest, warm_up
+from knowledge_base.search.suggest import (
+    SuggestSection,
+    build_suggest_index,
+    get_suggest_index,
+    loaded_suggest_index,
+    reset_suggest_index,
+    sync_suggest_index,
+)
+from knowledge_base.versions import bump_version
+
+User = get_user_model()
+
+
+class SearchBackendTestMixin:
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="testuser", password="testpass"
+        )
+        self.category = Category.objects.create(
+            name="Django",
+            slug="django",
+            description="Фреймворк для веб-разработки",
+        )
+        self.subcategory = SubCategory.objects.create(
+            name="Декораторы", category=self.category
+        )
+        self.post = Post.objects.create(
+            title="Декоратор login_required",
+            content="Декоратор проверяет, что пользователь авторизован.",
+            category=self.category,
+            subcategory=self.subcategory,
+            author=self.user,
+        )
+        self.other_post = Post.objects.create(
+            title="Модели",
+            content="Модели описывают таблицы базы данных.",
+            category=self.category,
+            subcategory=self.subcategory,
+            author=self.user,
+        )
+
+
+class DatabaseSearchBackendTest(SearchBackendTestMixin, TestCase):
+    def test_search_matches_any_term(self):
+        results = DatabaseSearchBackend().search(["проверяет", "таблицы"])
+        self.assertEqual(set(results["posts"]), {self.post, self.other_post})
+
+    def test_search_sections(self):
+        results = DatabaseSearchBackend().search(["django"])
+        self.assertEqual(list(results["categories"]), [self.category])
+        self.assertEqual(list(results["subcategories"]), [])
+        self.assertEqual(list(results["posts"]), [])
+
+
+@skipUnless(connection.vendor == "postgresql", "Требуется PostgreSQL")
+class PostgresSearchBackendTest(SearchBackendTestMixin, TestCase):
+    def test_search_uses_stemming_and_ranking(self):
+        results = PostgresSearchBackend().search(["декораторы"])
+        posts = list(results["posts"])
+        self.assertEqual(posts, [self.post])
+        self.assertGreater(posts[0].rank, 0)
+
+    def test_search_vector_maintained_by_trigger(self):
+        Post.objects.filter(id=self.other_post.id).update(
+            title="Декоратор cache_page"
+        )
+        results = PostgresSearchBackend().search(["декоратор"])
+        self.assertEqual(set(results["posts"]), {self.post, self.other_post})
+
+
+class InvertedIndexTest(TestCase):
+    def setUp(self):
+        self.index = InvertedIndex()
+        self.index.add_document(
+            1, post_fields("Декоратор", "Обёртка функции.", "Функции", "")
+        )
+        self.index.add_document(
+            2,
+            post_fields(
+                "Модели", "Декоратор можно повесить и на метод.", "ORM", ""
+            ),
+        )
+        self.index.add_document(
+            3, post_fields("Генераторы", "yield и next.", "Функции", "")
+        )
+
+    def test_bm25_ranks_title_match_first(self):
+        self.assertEqual(
+            [post_id for post_id, _ in self.index.search(["декоратор"])],
+            [1, 2],
+        )
+
+    def test_prefix_match(self):
+        self.assertEqual(
+            [post_id for post_id, _ in self.index.search(["генер"])], [3]
+        )
+
+    def test_replace_and_remove_document(self):
+        self.index.add_document(3, post_fields("Итераторы", "", "", ""))
+        self.index.remove_document(1)
+        self.assertEqual(self.index.search(["генераторы"]), [])
+        self.assertEqual(
+            [post_id for post_id, _ in self.index.search(["декоратор"])], [2]
+        )
+        self.assertEqual(sorted(self.index.post_ids()), [2, 3])
+
+    def test_snapshot_round_trip(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory) / "index.bin"
+            self.index.save(path)
+            loaded = InvertedIndex.load(path)
+            self.assertEqual(
+                loaded.search(["декоратор"]), self.index.search(["декоратор"])
+            )
+            loaded.add_document(4, post_fields("Декоратор", "", "", ""))
+            self.assertEqual(loaded.search(["декоратор"])[0][0], 4)
+            del loaded
+
+
+@override_settings(
+    KNOWLEDGE_BASE_SEARCH={"BACKEND": "index", "INDEX_PATH": None}
+)
+class IndexSearchBackendTest(SearchBackendTestMixin, TestCase):
+    def setUp(self):
+        reset_index()
+        self.addCleanup(reset_index)
+        super().setUp()
+
+    def test_search_ranks_posts(self):
+        results = get_search_backend().search(["авторизован"])
+        self.assertEqual(list(results["posts"]), [self.post])
+        self.assertEqual(list(results["subcategories"]), [])
+
+    def test_index_follows_post_signals(self):
+        get_index()
+        self.other_post.title = "Декоратор cache_page"
+        self.other_post.save()
+        self.post.delete()
+        results = IndexSearchBackend().search(["декоратор"])
+        self.assertEqual(list(results["posts"]), [self.other_post])
+
+    def test_index_follows_subcategory_rename(self):
+        get_index()
+        self.subcategory.name = "Шаблоны"
+        self.subcategory.save()
+        results = IndexSearchBackend().search(["шаблоны"])
+        self.assertEqual(set(results["posts"]), {self.post, self.other_post})
+
+    def test_sync_catches_delete_with_unchanged_count(self):
+        # Индекс другого процесса: сигналы этого его не обновляют.
+        index = build_index()
+        self.post.delete()
+        newer = Post.objects.create(
+            title="Новый пост",
+            content="Текст",
+            category=self.category,
+            subcategory=self.subcategory,
+            author=self.user,
+        )
+        # Транзакция зафиксирована позже запаса `SYNC_OVERLAP`: пост
+        # не попадает в догоняющую выборку, и количество постов в
+        # индексе совпадает с базой.
+        Post.objects.filter(pk=newer.pk).update(
+            updated_at=index.high_water - timedelta(hours=1)
+        )
+        sync_index(index)
+        self.assertEqual(
+            sorted(index.post_ids()), [self.other_post.id, newer.id]
+        )
+
+    def test_sync_catches_rename_in_other_process(self):
+        # Посты переименованной подкатегории давно не менялись и не
+        # попадают в догоняющую выборку по `updated_at`.
+        Post.objects.update(updated_at=timezone.now() - timedelta(hours=1))
+        Post.objects.create(
+            title="Свежий пост",
+            content="Текст",
+            category=self.category,
+            subcategory=SubCategory.objects.create(
+                name="Другая", category=self.category
+            ),
+            author=self.user,
+        )
+        index = build_index()
+        self.subcategory.name = "Шаблоны"
+        self.subcategory.save()
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory) / "index.bin"
+            index.save(path)
+            loaded = InvertedIndex.load(path)
+            sync_index(loaded)
+            self.assertEqual(
+                {post_id for post_id, _ in loaded.search(["шаблоны"])},
+                {self.post.id, self.other_post.id},
+            )
+            del loaded
+
+    def test_build_index_matches_database(self):
+        self.assertEqual(
+            sorted(build_index().post_ids()),
+            [self.post.id, self.other_post.id],
+        )
+
+
+class SuggestSectionTest(TestCase):
+    def setUp(self):
+        self.section = SuggestSection()
+        self.section.add(1, "Декоратор login_required")
+        self.section.add(2, "Как написать декоратор")
+        self.section.add(3, "Генераторы и итераторы")
+
+    def titles(self, query):
+        return [
+            self.section.entry(num)[1]
+            for _, num in sorted(self.section.search(query.split()))
+        ]
+
+    def test_prefix_match_ranks_title_start_first(self):
+        self.assertEqual(
+            self.titles("декор"),
+            ["Декоратор login_required", "Как написать декоратор"],
+        )
+
+    def test_all_words_must_match(self):
+        self.assertEqual(
+            self.titles("написать декор"), ["Как написать декоратор"]
+        )
+
+    def test_trigram_match_for_typo(self):
+        self.assertEqual(self.titles("генреаторы"), ["Генераторы и итераторы"])
+        self.assertEqual(self.titles("итераторв"), ["Генераторы и итераторы"])
+        self.assertEqual(self.titles("xyzzy"), [])
+
+    def test_replace_remove_and_compact(self):
+        self.section.add(1, "Менеджер контекста")
+        self.section.remove(3)
+        self.section.compact()
+        self.assertEqual(self.titles("декор"), ["Как написать декоратор"])
+        self.assertEqual(self.titles("менедж"), ["Менеджер контекста"])
+        self.assertEqual(self.titles("генер"), [])
+        self.assertEqual(len(self.section), 2)
+
+
+class SuggestIndexSyncTest(SearchBackendTestMixin, TestCase):
+    def setUp(self):
+        reset_suggest_index()
+        self.addCleanup(reset_suggest_index)
+        super().setUp()
+
+    def test_warm_up(self):
+        with self.settings(KNOWLEDGE_BASE_SEARCH={"WARM_UP": False}):
+            warm_up()
+        self.assertIsNone(loaded_suggest_index())
+        warm_up()
+        self.assertIsNotNone(loaded_suggest_index())
+        # Без базы индекс построится при первом запросе.
+        reset_suggest_index()
+        with mock.patch.object(
+            suggest, "build_suggest_index", side_effect=DatabaseError
+        ):
+            with self.assertLogs("knowledge_base.search", "ERROR"):
+                warm_up()
+        self.assertIsNone(loaded_suggest_index())
+
+    @override_settings(KNOWLEDGE_BASE_SEARCH={"INDEX_SYNC_INTERVAL": 0})
+    def test_sync_outside_request(self):
+        index = get_suggest_index()
+        with mock.patch.object(suggest.threading, "Thread") as thread:
+            with self.assertNumQueries(0):
+                self.assertIs(get_suggest_index(), index)
+        thread.assert_called_once()
+        self.assertEqual(thread.call_args.kwargs["args"], (index,))
+        thread.return_value.start.assert_called_once_with()
+
+    def test_sync_error_logged(self):
+        with mock.patch.object(
+            suggest, "sync_suggest_index", side_effect=DatabaseError
+        ), mock.patch.object(suggest, "connection") as thread_connection:
+            with self.assertLogs("knowledge_base.search.suggest", "ERROR"):
+                suggest._sync_in_background(build_suggest_index())
+        thread_connection.close.assert_called_once_with()
+
+    def test_sync_catches_delete_with_unchanged_count(self):
+        index = build_suggest_index()
+        self.post.delete()
+        newer = Post.objects.create(
+            title="Новый пост",
+            content="Текст",
+            category=self.category,
+            subcategory=self.subcategory,
+            author=self.user,
+        )
+        Post.objects.filter(pk=newer.pk).update(
+            updated_at=index.high_water - timedelta(hours=1)
+        )
+        sync_suggest_index(index)
+        self.assertEqual(
+            sorted(index.posts._nums), [self.other_post.id, newer.id]
+        )
+
+
+class SearchResultCacheTest(TestCase):
+    def setUp(self):
+        self.cache = SearchResultCache(maxsize=2, timeout=60)
+        self.calls = 0
+
+    def search(self):
+        self.calls += 1
+        return {"posts": [self.calls]}
+
+    def test_normalize_terms(self):
+        self.assertEqual(
+            normalize_terms("ORM  django orm Django"), ("django", "orm")
+        )
+
+    def test_hit_and_stats(self):
+        self.cache.get_or_search("db", ("orm",), self.search)
+        result = self.cache.get_or_search("db", ("orm",), self.search)
+        self.assertEqual(result, {"posts": [1]})
+        stats = self.cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"]), (1, 1))
+        self.assertEqual(stats["hit_ratio"], 0.5)
+        self.assertGreaterEqual(stats["saved_seconds"], 0)
+
+    def test_version_bump_invalidates(self):
+        self.cache.get_or_search("db", ("orm",), self.search)
+        bump_version()
+        result = self.cache.get_or_search("db", ("orm",), self.search)
+        self.assertEqual(result, {"posts": [2]})
+
+    def test_ttl_and_size_bounds(self):
+        with mock.patch("time.monotonic", return_value=1000.0):
+            self.cache.get_or_search("db", ("a",), self.search)
+        with mock.patch("time.monotonic", return_value=1061.0):
+            self.cache.get_or_search("db", ("a",), self.search)
+        self.assertEqual(self.cache.stats()["expirations"], 1)
+
+        self.cache.get_or_search("db", ("b",), self.search)
+        self.cache.get_or_search("db", ("c",), self.search)
+        stats = self.cache.stats()
+        self.assertEqual((stats["size"], stats["evictions"]), (2, 1))
+
+
+class GetSearchBackendTest(TestCase):
+    @override_settings(KNOWLEDGE_BASE_SEARCH={"BACKEND": "database"})
+    def test_backend_from_settings(self):
+        self.assertIsInstance(get_search_backend(), DatabaseSearchBackend)
+
+    @override_settings(KNOWLEDGE_BASE_SEARCH={"BACKEND": "auto"})
+    def test_auto_backend_matches_database_vendor(self):
+        expected = (
+            PostgresSearchBackend
+            if connection.vendor == "postgresql"
+            else DatabaseSearchBackend
+        )
+        self.assertIsInstance(get_search_backend(), expected)
@@ -0,0 +1,184 @@
+from io import StringIO
+
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+from django.urls import reverse
+
+from knowledge_base.models import (
+    Category,
+    Post,
+    SiteCounter,
+    SubCategory,
+    User,
+    UserStats,
+)
+from knowledge_base.navigation import get_navigation
+from knowledge_base.stats import reconcile_stats
+
+
+class SiteStatsTest(TestCase):
+    def setUp(self):
+        self.alice = User.objects.create_user(username="alice", password="p")
+        self.bob = User.objects.create_user(username="bob", password="p")
+        self.category = Category.objects.create(name="Python", slug="python")
+        self.subcategory = SubCategory.objects.create(
+            name="Основы", category=self.category
+        )
+        self.posts = [
+            self.create_post(author)
+            for author in (self.alice, self.alice, self.bob)
+        ]
+
+    def create_post(self, author):
+        return Post.objects.create(
+            title="Пост",
+            content="Текст",
+            category=self.category,
+            subcategory=self.subcategory,
+            author=author,
+        )
+
+    def user_counts(self):
+        return dict(UserStats.objects.values_list("user_id", "post_count"))
+
+    def test_counters_follow_writes(self):
+        self.assertEqual(
+            SiteCounter.values(),
+            {"categories": 1, "subcategories": 1, "posts": 3},
+        )
+        self.assertEqual(
+            self.user_counts(), {self.alice.id: 2, self.bob.id: 1}
+        )
+        self.posts[0].save()
+        self.posts[2].delete()
+        self.assertEqual(SiteCounter.values()["posts"], 2)
+        self.assertEqual(
+            self.user_counts(), {self.alice.id: 2, self.bob.id: 0}
+        )
+        # Каскадное удаление тоже проходит через сигналы.
+        self.category.delete()
+        self.assertEqual(
+            SiteCounter.values(),
+            {"categories": 0, "subcategories": 0, "posts": 0},
+        )
+        self.assertEqual(
+            self.user_counts(), {self.alice.id: 0, self.bob.id: 0}
+        )
+
+    def test_reconcile_repairs_drift(self):
+        self.assertEqual(reconcile_stats(), [])
+        Post.objects.bulk_create(
+            [
+                Post(
+                    title="Пост",
+                    content="Текст",
+                    category=self.category,
+                    subcategory=self.subcategory,
+                    author=self.bob,
+                )
+            ]
+        )
+        SiteCounter.objects.filter(name="categories").delete()
+        bob_last = Post.objects.filter(author=self.bob).latest("created_at")
+        self.assertEqual(
+            sorted(reconcile_stats(fix=False)),
+            [
+                ("categories", None, 1),
+                ("posts", 3, 4),
+                (
+                    f"user:{self.bob.id}:last_post_at",
+                    self.posts[2].created_at,
+                    bob_last.created_at,
+                ),
+                (f"user:{self.bob.id}:post_count", 1, 2),
+            ],
+        )
+        self.assertEqual(len(reconcile_stats()), 4)
+        self.assertEqual(reconcile_stats(fix=False), [])
+        self.assertEqual(self.user_counts()[self.bob.id], 2)
+
+    def test_reconcile_repairs_like_counts(self):
+        post = self.posts[2]
+        post.likes.add(self.alice)
+        # Лайк удалён в обход ORM, как каскадом без сигналов.
+        Post.likes.through.objects.filter(post=post).delete()
+        self.assertEqual(
+            reconcile_stats(fix=False),
+            [
+                (f"post:{post.id}:like_count", 1, 0),
+                (f"user:{self.bob.id}:likes_received", 1, 0),
+            ],
+        )
+        self.assertEqual(len(reconcile_stats()), 2)
+        self.assertEqual(reconcile_stats(fix=False), [])
+        post.refresh_from_db()
+        self.assertEqual(post.like_count, 0)
+        self.assertEqual(self.author_stats(self.bob)[1], 0)
+
+    def test_command(self):
+        UserStats.objects.all().delete()
+        with self.assertRaises(CommandError):
+            call_command("reconcile_stats", "--check", stdout=StringIO())
+        out = StringIO()
+        call_command("reconcile_stats", stdout=out)
+        # Число постов и время последнего поста у обоих авторов.
+        self.assertIn("Исправлено расхождений: 4", out.getvalue())
+        self.assertEqual(
+            self.user_counts(), {self.alice.id: 2, self.bob.id: 1}
+        )
+
+    def author_stats(self, user):
+        return UserStats.objects.values_list(
+            "post_count", "likes_received", "last_post_at"
+        ).get(user=user)
+
+    def test_author_stats_follow_posts_and_likes(self):
+        first, second, _ = self.posts
+        self.assertEqual(
+            self.author_stats(self.alice), (2, 0, second.created_at)
+        )
+        first.toggle_like(self.bob)
+        second.toggle_like(self.bob)
+        second.toggle_like(self.alice)
+        self.assertEqual(self.author_stats(self.alice)[1], 3)
+        first.toggle_like(self.bob)
+        self.assertEqual(self.author_stats(self.alice)[1], 2)
+
+        second.delete()
+        self.assertEqual(
+            self.author_stats(self.alice), (1, 0, first.created_at)
+        )
+        first.delete()
+        self.assertEqual(self.author_stats(self.alice), (0, 0, None))
+        self.assertEqual(reconcile_stats(fix=False), [])
+
+    def test_likes_received_after_bulk_recount(self):
+        self.posts[2].likes.add(self.alice, self.bob)
+        self.assertEqual(self.author_stats(self.bob)[1], 2)
+        self.alice.liked_posts.clear()
+        self.assertEqual(self.author_stats(self.bob)[1], 1)
+
+    def test_profile_does_not_count_posts(self):
+        self.client.force_login(self.bob)
+        get_navigation()
+        url = reverse("users:profile", args=[self.alice.id])
+        # Сессия, пользователь, профиль со статистикой и страница постов.
+        with self.assertNumQueries(4):
+            response = self.client.get(url)
+        self.assertEqual(response.context["count"], 2)
+        self.assertEqual(response.context["posts"].paginator.num_pages, 1)
+
+    def test_main_reads_precomputed_rows(self):
+        get_navigation()
+        # Счётчики, последние посты и топ пользователей.
+        with self.assertNumQueries(3):
+            response = self.client.get(reverse("knowledge_base:main"))
+            list(response.context["top_users"])
+        self.assertEqual(
+            [
+                (user.username, user.post_count)
+                for user in response.context["top_users"]
+            ],
+            [("alice", 2), ("bob", 1)],
+        )
+        self.assertEqual(response.context["total_posts"], 3)
@@ -87,3 +87,27 @@ class KnowledgeBaseURLTests(TestCase):
         )
         response = self.user_client.post(url)
         self.assertEqual(response.status_code, 302)
+
+    def test_render_cache_stats_page(self):
+        """Статистика кэша рендеринга доступна только сотрудникам."""
+        url = reverse("knowledge_base:render_cache_stats")
+        response = self.user_client.get(url)
+        self.assertEqual(response.status_code, 302)
+
+        self.user.is_staff = True
+        self.user.save()
+        response = self.user_client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("hits", response.json())
+
+    def test_search_cache_stats_page(self):
+        """Статистика кэша поиска доступна только сотрудникам."""
+        url = reverse("knowledge_base:search_cache_stats")
+        response = self.user_client.get(url)
+        self.assertEqual(response.status_code, 302)
+
+        self.user.is_staff = True
+        self.user.save()
+        response = self.user_client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("saved_seconds", response.json())
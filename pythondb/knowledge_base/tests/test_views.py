@@ -1,4 +1,6 @@
-from django.test import Client, TestCase
+from unittest import mock
+
+from django.test import Client, TestCase, override_settings
 from django.urls import reverse
 
 from data import (
@@ -7,11 +9,19 @@ from data import (
     PATH_CATEGORIES,
     PATH_MAIN,
     PATH_POST,
+    PATH_POST_CARDS,
     POSTS,
+    POSTS_PAGE_SIZE,
     SUBCATEGORIES,
     SUBCATEGORY,
+    SUBCATEGORY_PREVIEW_POSTS,
 )
+from gpt.models import Dialogue
 from knowledge_base.models import Category, Post, SubCategory, User
+from knowledge_base.navigation import get_navigation
+from knowledge_base.pagination import encode_cursor
+from knowledge_base.search.cache import search_cache
+from knowledge_base.search.suggest import reset_suggest_index
 
 
 class MainViewTest(TestCase):
@@ -72,6 +82,46 @@ class CategoryViewTest(TestCase):
         self.assertIn(SUBCATEGORIES, response.context)
         self.assertIn(CATEGORIES, response.context)
 
+    def test_category_view_post_previews(self):
+        user = User.objects.create_user(username="testuser", password="pass")
+        full = SubCategory.objects.create(name="Много", category=self.category)
+        short = SubCategory.objects.create(name="Мало", category=self.category)
+        SubCategory.objects.create(name="Пусто", category=self.category)
+        for i in range(SUBCATEGORY_PREVIEW_POSTS + 2):
+            Post.objects.create(
+                title=f"Пост {i}",
+                content="Текст",
+                category=self.category,
+                subcategory=full,
+                author=user,
+            )
+        Post.objects.create(
+            title="Единственный",
+            content="Текст",
+            category=self.category,
+            subcategory=short,
+            author=user,
+        )
+
+        response = self.client.get(self.url)
+        previews = {
+            subcategory.name: (
+                [post.title for post in subcategory.preview_posts],
+                subcategory.has_more_posts,
+            )
+            for subcategory in response.context[SUBCATEGORIES]
+        }
+        self.assertEqual(
+            previews["Много"],
+            (
+                [f"Пост {i}" for i in range(SUBCATEGORY_PREVIEW_POSTS)],
+                True,
+            ),
+        )
+        self.assertEqual(previews["Мало"], (["Единственный"], False))
+        self.assertEqual(previews["Пусто"], ([], False))
+        self.assertContains(response, "Показать все", count=1)
+
 
 class PostViewTest(TestCase):
     def setUp(self):
@@ -114,6 +164,124 @@ class PostViewTest(TestCase):
         self.assertIn(CATEGORY, response.context)
         self.assertIn(SUBCATEGORY, response.context)
 
+    def test_post_view_uses_rendered_html(self):
+        Post.objects.filter(id=self.post.id).update(
+            rendered_html="<p>Stored HTML</p>"
+        )
+        response = self.client.get(self.url)
+        self.assertContains(response, "<p>Stored HTML</p>")
+
+    def test_post_view_renders_stale_post(self):
+        Post.objects.filter(id=self.post.id).update(
+            rendered_html="", renderer_version=0
+        )
+        response = self.client.get(self.url)
+        self.assertContains(response, "<p>Test Content</p>")
+
+
+class PostPaginationViewTest(TestCase):
+    def setUp(self):
+        self.category = Category.objects.create(name="Python", slug="python")
+        self.subcategory = SubCategory.objects.create(
+            name="Основы", category=self.category
+        )
+        user = User.objects.create_user(username="author", password="p")
+        self.posts = [
+            Post.objects.create(
+                title=f"Пост {i}",
+                content="Текст",
+                category=self.category,
+                subcategory=self.subcategory,
+                author=user,
+            )
+            for i in range(POSTS_PAGE_SIZE * 2 + 5)
+        ]
+        self.url = reverse(
+            "knowledge_base:post",
+            args=[self.category.slug, self.subcategory.id],
+        )
+        self.page_url = reverse(
+            "knowledge_base:post_page",
+            args=[self.category.slug, self.subcategory.id],
+        )
+
+    def test_first_page(self):
+        response = self.client.get(self.url)
+        self.assertEqual(
+            list(response.context[POSTS]), self.posts[:POSTS_PAGE_SIZE]
+        )
+        self.assertContains(
+            response,
+            f"{self.page_url}?after={response.context['next_cursor']}",
+        )
+
+    def test_fragments_cover_all_posts(self):
+        response = self.client.get(self.url)
+        seen = list(response.context[POSTS])
+        url = f"{self.page_url}?after={response.context['next_cursor']}"
+        while url:
+            response = self.client.get(url)
+            self.assertTemplateUsed(response, PATH_POST_CARDS)
+            self.assertTemplateNotUsed(response, "base.html")
+            seen.extend(response.context[POSTS])
+            url = response.get("X-Next-Page")
+        self.assertEqual(seen, self.posts)
+
+    def test_bad_cursor_opens_first_page(self):
+        for values in (["abc", "x"], [{"a": 1}, 2], [None, 1], [1]):
+            cursor = encode_cursor(values)
+            with self.subTest(values=values):
+                response = self.client.get(self.url, {"after": cursor})
+                self.assertEqual(
+                    list(response.context[POSTS]),
+                    self.posts[:POSTS_PAGE_SIZE],
+                )
+                self.assertTrue(response.context["first_page"])
+                response = self.client.get(self.page_url, {"after": cursor})
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(
+                    list(response.context[POSTS]),
+                    self.posts[:POSTS_PAGE_SIZE],
+                )
+
+    def test_fragment_for_subcategory_missing_from_navigation(self):
+        tree = get_navigation()
+        subcategory = SubCategory.objects.create(
+            name="Новая", category=self.category
+        )
+        url = reverse(
+            "knowledge_base:post_page",
+            args=[self.category.slug, subcategory.id],
+        )
+        # Дерево процесса не знает о подкатегории (как в другом воркере).
+        with mock.patch(
+            "knowledge_base.views.get_navigation",
+            return_value=tree,
+        ):
+            self.assertEqual(self.client.get(url).status_code, 200)
+            other = reverse(
+                "knowledge_base:post_page", args=["missing", subcategory.id]
+            )
+            self.assertEqual(self.client.get(other).status_code, 404)
+
+    def test_deep_link_opens_page_with_post(self):
+        target = self.posts[17]
+        response = self.client.get(self.url, {"post": target.id})
+        posts = list(response.context[POSTS])
+        self.assertEqual(posts[0], target)
+        self.assertContains(response, f'id="post-{target.id}"')
+        self.assertFalse(response.context["first_page"])
+
+    def test_deep_link_to_missing_post(self):
+        response = self.client.get(self.url, {"post": 0})
+        self.assertEqual(
+            list(response.context[POSTS]), self.posts[:POSTS_PAGE_SIZE]
+        )
+
+    def test_fragment_of_unknown_subcategory(self):
+        url = reverse("knowledge_base:post_page", args=[self.category.slug, 0])
+        self.assertEqual(self.client.get(url).status_code, 404)
+
 
 class CreatePostViewTest(TestCase):
     def setUp(self):
@@ -273,6 +441,141 @@ class SearchViewTest(TestCase):
         self.assertIn(CATEGORIES, response.context)
 
 
+@override_settings(
+    KNOWLEDGE_BASE_SEARCH={
+        "BACKEND": "database",
+        "PAGE_SIZE": 2,
+        "SECTION_LIMIT": 1,
+        "COUNT_CAP": 3,
+    }
+)
+class SearchPaginationViewTest(TestCase):
+    def setUp(self):
+        self.client = Client()
+        self.url = reverse("knowledge_base:search")
+        user = User.objects.create_user(username="testuser", password="pass")
+        self.category = Category.objects.create(name="Python", slug="python")
+        Category.objects.create(name="Python Web", slug="python-web")
+        self.subcategory = SubCategory.objects.create(
+            name="Основы", category=self.category
+        )
+        self.posts = [
+            Post.objects.create(
+                title=f"Python {i}",
+                content=f"Текст поста {i}",
+                category=self.category,
+                subcategory=self.subcategory,
+                author=user,
+            )
+            for i in range(5)
+        ]
+
+    def test_sections_capped_and_posts_paginated(self):
+        response = self.client.get(self.url, {"q": "python"})
+        self.assertEqual(len(response.context["results"]["categories"]), 1)
+        self.assertEqual(
+            response.context["results"]["posts"],
+            [self.posts[4], self.posts[3]],
+        )
+        self.assertEqual(response.context["post_count"], 3)
+        self.assertTrue(response.context["post_count_capped"])
+        self.assertContains(response, "Посты (3+)")
+        self.assertContains(response, "Текст поста 4")
+
+        response = self.client.get(
+            self.url,
+            {"q": "python", "after": response.context["next_cursor"]},
+        )
+        # Листаются только первые COUNT_CAP постов.
+        self.assertEqual(response.context["results"]["posts"], [self.posts[2]])
+        self.assertIsNone(response.context["next_cursor"])
+        self.assertEqual(len(response.context["results"]["categories"]), 0)
+
+    def test_results_cached_until_content_changes(self):
+        search_cache.clear()
+        self.client.get(self.url, {"q": "Python  python"})
+        with self.assertNumQueries(2):
+            # Только загрузка постов и категорий страницы: списки ID
+            # и меню берутся из кэша.
+            response = self.client.get(self.url, {"q": "PYTHON"})
+        self.assertEqual(search_cache.stats()["hits"], 1)
+
+        self.posts[0].title = "Python новый"
+        self.posts[0].save()
+        response = self.client.get(self.url, {"q": "python"})
+        self.assertEqual(search_cache.stats()["misses"], 2)
+        self.assertEqual(response.context["post_count"], 3)
+
+    def test_last_page_has_no_cursor(self):
+        response = self.client.get(self.url, {"q": "0"})
+        self.assertEqual(response.context["results"]["posts"], [self.posts[0]])
+        self.assertIsNone(response.context["next_cursor"])
+        self.assertNotContains(response, "Ещё посты")
+
+
+class SearchSuggestViewTest(TestCase):
+    def setUp(self):
+        reset_suggest_index()
+        self.addCleanup(reset_suggest_index)
+        self.client = Client()
+        self.url = reverse("knowledge_base:search_suggest")
+        self.user = User.objects.create_user(
+            username="testuser", password="testpass"
+        )
+        self.category = Category.objects.create(name="Django", slug="django")
+        self.subcategory = SubCategory.objects.create(
+            name="Декораторы", category=self.category
+        )
+        self.post = Post.objects.create(
+            title="Декоратор login_required",
+            content="Текст",
+            category=self.category,
+            subcategory=self.subcategory,
+            author=self.user,
+        )
+
+    def test_suggest_by_prefix(self):
+        response = self.client.get(self.url, {"q": "декор"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [item["type"] for item in response.json()["results"]],
+            ["subcategory", "post"],
+        )
+        self.assertEqual(
+            response.json()["results"][1]["url"],
+            reverse(
+                "knowledge_base:post",
+                args=[self.category.slug, self.subcategory.id],
+            )
+            + f"?post={self.post.id}#post-{self.post.id}",
+        )
+
+    def test_suggest_with_typo(self):
+        response = self.client.get(self.url, {"q": "джанго djanga"})
+        self.assertEqual(response.json()["results"], [])
+        response = self.client.get(self.url, {"q": "djanga"})
+        self.assertEqual(
+            response.json()["results"][0]["title"], self.category.name
+        )
+
+    def test_suggest_follows_changes(self):
+        self.client.get(self.url, {"q": "декор"})
+        self.post.title = "Генераторы"
+        self.post.save()
+        response = self.client.get(self.url, {"q": "генер"})
+        self.assertEqual(
+            [item["title"] for item in response.json()["results"]],
+            ["Генераторы"],
+        )
+        self.subcategory.delete()
+        response = self.client.get(self.url, {"q": "декор"})
+        self.assertEqual(response.json()["results"], [])
+
+    def test_empty_query(self):
+        response = self.client.get(self.url, {"q": " "})
+        self.assertEqual(response.json(), {"query": "", "results": []})
+
+
 class LikePostViewTest(TestCase):
     def setUp(self):
         self.client = Client()
@@ -336,3 +639,63 @@ class CreateSubcategoryViewTest(TestCase):
         self.assertTemplateUsed(
             response, "knowledge_base/create_subcategory.html"
         )
+
+
+class ChatHistoryViewTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="testuser", password="testpass"
+        )
+        other = User.objects.create_user(username="other", password="p")
+        Dialogue.objects.create(
+            user=other, user_message="Чужой", bot_message="<p>Нет</p>"
+        )
+        self.dialogues = [
+            Dialogue.objects.create(
+                user=self.user,
+                user_message=f"Вопрос {i}",
+                bot_message=f"<p>Ответ {i}</p>",
+            )
+            for i in range(5)
+        ]
+        self.url = reverse("gpt:history")
+        self.client.force_login(self.user)
+
+    def test_pages_newest_first(self):
+        seen = []
+        cursor = None
+        while True:
+            params = {"limit": 2}
+            if cursor:
+                params["after"] = cursor
+            data = self.client.get(self.url, params).json()
+            self.assertLessEqual(len(data["results"]), 2)
+            seen.extend(item["user_message"] for item in data["results"])
+            cursor = data["next"]
+            if not cursor:
+                break
+        self.assertEqual(seen, [f"Вопрос {i}" for i in range(4, -1, -1)])
+
+    def test_bad_cursor_opens_first_page(self):
+        first = self.client.get(self.url, {"limit": 2}).json()
+        for values in (["abc", "x"], [{"a": 1}, 2], ["x"]):
+            with self.subTest(values=values):
+                response = self.client.get(
+                    self.url, {"limit": 2, "after": encode_cursor(values)}
+                )
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response.json(), first)
+
+    def test_anonymous_history_empty(self):
+        self.client.logout()
+        data = self.client.get(self.url).json()
+        self.assertEqual(data, {"results": [], "next": None})
+
+    def test_pages_render_without_history(self):
+        category = Category.objects.create(name="Python", slug="python")
+        response = self.client.get(
+            reverse("knowledge_base:category", args=[category.slug])
+        )
+        self.assertNotIn("dialogues", response.context)
+        self.assertNotContains(response, "Вопрос 0")
+        self.assertContains(response, f'data-history-url="{self.url}"')
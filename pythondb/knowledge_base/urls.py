@@ -9,8 +9,24 @@ urlpatterns = [
     path("", views.main, name="main"),
     path("post/<int:post_id>/like/", views.like_post, name="like_post"),
     path("search/", views.search, name="search"),
+    path("search/suggest/", views.search_suggest, name="search_suggest"),
+    path(
+        "stats/render-cache/",
+        views.render_cache_stats,
+        name="render_cache_stats",
+    ),
+    path(
+        "stats/search-cache/",
+        views.search_cache_stats,
+        name="search_cache_stats",
+    ),
     path("<slug:category_slug>/", views.category, name="category"),
     path("<slug:category_slug>/<int:subcategory_id>/", views.post, name="post"),
+    path(
+        "<slug:category_slug>/<int:subcategory_id>/page/",
+        views.post_page,
+        name="post_page",
+    ),
     path(
         "<slug:category_slug>/<int:subcategory_id>/create/",
         views.create_post,
@@ -0,0 +1,43 @@
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+
+# Счётчик версии содержимого: увеличивается при любой записи постов,
+# подкатегорий и категорий (см. `signals.py`). Кэши, которые включают
+# версию в ключ, перестают отдавать устаревшие данные сразу после записи.
+CONTENT_VERSION = "content"
+
+
+def _version_cache():
+    return caches[getattr(settings, "KNOWLEDGE_BASE_VERSION_CACHE", "default")]
+
+
+def _key(name):
+    return f"knowledge_base:version:{name}"
+
+
+def _initial():
+    # Если счётчика нет (первый запуск или вытеснение из кэша), он
+    # начинается с текущего времени, чтобы не совпасть с прежними версиями.
+    return time.time_ns() // 1000
+
+
+def get_version(name=CONTENT_VERSION) -> int:
+    """Текущее значение счётчика версии `name`."""
+    cache = _version_cache()
+    version = cache.get(_key(name))
+    if version is None:
+        cache.add(_key(name), _initial(), timeout=None)
+        version = cache.get(_key(name))
+    return version
+
+
+def bump_version(name=CONTENT_VERSION) -> int:
+    """Увеличивает счётчик версии `name` и возвращает новое значение."""
+    cache = _version_cache()
+    try:
+        return cache.incr(_key(name))
+    except ValueError:
+        cache.add(_key(name), _initial(), timeout=None)
+        return cache.get(_key(name))
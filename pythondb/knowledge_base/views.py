@@ -1,58 +1,171 @@
-import re
-
-import markdown2
 from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib.auth.decorators import login_required
-from django.db.models import Count, Q
+from django.db.models import F, Window
+from django.db.models.functions import RowNumber
+from django.http import Http404, JsonResponse
 from django.shortcuts import get_object_or_404, redirect, render
+from django.urls import reverse
 
 from data import (
-    CATEGORIES,
     CATEGORY,
     PATH_CATEGORIES,
     PATH_MAIN,
     PATH_POST,
+    PATH_POST_CARDS,
     POSTS,
     POSTS_BY_SUBCATEGORY,
+    POSTS_PAGE_SIZE,
     SUBCATEGORIES,
     SUBCATEGORY,
+    SUBCATEGORY_PREVIEW_POSTS,
 )
 
+from .conditional import (
+    category_page_state,
+    conditional_page,
+    post_page_state,
+)
 from .decorators import author_required
 from .forms import PostForm, SubcategoryForm
-from .models import Category, Post, SubCategory, User
+from .identity import identity_map
+from .likes import like_buffer, like_buffer_options
+from .models import Category, Post, SiteCounter, SubCategory, User
+from .navigation import get_navigation
+from .page_cache import anonymous_page_cache
+from .pagination import cursor_before, cursor_values, keyset_page
+from .rendering import render_cache, render_markup
+from .search import search_ids, search_options
+from .search.backends import RankedResults, post_cards
+from .search.cache import search_cache
+from .search.suggest import (
+    SUGGEST_LIMIT,
+    SUGGEST_MAX_LIMIT,
+    get_suggest_index,
+)
+
+# Посты подкатегории выводятся от старых к новым страницами по ключу
+# (created_at, id); его покрывает индекс post_subcategory_created.
+POSTS_ORDERING = ("created_at", "id")
 
 
-def get_objects(category_slug) -> dict:
+def get_objects(request, category_slug) -> dict:
     """
     Получает данные, связанные с категорией, на основе её slug.
 
     **Параметры:**
+    - `request` (HttpRequest): Запрос, в карте идентичности которого (`identity_map`)
+      остаётся найденная категория.
     - `category_slug` (str): Уникальный идентификатор категории (slug), который используется для поиска категории.
 
     **Возвращает:**
     - dict: Словарь, содержащий:
         - `CATEGORY`: Объект категории.
         - `SUBCATEGORIES`: Все подкатегории, связанные с данной категорией.
-        - `CATEGORIES`: Все категории в базе данных.
 
     **Что делает внутри:**
-    - Ищет категорию по её slug. Если категория не найдена, возвращает ошибку 404.
-    - Получает все категории из базы данных.
-    - Получает все подкатегории, связанные с найденной категорией.
+    - Ищет категорию по её slug через карту идентичности запроса: повторные
+      обращения к категории в том же запросе не идут в базу. Если категория
+      не найдена, возвращает ошибку 404.
+    - Берёт подкатегории найденной категории из дерева навигации (`get_navigation`),
+      без запроса к базе. Все категории для шапки добавляет контекстный
+      процессор `knowledge_base.context_processors.navigation`.
     - Возвращает словарь с данными.
     """
-    category = get_object_or_404(Category, slug=category_slug)
-    categories = Category.objects.all()
-    subcategories = category.subcategories.all()
+    category = identity_map(request).get_or_404(Category, slug=category_slug)
+    node = get_navigation().category(category_slug)
 
     return {
         CATEGORY: category,
-        SUBCATEGORIES: subcategories,
-        CATEGORIES: categories,
+        SUBCATEGORIES: node.subcategories if node else (),
+    }
+
+
+def preview_posts(category, limit):
+    """
+    Первые `limit` постов каждой подкатегории `category` (только `id`,
+    `title` и `subcategory_id`), пронумерованные внутри подкатегории
+    оконной функцией `ROW_NUMBER()`.
+    """
+    return (
+        Post.objects.filter(subcategory__category=category)
+        .annotate(
+            row=Window(
+                RowNumber(),
+                partition_by=F("subcategory_id"),
+                order_by=[F("created_at").asc(), F("id").asc()],
+            )
+        )
+        .filter(row__lte=limit)
+        .only("id", "title", "subcategory_id")
+        .order_by("subcategory_id", "row")
+    )
+
+
+def get_post_page(request, subcategory_id, cursor) -> tuple:
+    """
+    Получает страницу постов подкатегории для страницы постов и её фрагментов.
+
+    **Параметры:**
+    - `request` (HttpRequest): Запрос; от пользователя зависит отметка лайка.
+    - `subcategory_id` (int): ID подкатегории.
+    - `cursor` (str): Курсор из `keyset_page` или `None` для первой страницы.
+
+    **Возвращает:**
+    - tuple: `(посты, курсор следующей страницы или None)`.
+
+    **Что делает внутри:**
+    - Выбирает `POSTS_PAGE_SIZE` постов по ключу `(created_at, id)` после
+      курсора (`keyset_page`): стоимость запроса не зависит от номера страницы
+      и размера подкатегории. Посты читаются без исходного текста, вместе с
+      авторами и отметкой, лайкнул ли пост текущий пользователь.
+    - Выводит сохранённый HTML поста (`rendered_html`). Если HTML устарел
+      (не совпадает версия рендерера), рендерит пост на лету, не сохраняя результат.
+    - Добавляет к счётчикам лайков ещё не записанные лайки из буфера.
+    """
+    posts, next_cursor = keyset_page(
+        Post.objects.filter(subcategory_id=subcategory_id)
+        .select_related("author", "category")
+        .defer("content")
+        .with_liked(request.user),
+        POSTS_ORDERING,
+        cursor,
+        POSTS_PAGE_SIZE,
+    )
+    for post in posts:
+        if not post.is_rendered:
+            post.render_content()
+    like_buffer.merge(posts, request.user)
+    return posts, next_cursor
+
+
+def get_posts_by_subcategory(category, limit) -> dict:
+    """
+    Получает заголовки первых постов каждой подкатегории категории.
+
+    **Параметры:**
+    - `category` (Category): Категория, подкатегории которой нужны.
+    - `limit` (int): Сколько постов показывать в каждой подкатегории.
+
+    **Возвращает:**
+    - dict: `{ID подкатегории: (посты, есть_ли_ещё)}`, где посты содержат только
+      `id`, `title` и `subcategory_id`.
+
+    **Что делает внутри:**
+    - Одним запросом (`preview_posts`) нумерует посты внутри каждой подкатегории
+      оконной функцией `ROW_NUMBER()` и оставляет первые `limit + 1`: лишний
+      пост показывает, что в подкатегории есть ещё посты. Количество запросов не зависит от числа
+      подкатегорий, а объём — от числа постов в них.
+    """
+    posts_by_subcategory = {}
+    for post in preview_posts(category, limit + 1):
+        posts_by_subcategory.setdefault(post.subcategory_id, []).append(post)
+    return {
+        subcategory_id: (posts[:limit], len(posts) > limit)
+        for subcategory_id, posts in posts_by_subcategory.items()
     }
 
 
+@anonymous_page_cache
 def main(request):
     """
     Главная страница сайта, отображающая категории, последние посты, топ пользователей и статистику.
@@ -64,35 +177,32 @@ def main(request):
     - HttpResponse: HTML-страница, отрендеренная с данными для главной страницы.
 
     **Что делает внутри:**
-    - Получает все категории из базы данных.
     - Получает последние 5 постов, включая связанные категории, подкатегории и авторов.
-    - Получает топ-5 пользователей, отсортированных по количеству постов.
-    - Считает общее количество категорий, подкатегорий и постов.
+    - Получает топ-5 пользователей по сохранённому количеству постов (`UserStats`).
+    - Берёт общее количество категорий, подкатегорий и постов из счётчиков
+      `SiteCounter`, которые поддерживают сигналы, без `COUNT(*)` по таблицам.
     - Рендерит страницу с переданными данными.
     """
-    categories = Category.objects.all()
-    dialogues = (
-        request.user.dialogues.all() if request.user.is_authenticated else []
-    )
 
     latest_posts = Post.objects.select_related(
         "category", "subcategory", "author"
     ).order_by("-created_at")[:5]
 
-    top_users = User.objects.annotate(post_count=Count("posts")).order_by(
-        "-post_count"
-    )[:5]
+    top_users = (
+        User.objects.filter(stats__post_count__gt=0)
+        .annotate(post_count=F("stats__post_count"))
+        .order_by("-stats__post_count")[:5]
+    )
 
-    total_categories = Category.objects.count()
-    total_subcategories = SubCategory.objects.count()
-    total_posts = Post.objects.count()
+    counters = SiteCounter.values()
+    total_categories = counters.get(SiteCounter.CATEGORIES, 0)
+    total_subcategories = counters.get(SiteCounter.SUBCATEGORIES, 0)
+    total_posts = counters.get(SiteCounter.POSTS, 0)
 
     return render(
         request,
         PATH_MAIN,
         {
-            "dialogues": dialogues,
-            "categories": categories,
             "latest_posts": latest_posts,
             "top_users": top_users,
             "total_categories": total_categories,
@@ -102,6 +212,8 @@ def main(request):
     )
 
 
+@anonymous_page_cache
+@conditional_page(category_page_state)
 def category(request, category_slug):
     """
     Отображает страницу категории с её описанием, подкатегориями и постами.
@@ -114,40 +226,41 @@ def category(request, category_slug):
     - HttpResponse: HTML-страница, отрендеренная с данными о категории, подкатегориях и постах.
 
     **Что делает внутри:**
-    - Вызывает функцию `get_objects`, чтобы получить данные о категории, подкатегориях и всех категориях.
-    - Преобразует описание категории в HTML с помощью библиотеки `markdown2`.
-    - Применяет регулярное выражение для форматирования кода Python в описании категории.
-    - Создаёт словарь, где ключами являются ID подкатегорий, а значениями — связанные с ними посты.
+    - Вызывает функцию `get_objects`, чтобы получить данные о категории и её подкатегориях.
+    - Преобразует описание категории в HTML через общий кэш рендеринга.
+    - Одним запросом получает заголовки первых `SUBCATEGORY_PREVIEW_POSTS` постов
+      каждой подкатегории (`get_posts_by_subcategory`) и прикрепляет их
+      к подкатегориям для боковой колонки вместе с признаком «показать все».
     - Рендерит страницу категории с переданными данными.
+    - Если копия страницы у клиента актуальна (`category_page_state`),
+      отвечает 304 без рендеринга.
     """
-    dict = get_objects(category_slug)
-    dialogues = (
-        request.user.dialogues.all() if request.user.is_authenticated else []
-    )
+    dict = get_objects(request, category_slug)
     category = dict[CATEGORY]
-    category.description = markdown2.markdown(category.description)
-    category.description = re.sub(
-        r"\'\'\'(.*?)\'\'\'",
-        r'<pre><code class="language-python">\1</code></pre>',
-        category.description,
-        flags=re.DOTALL,
+    category.description = render_markup("category", category.description)
+    # Подкатегориям прикрепляются превью постов, поэтому здесь нужны
+    # объекты моделей, а не узлы дерева навигации.
+    subcategories = list(category.subcategories.all())
+    posts_by_subcategory = get_posts_by_subcategory(
+        category, SUBCATEGORY_PREVIEW_POSTS
     )
+    for subcategory in subcategories:
+        subcategory.preview_posts, subcategory.has_more_posts = (
+            posts_by_subcategory.get(subcategory.id, ([], False))
+        )
     return render(
         request,
         PATH_CATEGORIES,
         {
             CATEGORY: category,
-            "dialogues": dialogues,
-            SUBCATEGORIES: dict[SUBCATEGORIES],
-            CATEGORIES: dict[CATEGORIES],
-            POSTS_BY_SUBCATEGORY: {
-                subcategory.id: subcategory.posts.all()
-                for subcategory in dict[SUBCATEGORIES]
-            },
+            SUBCATEGORIES: subcategories,
+            POSTS_BY_SUBCATEGORY: posts_by_subcategory,
         },
     )
 
 
+@anonymous_page_cache
+@conditional_page(post_page_state)
 def post(request, subcategory_id, category_slug):
     """
     Отображает страницу с постами, относящимися к определённой подкатегории.
@@ -161,54 +274,93 @@ def post(request, subcategory_id, category_slug):
     - HttpResponse: HTML-страница, отрендеренная с данными о постах, категории, подкатегории и связанных данных.
 
     **Что делает внутри:**
-    - Вызывает функцию `get_objects`, чтобы получить данные о категории, подкатегориях и всех категориях.
-    - Получает все посты, относящиеся к указанной подкатегории.
-    - Форматирует содержимое каждого поста:
-        - Применяет регулярное выражение для преобразования кода в HTML-блоки с подсветкой синтаксиса.
-        - Преобразует содержимое поста в HTML с использованием библиотеки `markdown2`.
-    - Рендерит страницу с переданными данными.
+    - Вызывает функцию `get_objects`, чтобы получить данные о категории и её подкатегориях.
+    - Получает страницу постов подкатегории (`get_post_page`) после курсора из
+      GET-параметра `after`. Если передан параметр `post` (ссылка на
+      `#post-<id>`), страница начинается с этого поста (`cursor_before`).
+    - Рендерит страницу с переданными данными и ссылкой на фрагмент следующей
+      страницы (`post_page`), который подгружается при прокрутке.
+    - Если копия страницы у клиента актуальна (`post_page_state`),
+      отвечает 304 без рендеринга.
     """
-    dialogues = (
-        request.user.dialogues.all() if request.user.is_authenticated else []
+    dict = get_objects(request, category_slug)
+    subcategory = identity_map(request).get_or_404(
+        SubCategory, id=subcategory_id
     )
-    dict = get_objects(category_slug)
-    posts = Post.objects.filter(subcategory_id=subcategory_id)
-    subcategory = SubCategory.objects.filter(id=subcategory_id)
-
-    for post in posts:
-        post.content = post.content.strip()
-
-        post.content = re.sub(
-            r"'''(\w*)\s*(.*?)\s*'''",
-            lambda match: f"<pre><code class='language-{match.group(1) or 'python'}'>{match.group(2).strip()}</code></pre>",
-            post.content,
-            flags=re.DOTALL,
-        )
-
-        post.content = re.sub(
-            r"<(?!pre|code|/pre|/code).*?>",
-            lambda match: f"&lt;{match.group(0)[1:-1]}&gt;",
-            post.content,
-        )
-
-        post.content = markdown2.markdown(
-            post.content, extras=["fenced-code-blocks", "code-friendly"]
+    cursor = request.GET.get("after")
+    post_id = request.GET.get("post", "")
+    if not cursor and post_id.isdigit():
+        cursor = cursor_before(
+            Post.objects.filter(subcategory_id=subcategory_id),
+            POSTS_ORDERING,
+            int(post_id),
         )
+    posts, next_cursor = get_post_page(request, subcategory_id, cursor)
 
     return render(
         request,
         PATH_POST,
         {
             POSTS: posts,
-            "dialogues": dialogues,
             SUBCATEGORIES: dict[SUBCATEGORIES],
-            CATEGORIES: dict[CATEGORIES],
             CATEGORY: dict[CATEGORY],
-            SUBCATEGORY: subcategory[0],
+            SUBCATEGORY: subcategory,
+            "next_cursor": next_cursor,
+            # Неверный курсор открывает первую страницу (`keyset_page`).
+            "first_page": cursor_values(Post, POSTS_ORDERING, cursor) is None,
         },
     )
 
 
+@conditional_page(post_page_state)
+def post_page(request, subcategory_id, category_slug):
+    """
+    Возвращает HTML-фрагмент со следующей страницей постов подкатегории для
+    бесконечной прокрутки.
+
+    **Параметры:**
+    - `request` (HttpRequest): Объект запроса. GET-параметр `after` — курсор страницы.
+    - `subcategory_id` (int): Уникальный идентификатор подкатегории.
+    - `category_slug` (str): Уникальный идентификатор категории (slug).
+
+    **Возвращает:**
+    - HttpResponse: Карточки постов (`includes/post_cards.html`) и заголовок
+      `X-Next-Page` с адресом следующего фрагмента, если он есть.
+
+    **Что делает внутри:**
+    - Проверяет категорию и подкатегорию по дереву навигации, без запросов к базе;
+      если их там ещё нет (дерево другого воркера не перестроено), — по базе.
+    - Получает страницу постов (`get_post_page`) и рендерит только карточки.
+    """
+    navigation = get_navigation()
+    category = navigation.category(category_slug)
+    subcategory = navigation.subcategory(subcategory_id)
+    if category is None or subcategory is None:
+        # Подкатегория, созданная после построения дерева этого процесса.
+        subcategory = get_object_or_404(
+            SubCategory.objects.select_related("category"),
+            id=subcategory_id,
+            category__slug=category_slug,
+        )
+        category = subcategory.category
+    elif subcategory.category_id != category.id:
+        raise Http404("Подкатегория не найдена")
+    posts, next_cursor = get_post_page(
+        request, subcategory_id, request.GET.get("after")
+    )
+    response = render(
+        request,
+        PATH_POST_CARDS,
+        {POSTS: posts, CATEGORY: category, SUBCATEGORY: subcategory},
+    )
+    if next_cursor:
+        url = reverse(
+            "knowledge_base:post_page", args=[category_slug, subcategory_id]
+        )
+        response["X-Next-Page"] = f"{url}?after={next_cursor}"
+    return response
+
+
 @login_required
 def create_post(request, category_slug, subcategory_id):
     """
@@ -223,7 +375,7 @@ def create_post(request, category_slug, subcategory_id):
     - HttpResponse: HTML-страница с формой для создания поста или перенаправление на страницу постов после успешного создания.
 
     **Что делает внутри:**
-    - Вызывает функцию `get_objects`, чтобы получить данные о категории, подкатегориях и всех категориях.
+    - Вызывает функцию `get_objects`, чтобы получить данные о категории и её подкатегориях.
     - Получает категорию и подкатегорию по их идентификаторам.
     - Если запрос является POST-запросом:
         - Проверяет валидность формы.
@@ -231,13 +383,11 @@ def create_post(request, category_slug, subcategory_id):
         - Сохраняет пост и перенаправляет на страницу постов.
     - Если запрос не является POST-запросом, отображает пустую форму для создания поста.
     """
-    dialogues = (
-        request.user.dialogues.all() if request.user.is_authenticated else []
+    dict = get_objects(request, category_slug)
+    category = dict[CATEGORY]
+    subcategory = identity_map(request).get_or_404(
+        SubCategory, id=subcategory_id
     )
-    dict = get_objects(category_slug)
-    category = get_object_or_404(Category, slug=category_slug)
-    subcategory = get_object_or_404(SubCategory, id=subcategory_id)
-    subcategory_name = SubCategory.objects.filter(id=subcategory_id)
 
     if request.method == "POST":
         form = PostForm(request.POST)
@@ -260,11 +410,9 @@ def create_post(request, category_slug, subcategory_id):
         "knowledge_base/created_post.html",
         {
             "form": form,
-            "dialogues": dialogues,
             SUBCATEGORIES: dict[SUBCATEGORIES],
-            CATEGORIES: dict[CATEGORIES],
             CATEGORY: dict[CATEGORY],
-            SUBCATEGORY: subcategory_name[0],
+            SUBCATEGORY: subcategory,
         },
     )
 
@@ -294,12 +442,10 @@ def edit_post(request, category_slug, subcategory_id, post_id):
     - Если запрос не POST, отображает форму редактирования с текущими данными поста.
     - Рендерит страницу с формой редактирования.
     """
-    dialogues = (
-        request.user.dialogues.all() if request.user.is_authenticated else []
-    )
-    dict = get_objects(category_slug)
-    subcategory_name = SubCategory.objects.filter(id=subcategory_id)
-    post = get_object_or_404(Post, id=post_id)
+    dict = get_objects(request, category_slug)
+    objects = identity_map(request)
+    subcategory = objects.get_or_404(SubCategory, id=subcategory_id)
+    post = objects.get_or_404(Post, id=post_id)
 
     if request.method == "POST":
         form = PostForm(request.POST, instance=post)
@@ -317,11 +463,9 @@ def edit_post(request, category_slug, subcategory_id, post_id):
         "knowledge_base/edit_post.html",
         {
             "form": form,
-            "dialogues": dialogues,
             SUBCATEGORIES: dict[SUBCATEGORIES],
-            CATEGORIES: dict[CATEGORIES],
             CATEGORY: dict[CATEGORY],
-            SUBCATEGORY: subcategory_name[0],
+            SUBCATEGORY: subcategory,
         },
     )
 
@@ -351,7 +495,7 @@ def delete_post(request, category_slug, subcategory_id, post_id):
     - Если запрос типа POST, удаляет пост и перенаправляет пользователя на страницу подкатегории.
     - Если запрос не POST, возвращает ошибку 405.
     """
-    post = get_object_or_404(Post, id=post_id)
+    post = identity_map(request).get_or_404(Post, id=post_id)
 
     if request.method == "POST":
         post.delete()
@@ -372,6 +516,7 @@ def search(request):
 
     **Параметры:**
     - `request` (HttpRequest): Объект запроса, содержащий данные о текущем запросе пользователя.
+      GET-параметры: `q` — поисковый запрос, `after` — курсор следующей страницы постов.
 
     **Возвращает:**
     - HttpResponse: HTML-страница с результатами поиска, если запрос содержит поисковый запрос.
@@ -380,50 +525,78 @@ def search(request):
     **Что делает внутри:**
     - Получает поисковый запрос из параметров GET.
     - Если запрос не пустой:
-        - Выполняет поиск по категориям, подкатегориям и постам, используя `icontains`.
-        - Формирует результаты поиска.
+        - Выполняет поиск по категориям, подкатегориям и постам через бэкенд из
+          `get_search_backend`: полнотекстовый поиск с ранжированием на PostgreSQL
+          или `icontains` на остальных базах. Ранжированные списки ID кэшируются
+          по нормализованному запросу до следующей записи контента.
+        - Показывает не больше `SECTION_LIMIT` категорий и подкатегорий (только
+          на первой странице) и `PAGE_SIZE` постов со ссылкой «Ещё посты» по курсору.
+        - Посты загружаются без текста, с сохранённым анонсом; количество постов
+          считается не дальше `COUNT_CAP`.
         - Рендерит страницу с результатами поиска.
     - Если запрос пустой, перенаправляет на главную страницу.
     """
     query = request.GET.get("q", "").strip()
-    categories_items = Category.objects.all()
     if query:
-        search_terms = query.split()
-
-        category_query = Q()
-        for term in search_terms:
-            category_query |= Q(name__icontains=term) | Q(
-                description__icontains=term
-            )
-        categories = Category.objects.filter(category_query).distinct()
-
-        subcategory_query = Q()
-        for term in search_terms:
-            subcategory_query |= Q(name__icontains=term)
-        subcategories = SubCategory.objects.filter(subcategory_query).distinct()
-
-        post_query = Q()
-        for term in search_terms:
-            post_query |= Q(title__icontains=term) | Q(content__icontains=term)
-        posts = Post.objects.filter(post_query).distinct()
-
-        results = {
-            "categories": categories,
-            "subcategories": subcategories,
-            "posts": posts,
-        }
+        options = search_options()
+        ids = search_ids(query)
+        cap = options["COUNT_CAP"]
+        posts, next_cursor = RankedResults(
+            ids["posts"][:cap], post_cards(Post.objects.all())
+        ).page(request.GET.get("after"), options["PAGE_SIZE"])
+        first_page = not request.GET.get("after")
         return render(
             request,
             "knowledge_base/search_results.html",
             {
                 "query": query,
-                "results": results,
-                CATEGORIES: categories_items,
+                "results": {
+                    "categories": RankedResults(
+                        ids["categories"] if first_page else [],
+                        Category.objects.all(),
+                    ),
+                    "subcategories": RankedResults(
+                        ids["subcategories"] if first_page else [],
+                        SubCategory.objects.select_related("category"),
+                    ),
+                    "posts": posts,
+                },
+                "post_count": min(len(ids["posts"]), cap),
+                "post_count_capped": len(ids["posts"]) > cap,
+                "next_cursor": next_cursor,
             },
         )
     return redirect("knowledge_base:main")
 
 
+def search_suggest(request):
+    """
+    Возвращает подсказки для строки поиска в формате JSON.
+
+    **Параметры:**
+    - `request` (HttpRequest): Объект запроса. GET-параметры: `q` — введённый
+      текст, `limit` — количество подсказок (по умолчанию 10, не больше 20).
+
+    **Возвращает:**
+    - JsonResponse: `{"query": ..., "results": [{"type", "title", "url"}, ...]}`,
+      где `type` — `category`, `subcategory` или `post`.
+
+    **Что делает внутри:**
+    - Ищет по префиксам слов в названиях категорий, подкатегорий и заголовках
+      постов, а для слов с опечатками — по сходству триграмм.
+    - Индекс подсказок хранится в памяти процесса и обновляется сигналами
+      и фоновой синхронизацией.
+    """
+    query = request.GET.get("q", "").strip()
+    try:
+        limit = int(request.GET.get("limit", SUGGEST_LIMIT))
+    except ValueError:
+        limit = SUGGEST_LIMIT
+    limit = max(1, min(limit, SUGGEST_MAX_LIMIT))
+    results = get_suggest_index().suggest(query, limit) if query else []
+    return JsonResponse({"query": query, "results": results})
+
+
 @login_required
 def like_post(request, post_id):
     """
@@ -441,11 +614,18 @@ def like_post(request, post_id):
 
     **Что делает внутри:**
     - Получает пост по его ID.
-    - Вызывает метод `toggle_like` для переключения состояния лайка.
+    - Вызывает метод `toggle_like` для переключения состояния лайка или,
+      если включена отложенная запись (`KNOWLEDGE_BASE_LIKE_BUFFER`),
+      записывает переключение в буфер лайков.
     - Перенаправляет пользователя на предыдущую страницу.
     """
-    post = get_object_or_404(Post, id=post_id)
-    post.toggle_like(request.user)
+    post = get_object_or_404(
+        Post.objects.only("id", "like_count", "author_id"), id=post_id
+    )
+    if like_buffer_options()["ENABLED"]:
+        like_buffer.toggle(request.user, post.id)
+    else:
+        post.toggle_like(request.user)
     return redirect(request.META.get("HTTP_REFERER", "/"))
 
 
@@ -473,8 +653,8 @@ def create_subcategory(request, category_slug):
     - Если запрос не POST, отображает пустую форму.
     - Рендерит страницу с формой создания подкатегории.
     """
-    category = get_object_or_404(Category, slug=category_slug)
-    dict = get_objects(category_slug)
+    dict = get_objects(request, category_slug)
+    category = dict[CATEGORY]
 
     if request.method == "POST":
         form = SubcategoryForm(request.POST)
@@ -494,7 +674,35 @@ def create_subcategory(request, category_slug):
         {
             "form": form,
             SUBCATEGORIES: dict[SUBCATEGORIES],
-            CATEGORIES: dict[CATEGORIES],
             CATEGORY: dict[CATEGORY],
         },
     )
+
+
+@staff_member_required
+def render_cache_stats(request):
+    """
+    Возвращает счётчики кэша рендеринга текущего процесса.
+
+    **Декораторы:**
+    - `@staff_member_required`: Требует, чтобы пользователь был сотрудником (staff).
+
+    **Возвращает:**
+    - JsonResponse: Попадания, промахи, вытеснения и заполненность LRU.
+    """
+    return JsonResponse(render_cache.stats())
+
+
+@staff_member_required
+def search_cache_stats(request):
+    """
+    Возвращает счётчики кэша результатов поиска текущего процесса.
+
+    **Декораторы:**
+    - `@staff_member_required`: Требует, чтобы пользователь был сотрудником (staff).
+
+    **Возвращает:**
+    - JsonResponse: Попадания, промахи, доля попаданий, сэкономленное время
+      и среднее время поиска при промахе.
+    """
+    return JsonResponse(search_cache.stats())
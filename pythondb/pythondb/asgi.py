@@ -14,3 +14,8 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "pythondb.settings")
 
 application = get_asgi_application()
+
+# Индексы поиска загружаются до первого запроса воркера.
+from knowledge_base.search import warm_up  # noqa: E402
+
+warm_up()
@@ -48,6 +48,20 @@ REST_FRAMEWORK = {
     ],
 }
 
+# Списки API базы знаний (api.pagination.KeysetPagination) отдаются
+# страницами по курсору: PAGE_SIZE строк по умолчанию, параметр
+# page_size — не больше MAX_PAGE_SIZE.
+KNOWLEDGE_BASE_API_PAGINATION = {
+    "PAGE_SIZE": 20,
+    "MAX_PAGE_SIZE": 100,
+}
+
+# Быстрое чтение списков API: values_list() вместо ModelSerializer и
+# JSON через orjson (если установлен). Ответы побайтно те же.
+KNOWLEDGE_BASE_API_FAST_READ = {
+    "ENABLED": False,
+}
+
 
 SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(days=90),
@@ -61,6 +75,7 @@ CSRF_USE_SESSIONS = False
 CSRF_COOKIE_HTTPONLY = False
 
 MIDDLEWARE = [
+    "knowledge_base.middleware.QueryBudgetMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -83,6 +98,7 @@ TEMPLATES = [
                 "django.template.context_processors.request",
                 "django.contrib.auth.context_processors.auth",
                 "django.contrib.messages.context_processors.messages",
+                "knowledge_base.context_processors.navigation",
             ],
         },
     },
@@ -113,6 +129,25 @@ DATABASES = {
 #     }
 # }
 
+# Кэш: счётчики версий содержимого, дерево навигации и кэш страниц
+# должны быть общими для всех воркеров, поэтому в продакшене задайте
+# REDIS_URL. Без него используется кэш в памяти процесса — только для
+# разработки с одним процессом (`manage.py check --deploy` предупредит).
+REDIS_URL = os.getenv("REDIS_URL")
+if REDIS_URL:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        }
+    }
+
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
 
@@ -166,4 +201,93 @@ EMAIL_BACKEND = "django.core.mail.backends.filebased.EmailBackend"
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, "sent_emails")
 
 
-OPENAI_API_KEY = os.getenv("OPENAI_API_KEY", "your_openai_api_key_here")
\ No newline at end of file
+# Кэш рендеринга Markdown: размер LRU в памяти процесса и необязательный
+# общий бэкенд из CACHES (например, "default").
+KNOWLEDGE_BASE_RENDER_CACHE = {
+    "MAXSIZE": 1024,
+    "CACHE_ALIAS": None,
+    "TIMEOUT": 60 * 60 * 24,
+}
+
+# Поисковый бэкенд: "auto" (полнотекстовый поиск на PostgreSQL,
+# icontains на остальных базах), "postgres", "database" или "index"
+# (инвертированный индекс BM25 в памяти процесса). Для "index" снимок
+# индекса хранится в INDEX_PATH, а изменения из других процессов
+# подтягиваются не реже раза в INDEX_SYNC_INTERVAL секунд. WARM_UP
+# загружает индексы (и индекс подсказок) при запуске воркера, а не
+# при первом запросе.
+# На странице результатов показывается PAGE_SIZE постов и не больше
+# SECTION_LIMIT категорий и подкатегорий; количество постов считается
+# до COUNT_CAP.
+KNOWLEDGE_BASE_SEARCH = {
+    "BACKEND": "auto",
+    "INDEX_PATH": os.path.join(BASE_DIR, "search_index.bin"),
+    "INDEX_SYNC_INTERVAL": 30,
+    "PAGE_SIZE": 20,
+    "SECTION_LIMIT": 10,
+    "COUNT_CAP": 1000,
+    "WARM_UP": True,
+}
+
+# Кэш ранжированных результатов поиска по нормализованному запросу:
+# размер LRU в памяти процесса, время жизни записи в секундах и
+# необязательный общий бэкенд из CACHES.
+KNOWLEDGE_BASE_SEARCH_CACHE = {
+    "MAXSIZE": 512,
+    "CACHE_ALIAS": None,
+    "TIMEOUT": 300,
+}
+
+# Отложенная запись лайков: переключения копятся в памяти процесса и
+# записываются пачкой раз в FLUSH_INTERVAL секунд или по FLUSH_SIZE пар.
+KNOWLEDGE_BASE_LIKE_BUFFER = {
+    "ENABLED": False,
+    "FLUSH_INTERVAL": 5,
+    "FLUSH_SIZE": 100,
+}
+
+# Общий бэкенд из CACHES для дерева навигации: его строит один воркер
+# после изменения содержимого, остальные читают готовое. Дерево в памяти
+# процесса в любом случае перестраивается не реже раза в минуту.
+KNOWLEDGE_BASE_NAVIGATION_CACHE = "default"
+
+# Кэш целых страниц для анонимных посетителей (заголовок X-Page-Cache).
+# Страница свежая TIMEOUT секунд и до изменения содержимого, затем ещё
+# STALE секунд отдаётся устаревшей, пока её перестраивает один запрос.
+KNOWLEDGE_BASE_PAGE_CACHE = {
+    "ENABLED": not DEBUG,
+    "CACHE_ALIAS": "default",
+    "VIEWS": {
+        "knowledge_base:main": {"TIMEOUT": 60, "STALE": 300},
+        "knowledge_base:category": {"TIMEOUT": 300, "STALE": 600},
+        "knowledge_base:post": {"TIMEOUT": 300, "STALE": 600},
+    },
+}
+
+# Бэкенд из CACHES, в котором хранятся счётчики версий содержимого.
+# Чтобы запись в одном воркере сбрасывала кэши остальных, это должен быть
+# общий кэш (Redis, Memcached). С кэшем в памяти процесса другие воркеры
+# не видят новую версию вовсе: кэши с версией в ключе устаревают там до
+# истечения записей (поиск, страницы) или до перестройки дерева навигации
+# по времени.
+KNOWLEDGE_BASE_VERSION_CACHE = "default"
+
+
+OPENAI_API_KEY = os.getenv("OPENAI_API_KEY", "your_openai_api_key_here")
+
+# Учёт SQL-запросов каждого запроса к сайту (включается в DEBUG):
+# заголовки X-DB-Query-Count / X-DB-Time-Ms / X-DB-Repeated-Queries и
+# предупреждение в лог при превышении бюджета вьюхи или при повторе
+# одного запроса REPEAT_THRESHOLD и более раз (признак N+1). Бюджеты
+# указаны с учётом запросов сессии и пользователя.
+KNOWLEDGE_BASE_QUERY_BUDGET = {
+    "ENABLED": DEBUG,
+    "HEADERS": DEBUG,
+    "REPEAT_THRESHOLD": 3,
+    "BUDGETS": {
+        "knowledge_base:main": 9,
+        "knowledge_base:category": 8,
+        "knowledge_base:search": 9,
+        "knowledge_base:post": 11,
+    },
+}
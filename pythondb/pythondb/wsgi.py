@@ -14,3 +14,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "pythondb.settings")
 
 application = get_wsgi_application()
+
+# Индексы поиска загружаются до первого запроса воркера.
+from knowledge_base.search import warm_up  # noqa: E402
+
+warm_up()
@@ -0,0 +1,74 @@
+// Ленивая загрузка истории чата: страница приходит без истории, а
+// сообщения подгружаются из JSON-эндпоинта страницами по курсору —
+// сначала последние, более старые при прокрутке к началу.
+function loadChatHistory(messagesDiv) {
+    const url = messagesDiv.dataset.historyUrl;
+    if (!url) {
+        return;
+    }
+    let cursor = null;
+    let loading = false;
+    let finished = false;
+
+    function renderDialogue(dialogue) {
+        const fragment = document.createDocumentFragment();
+        const userMessage = document.createElement('div');
+        userMessage.className = 'message user-message';
+        userMessage.textContent = dialogue.user_message;
+        fragment.appendChild(userMessage);
+
+        const botMessage = document.createElement('div');
+        botMessage.className = 'message bot-message';
+        const botContent = document.createElement('div');
+        botContent.className = 'bot-content';
+        // Ответ бота хранится уже отрендеренным HTML.
+        botContent.innerHTML = dialogue.bot_message;
+        botMessage.appendChild(botContent);
+        fragment.appendChild(botMessage);
+        return fragment;
+    }
+
+    function loadPage() {
+        if (loading || finished) {
+            return;
+        }
+        loading = true;
+        const params = new URLSearchParams();
+        if (cursor) {
+            params.set('after', cursor);
+        }
+        fetch(url + '?' + params.toString(), {
+            headers: {'X-Requested-With': 'XMLHttpRequest'},
+        })
+            .then(response => response.json())
+            .then(data => {
+                const firstPage = cursor === null;
+                const previousHeight = messagesDiv.scrollHeight;
+                const fragment = document.createDocumentFragment();
+                // Страница идёт от новых к старым, а чат — сверху вниз.
+                data.results.slice().reverse().forEach(dialogue => {
+                    fragment.appendChild(renderDialogue(dialogue));
+                });
+                messagesDiv.insertBefore(fragment, messagesDiv.firstChild);
+                if (firstPage) {
+                    messagesDiv.scrollTop = messagesDiv.scrollHeight;
+                } else {
+                    // Сохраняем положение прокрутки над добавленными сообщениями.
+                    messagesDiv.scrollTop += messagesDiv.scrollHeight - previousHeight;
+                }
+                cursor = data.next;
+                finished = !data.next;
+            })
+            .catch(error => console.error('Ошибка загрузки истории:', error))
+            .finally(() => {
+                loading = false;
+            });
+    }
+
+    messagesDiv.addEventListener('scroll', function () {
+        if (messagesDiv.scrollTop < 50) {
+            loadPage();
+        }
+    });
+    loadPage();
+}
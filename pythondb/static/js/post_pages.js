@@ -0,0 +1,65 @@
+// Бесконечная прокрутка постов подкатегории: страница приходит с первой
+// страницей постов, а следующие подгружаются HTML-фрагментами по курсору,
+// когда список прокручен почти до конца.
+function loadPostPages(postList) {
+    // Ссылка на #post-<id>, которого нет на этой странице: открываем
+    // страницу, которая начинается с этого поста.
+    const match = /^#post-(\d+)$/.exec(window.location.hash);
+    if (match && !document.getElementById('post-' + match[1])) {
+        const url = new URL(window.location.href);
+        if (!url.searchParams.has('post')) {
+            url.searchParams.delete('after');
+            url.searchParams.set('post', match[1]);
+            window.location.replace(url.toString());
+            return;
+        }
+    }
+
+    let nextUrl = postList.dataset.nextUrl;
+    let loading = false;
+    const loadMore = document.querySelector('.load-more');
+
+    function loadPage() {
+        if (loading || !nextUrl) {
+            return;
+        }
+        loading = true;
+        fetch(nextUrl, {headers: {'X-Requested-With': 'XMLHttpRequest'}})
+            .then(response => {
+                if (!response.ok) {
+                    throw new Error(response.status);
+                }
+                nextUrl = response.headers.get('X-Next-Page');
+                return response.text();
+            })
+            .then(html => {
+                const template = document.createElement('template');
+                template.innerHTML = html;
+                const cards = template.content;
+                if (window.Prism) {
+                    Prism.highlightAllUnder(cards);
+                }
+                postList.appendChild(cards);
+                if (!nextUrl && loadMore) {
+                    loadMore.parentElement.remove();
+                }
+            })
+            .catch(error => console.error('Ошибка загрузки постов:', error))
+            .finally(() => {
+                loading = false;
+            });
+    }
+
+    if (loadMore) {
+        loadMore.addEventListener('click', function (event) {
+            event.preventDefault();
+            loadPage();
+        });
+    }
+    window.addEventListener('scroll', function () {
+        const bottom = postList.getBoundingClientRect().bottom;
+        if (bottom - window.innerHeight < 300) {
+            loadPage();
+        }
+    });
+}
@@ -1,13 +1,13 @@
 from django.contrib.auth import authenticate, login
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.models import User
-from django.core.paginator import Paginator, PageNotAnInteger, EmptyPage
+from django.core.paginator import PageNotAnInteger, EmptyPage
 from django.shortcuts import get_object_or_404, redirect, render
 from django.urls import reverse_lazy
 from django.views.generic import CreateView
 
-from data import CATEGORIES
-from knowledge_base.models import Category, Post
+from knowledge_base.models import Post
+from knowledge_base.pagination import CountedPaginator
 
 from .forms import CreationForm, ResetPasswordForm
 
@@ -44,13 +44,15 @@ def login_view(request):
 
 @login_required
 def profile_view(request, user_id):
-    user_profile = get_object_or_404(User, id=user_id)
-    categories = Category.objects.all()
+    user_profile = get_object_or_404(
+        User.objects.select_related("stats"), id=user_id
+    )
+    # Количество постов берётся из статистики автора, а не из COUNT(*).
+    stats = getattr(user_profile, "stats", None)
+    posts_count = stats.post_count if stats else 0
     posts = Post.objects.filter(author=user_profile).order_by("-created_at")
-    posts_count = posts.count()
-
 
-    paginator = Paginator(posts, 5)
+    paginator = CountedPaginator(posts, 5, posts_count)
     page_number = request.GET.get('page')
 
     try:
@@ -66,7 +68,7 @@ def profile_view(request, user_id):
         {
             "user_profile": user_profile,
             "posts": page_obj,
-            CATEGORIES: categories,
             "count": posts_count,
+            "stats": stats,
         },
     )